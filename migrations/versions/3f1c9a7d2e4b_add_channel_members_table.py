@@ -0,0 +1,36 @@
+"""Add channel_members table
+
+Revision ID: 3f1c9a7d2e4b
+Revises: 5a8eea6d1ecf
+Create Date: 2026-10-18 10:12:40.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2e4b'
+down_revision: Union[str, None] = '5a8eea6d1ecf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('channel_members',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('channel_id', sa.String(length=100), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'channel_id', name='uq_channel_member')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('channel_members')
@@ -0,0 +1,30 @@
+"""Add catalog indexes
+
+Revision ID: 8b2d4e6f1a3c
+Revises: 3f1c9a7d2e4b
+Create Date: 2026-10-18 11:03:27.904115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2d4e6f1a3c'
+down_revision: Union[str, None] = '3f1c9a7d2e4b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_active_name_id', 'products', ['active', 'name', 'id'], unique=False)
+    op.create_index(op.f('ix_product_inventory_product_id'), 'product_inventory', ['product_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_product_inventory_product_id'), table_name='product_inventory')
+    op.drop_index('ix_products_active_name_id', table_name='products')
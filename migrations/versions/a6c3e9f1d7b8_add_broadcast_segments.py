@@ -0,0 +1,38 @@
+"""Add broadcast segments and segment indexes
+
+Revision ID: a6c3e9f1d7b8
+Revises: f5b9d2e8a4c6
+Create Date: 2026-10-18 18:02:44.913027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c3e9f1d7b8'
+down_revision: Union[str, None] = 'f5b9d2e8a4c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('broadcast_jobs') as batch_op:
+        batch_op.add_column(sa.Column('segment', sa.Text(), nullable=True))
+    op.create_index(op.f('ix_users_created_at'), 'users', ['created_at'], unique=False)
+    op.create_index(op.f('ix_orders_user_id'), 'orders', ['user_id'], unique=False)
+    op.create_index(op.f('ix_referrals_user_id'), 'referrals', ['user_id'], unique=False)
+    op.create_index(op.f('ix_referrals_referred_by'), 'referrals', ['referred_by'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_referrals_referred_by'), table_name='referrals')
+    op.drop_index(op.f('ix_referrals_user_id'), table_name='referrals')
+    op.drop_index(op.f('ix_orders_user_id'), table_name='orders')
+    op.drop_index(op.f('ix_users_created_at'), table_name='users')
+    with op.batch_alter_table('broadcast_jobs') as batch_op:
+        batch_op.drop_column('segment')
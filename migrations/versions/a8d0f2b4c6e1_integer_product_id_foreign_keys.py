@@ -0,0 +1,50 @@
+"""Convert cart_items and order_items product_id to integer foreign keys
+
+Revision ID: a8d0f2b4c6e1
+Revises: f7c9e1a3b5d8
+Create Date: 2026-10-18 23:31:26.775804
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d0f2b4c6e1'
+down_revision: Union[str, None] = 'f7c9e1a3b5d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Корзина - временные данные: позиции с нечисловым ID товара удаляем, а дубли,
+    # которые совпадут после приведения ('1' и '01'), схлопываем в последнюю позицию
+    op.execute("DELETE FROM cart_items WHERE product_id = '' OR product_id GLOB '*[^0-9]*'")
+    op.execute(
+        "DELETE FROM cart_items WHERE id NOT IN ("
+        "SELECT MAX(id) FROM cart_items GROUP BY user_id, CAST(product_id AS INTEGER))"
+    )
+
+    # SQLite не меняет тип колонки на месте: batch-режим пересоздает таблицу
+    # и копирует строки одним INSERT ... SELECT с CAST(product_id AS INTEGER)
+    with op.batch_alter_table('cart_items', recreate='always') as batch_op:
+        batch_op.alter_column('product_id', existing_type=sa.String(), type_=sa.Integer(), existing_nullable=False)
+        batch_op.create_foreign_key('fk_cart_items_product_id_products', 'products', ['product_id'], ['id'])
+
+    with op.batch_alter_table('order_items', recreate='always') as batch_op:
+        batch_op.alter_column('product_id', existing_type=sa.String(), type_=sa.Integer(), existing_nullable=False)
+        batch_op.create_foreign_key('fk_order_items_product_id_products', 'products', ['product_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('order_items', recreate='always') as batch_op:
+        batch_op.drop_constraint('fk_order_items_product_id_products', type_='foreignkey')
+        batch_op.alter_column('product_id', existing_type=sa.Integer(), type_=sa.String(), existing_nullable=False)
+
+    with op.batch_alter_table('cart_items', recreate='always') as batch_op:
+        batch_op.drop_constraint('fk_cart_items_product_id_products', type_='foreignkey')
+        batch_op.alter_column('product_id', existing_type=sa.Integer(), type_=sa.String(), existing_nullable=False)
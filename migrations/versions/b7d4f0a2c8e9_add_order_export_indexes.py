@@ -0,0 +1,30 @@
+"""Add indexes for orders export
+
+Revision ID: b7d4f0a2c8e9
+Revises: a6c3e9f1d7b8
+Create Date: 2026-10-18 19:26:31.207418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d4f0a2c8e9'
+down_revision: Union[str, None] = 'a6c3e9f1d7b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_orders_created_at'), 'orders', ['created_at'], unique=False)
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
+    op.drop_index(op.f('ix_orders_created_at'), table_name='orders')
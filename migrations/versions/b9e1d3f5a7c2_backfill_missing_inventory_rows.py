@@ -0,0 +1,35 @@
+"""Create missing product_inventory rows
+
+Revision ID: b9e1d3f5a7c2
+Revises: a8d0f2b4c6e1
+Create Date: 2026-10-18 23:58:44.120563
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e1d3f5a7c2'
+down_revision: Union[str, None] = 'a8d0f2b4c6e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Раньше строка инвентаря создавалась при первом чтении остатка; теперь - только вместе
+    # с товаром, поэтому товарам без нее добавляем нулевой остаток (витрина и так считала их пустыми)
+    op.execute(
+        "INSERT INTO product_inventory (product_id, stock, reserved, updated_at) "
+        "SELECT products.id, 0, 0, CURRENT_TIMESTAMP FROM products "
+        "WHERE NOT EXISTS (SELECT 1 FROM product_inventory WHERE product_inventory.product_id = products.id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Добавленные строки неотличимы от обычных нулевых остатков - оставляем их
+    pass
@@ -0,0 +1,29 @@
+"""Add a stock_reservations index by user and product
+
+Revision ID: c1e3a5b7d9f4
+Revises: b9e1d3f5a7c2
+Create Date: 2026-10-19 10:14:32.518047
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1e3a5b7d9f4'
+down_revision: Union[str, None] = 'b9e1d3f5a7c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Корзина добавляет к свободному остатку собственные резервы покупателя по каждому товару
+    op.create_index('ix_stock_reservations_user_id_product_id', 'stock_reservations', ['user_id', 'product_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stock_reservations_user_id_product_id', table_name='stock_reservations')
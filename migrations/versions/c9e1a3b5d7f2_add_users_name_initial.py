@@ -0,0 +1,39 @@
+"""Add users.name_initial with alphabetical index
+
+Revision ID: c9e1a3b5d7f2
+Revises: b7d4f0a2c8e9
+Create Date: 2026-10-18 20:48:09.631842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.services.db_migrations import backfill_name_initials
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e1a3b5d7f2'
+down_revision: Union[str, None] = 'b7d4f0a2c8e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('name_initial', sa.String(length=1), nullable=True))
+
+    # upper() в SQLite не переводит кириллицу в верхний регистр - заполняем в Python
+    # порциями по первичному ключу, тем же циклом, что и run_migrations()
+    backfill_name_initials(op.get_bind())
+
+    op.create_index('ix_users_initial_name_id', 'users', ['name_initial', 'full_name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_initial_name_id', table_name='users')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('name_initial')
@@ -0,0 +1,57 @@
+"""Add FTS5 search index over users
+
+Revision ID: d1f3a5c7e9b2
+Revises: c9e1a3b5d7f2
+Create Date: 2026-10-18 21:35:12.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1f3a5c7e9b2'
+down_revision: Union[str, None] = 'c9e1a3b5d7f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # External content: текст остается в users, индекс поддерживают триггеры
+    op.execute("""
+        CREATE VIRTUAL TABLE users_fts USING fts5(
+            username, full_name,
+            content='users', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER users_fts_ai AFTER INSERT ON users BEGIN
+            INSERT INTO users_fts(rowid, username, full_name) VALUES (new.id, new.username, new.full_name);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER users_fts_ad AFTER DELETE ON users BEGIN
+            INSERT INTO users_fts(users_fts, rowid, username, full_name)
+            VALUES ('delete', old.id, old.username, old.full_name);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER users_fts_au AFTER UPDATE OF username, full_name ON users BEGIN
+            INSERT INTO users_fts(users_fts, rowid, username, full_name)
+            VALUES ('delete', old.id, old.username, old.full_name);
+            INSERT INTO users_fts(rowid, username, full_name) VALUES (new.id, new.username, new.full_name);
+        END
+    """)
+    op.execute("INSERT INTO users_fts(users_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS users_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS users_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS users_fts_ai")
+    op.execute("DROP TABLE IF EXISTS users_fts")
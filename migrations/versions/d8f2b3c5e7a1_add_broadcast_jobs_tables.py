@@ -0,0 +1,57 @@
+"""Add broadcast_jobs and broadcast_deliveries tables
+
+Revision ID: d8f2b3c5e7a1
+Revises: c4e7a9b1d2f5
+Create Date: 2026-10-18 14:05:52.118406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8f2b3c5e7a1'
+down_revision: Union[str, None] = 'c4e7a9b1d2f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('broadcast_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('cursor', sa.BigInteger(), nullable=True),
+    sa.Column('total', sa.Integer(), nullable=True),
+    sa.Column('sent', sa.Integer(), nullable=True),
+    sa.Column('failed', sa.Integer(), nullable=True),
+    sa.Column('unreachable', sa.Integer(), nullable=True),
+    sa.Column('created_by', sa.BigInteger(), nullable=True),
+    sa.Column('status_chat_id', sa.BigInteger(), nullable=True),
+    sa.Column('status_message_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_broadcast_jobs_status'), 'broadcast_jobs', ['status'], unique=False)
+    op.create_table('broadcast_deliveries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['job_id'], ['broadcast_jobs.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('job_id', 'user_id', name='uq_broadcast_delivery')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('broadcast_deliveries')
+    op.drop_index(op.f('ix_broadcast_jobs_status'), table_name='broadcast_jobs')
+    op.drop_table('broadcast_jobs')
@@ -0,0 +1,32 @@
+"""Add reachability flag to users
+
+Revision ID: e3a7c1f9b2d4
+Revises: d8f2b3c5e7a1
+Create Date: 2026-10-18 15:21:07.402913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a7c1f9b2d4'
+down_revision: Union[str, None] = 'd8f2b3c5e7a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('is_reachable', sa.Boolean(), server_default='1', nullable=False))
+        batch_op.add_column(sa.Column('unreachable_since', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('unreachable_since')
+        batch_op.drop_column('is_reachable')
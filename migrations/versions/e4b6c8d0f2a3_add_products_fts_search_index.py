@@ -0,0 +1,60 @@
+"""Add FTS5 search index over products
+
+Revision ID: e4b6c8d0f2a3
+Revises: d1f3a5c7e9b2
+Create Date: 2026-10-18 22:14:40.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b6c8d0f2a3'
+down_revision: Union[str, None] = 'd1f3a5c7e9b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # prefix='2 3' - индексы коротких префиксов для поиска по мере набора
+    op.execute("""
+        CREATE VIRTUAL TABLE products_fts USING fts5(
+            name, description, category,
+            content='products', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER products_fts_ai AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts(rowid, name, description, category)
+            VALUES (new.id, new.name, new.description, new.category);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER products_fts_ad AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name, description, category)
+            VALUES ('delete', old.id, old.name, old.description, old.category);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER products_fts_au AFTER UPDATE OF name, description, category ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name, description, category)
+            VALUES ('delete', old.id, old.name, old.description, old.category);
+            INSERT INTO products_fts(rowid, name, description, category)
+            VALUES (new.id, new.name, new.description, new.category);
+        END
+    """)
+    op.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS products_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS products_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS products_fts_ai")
+    op.execute("DROP TABLE IF EXISTS products_fts")
@@ -0,0 +1,36 @@
+"""Add source message reference to broadcast_jobs
+
+Revision ID: f5b9d2e8a4c6
+Revises: e3a7c1f9b2d4
+Create Date: 2026-10-18 16:40:13.550271
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5b9d2e8a4c6'
+down_revision: Union[str, None] = 'e3a7c1f9b2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('broadcast_jobs') as batch_op:
+        batch_op.add_column(sa.Column('content_type', sa.String(length=20), server_default='text', nullable=False))
+        batch_op.add_column(sa.Column('source_chat_id', sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column('source_message_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('media', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('broadcast_jobs') as batch_op:
+        batch_op.drop_column('media')
+        batch_op.drop_column('source_message_id')
+        batch_op.drop_column('source_chat_id')
+        batch_op.drop_column('content_type')
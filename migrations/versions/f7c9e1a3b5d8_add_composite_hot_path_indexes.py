@@ -0,0 +1,33 @@
+"""Add composite indexes for user orders and category pages
+
+Revision ID: f7c9e1a3b5d8
+Revises: e4b6c8d0f2a3
+Create Date: 2026-10-18 22:52:07.361549
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7c9e1a3b5d8'
+down_revision: Union[str, None] = 'e4b6c8d0f2a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (user_id, created_at) покрывает и фильтр, и сортировку заказов пользователя; одиночный индекс по user_id лишний
+    op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at'], unique=False)
+    op.drop_index(op.f('ix_orders_user_id'), table_name='orders')
+    op.create_index('ix_products_active_category_name_id', 'products', ['active', 'category', 'name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_active_category_name_id', table_name='products')
+    op.create_index(op.f('ix_orders_user_id'), 'orders', ['user_id'], unique=False)
+    op.drop_index('ix_orders_user_id_created_at', table_name='orders')
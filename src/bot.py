@@ -3,7 +3,8 @@ from aiogram.contrib.fsm_storage.memory import MemoryStorage
 from aiogram.utils import executor
 from config import BOT_TOKEN
 from utils.admin_utils import AdminFilter, AdminAccessFilter
-from middlewares.user_registration import UserRegistrationMiddleware, UserMiddleware
+from middlewares.user_context import UserContextMiddleware
+from middlewares.user_registration import UserMiddleware
 from middlewares.subscription import SubscriptionMiddleware
 import server
 
@@ -12,9 +13,11 @@ from handlers.handler_register import register_all_handlers
 
 # В начале файла после других импортов:
 from services.database_relations import setup_database_relationships
-from services.database import create_tables
+from services.database import create_tables, shutdown_db_executor
 from services.check_database import check_database_structure, fix_inventory_table
 from services.db_migrations import run_migrations
+from utils.reservation_sweeper import start_reservation_sweeper, stop_reservation_sweeper
+from utils.broadcast_jobs import resume_broadcast_jobs, shutdown_broadcast_jobs
 
 # Перед созданием диспетчера:
 setup_database_relationships()
@@ -29,14 +32,28 @@ dp = Dispatcher(bot, storage=storage)
 dp.filters_factory.bind(AdminFilter)
 dp.filters_factory.bind(AdminAccessFilter)
 
-dp.middleware.setup(UserRegistrationMiddleware())  # This registers new users
+dp.middleware.setup(UserContextMiddleware())  # This loads or registers the user once per update
 dp.middleware.setup(UserMiddleware())  # This checks if users are blocked
 dp.middleware.setup(SubscriptionMiddleware())  # This checks subscription status
 
 async def on_startup(dp):
+    start_reservation_sweeper()
+    # Рассылки, прерванные перезапуском, продолжаются с сохраненного курсора
+    await resume_broadcast_jobs(dp.bot)
     print("Bot is online!")
 
+async def on_shutdown(dp):
+    stop_reservation_sweeper()
+    await shutdown_broadcast_jobs()
+    shutdown_db_executor()
+
 if __name__ == '__main__':
     # Регистрируем все обработчики через новую систему
     register_all_handlers(dp)
-    executor.start_polling(dp, on_startup=on_startup)
\ No newline at end of file
+    # chat_member не приходит по умолчанию - запрашиваем все типы обновлений явно
+    executor.start_polling(
+        dp,
+        on_startup=on_startup,
+        on_shutdown=on_shutdown,
+        allowed_updates=types.AllowedUpdates.all()
+    )
\ No newline at end of file
@@ -12,4 +12,27 @@ ADMIN_IDS = [7808908162] # 5000601280
 # Настройки платежной системы
 PAYMENT_PROVIDER_TOKEN = ""  
 PAYMENT_CURRENCY = "XTR"  # Валюта платежей - звезды Telegram
-STAR_TO_RUB_RATE = 9  # Примерный курс: 1 звезда = 9 рублей (или укажите актуальный)
\ No newline at end of file
+STAR_TO_RUB_RATE = 9  # Примерный курс: 1 звезда = 9 рублей (или укажите актуальный)
+
+# Кэш проверок подписки на каналы
+SUBSCRIPTION_CACHE_SIZE = int(os.getenv("SUBSCRIPTION_CACHE_SIZE", 50000))  # Максимум пар (пользователь, канал)
+SUBSCRIPTION_CACHE_POSITIVE_TTL = int(os.getenv("SUBSCRIPTION_CACHE_POSITIVE_TTL", 600))  # Секунд хранить "подписан"
+SUBSCRIPTION_CACHE_NEGATIVE_TTL = int(os.getenv("SUBSCRIPTION_CACHE_NEGATIVE_TTL", 30))  # Секунд хранить "не подписан"
+CHANNEL_INFO_CACHE_TTL = int(os.getenv("CHANNEL_INFO_CACHE_TTL", 3600))  # Секунд хранить название и ссылку канала
+SUBSCRIPTION_CHECK_CONCURRENCY = int(os.getenv("SUBSCRIPTION_CHECK_CONCURRENCY", 5))  # Одновременных запросов get_chat_member
+SUBSCRIPTION_CHECK_TIMEOUT = float(os.getenv("SUBSCRIPTION_CHECK_TIMEOUT", 3))  # Таймаут проверки одного канала, секунд
+CHANNEL_MEMBERSHIP_MAX_AGE = int(os.getenv("CHANNEL_MEMBERSHIP_MAX_AGE", 86400))  # Секунд доверять сохраненному статусу без chat_member
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", 5000))  # Максимум записей в кэше каталога
+CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", 300))  # Секунд жизни кэша товаров и категорий
+CATALOG_STOCK_TTL = int(os.getenv("CATALOG_STOCK_TTL", 15))  # Секунд жизни записей, содержащих остатки
+RESERVATION_TTL = int(os.getenv("RESERVATION_TTL", 900))  # Секунд держать резерв товара после выставления счета
+RESERVATION_SWEEP_INTERVAL = int(os.getenv("RESERVATION_SWEEP_INTERVAL", 60))  # Как часто снимать просроченные резервы, секунд
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", 25))  # Сообщений в секунду на всю рассылку (лимит Telegram ~30)
+BROADCAST_PER_CHAT_INTERVAL = float(os.getenv("BROADCAST_PER_CHAT_INTERVAL", 1))  # Минимум секунд между сообщениями в один чат
+BROADCAST_WORKERS = int(os.getenv("BROADCAST_WORKERS", 10))  # Одновременных отправок
+BROADCAST_CHUNK_SIZE = int(os.getenv("BROADCAST_CHUNK_SIZE", 500))  # Получателей за один запрос к БД
+BROADCAST_MAX_RETRIES = int(os.getenv("BROADCAST_MAX_RETRIES", 3))  # Повторов при сетевых ошибках и RetryAfter
+PROGRESS_UPDATE_INTERVAL = float(os.getenv("PROGRESS_UPDATE_INTERVAL", 3))  # Не чаще одного обновления сообщения с прогрессом за столько секунд
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 5000))  # Строк за один запрос к БД при экспорте
+PRODUCT_SEARCH_MAX_RESULTS = int(os.getenv("PRODUCT_SEARCH_MAX_RESULTS", 50))  # Максимум товаров в результатах поиска (inline-режим отдает до 50)
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", 60))  # Секунд Telegram кэширует ответ на inline-запрос
@@ -1,6 +1,7 @@
 from aiogram import types
 from services.channel_service import ChannelService
 from utils.admin_utils import is_admin
+from utils.subscription_cache import get_subscription_cache_stats
 
 async def list_channels(callback: types.CallbackQuery):
     """Показывает список всех каналов с кнопками управления"""
@@ -35,6 +36,14 @@ async def list_channels(callback: types.CallbackQuery):
         status = "✅ Включен" if channel.is_enabled else "⭕ Отключен"
         text += f"{i}. <b>{channel.channel_name}</b> (<code>{channel.channel_id}</code>)\n   Статус: {status}\n\n"
     
+    # Add subscription check cache counters
+    cache_stats = get_subscription_cache_stats()
+    text += (
+        f"🗄 <b>Кэш проверок подписки:</b> попаданий {cache_stats['hits']}, "
+        f"промахов {cache_stats['misses']} ({cache_stats['hit_ratio']:.0%}), "
+        f"записей {cache_stats['size']}/{cache_stats['maxsize']}\n"
+    )
+    
     # Add controls for each channel
     keyboard = types.InlineKeyboardMarkup(row_width=2)
     
@@ -40,10 +40,18 @@ async def admin_callback_handler(callback: types.CallbackQuery, state: FSMContex
         await orig_message.delete()
         from .statistics import view_user_statistics
         await view_user_statistics(orig_message)
+    elif callback.data == "admin_cache_stats":
+        await orig_message.delete()
+        from .statistics import view_cache_statistics
+        await view_cache_statistics(orig_message)
     elif callback.data == "export_users":
+        await orig_message.delete()
+        from .statistics import choose_export_format
+        await choose_export_format(orig_message)
+    elif callback.data in ("export_users_xlsx", "export_users_csv"):
         await orig_message.delete()
         from .statistics import export_user_list
-        await export_user_list(orig_message)
+        await export_user_list(orig_message, callback.data.rsplit("_", 1)[1])
     elif callback.data == "search_user":
         await orig_message.delete()
         # Показываем варианты поиска: по тексту или по букве
@@ -68,10 +76,8 @@ async def admin_callback_handler(callback: types.CallbackQuery, state: FSMContex
         await AdminStates.waiting_for_unblock_username.set()
     elif callback.data == "mass_message":
         await orig_message.delete()
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="cancel_state"))
-        await orig_message.answer("Введите сообщение для массовой рассылки:", reply_markup=keyboard)
-        await AdminStates.waiting_for_mass_message.set()
+        from .messaging import show_segment_menu
+        await show_segment_menu(orig_message)
     elif callback.data == "manage_channels":
         await orig_message.delete()
         from .channels import manage_channels_menu
@@ -1,75 +1,283 @@
 import asyncio
 from aiogram import Dispatcher, types
 from aiogram.dispatcher import FSMContext
-from services.database import get_database_session, User
+from services.database import run_db
+from services.broadcast_service import (
+    JOB_RUNNING,
+    JOB_PAUSED,
+    JOB_CANCELLED,
+    SEGMENT_ALL,
+    SEGMENT_WITH_ORDERS,
+    SEGMENT_REFERRED_BY,
+    SEGMENT_REGISTERED,
+    SEGMENT_EXCEPTIONS,
+    describe_segment,
+    count_recipients,
+    create_broadcast_job,
+    get_broadcast_job,
+    get_broadcast_jobs,
+    set_broadcast_job_status,
+    set_broadcast_job_message
+)
+from utils.admin_utils import is_admin
+from utils.misc import parse_date_range, ReversedDateRangeError
+from utils.broadcast_jobs import (
+    job_keyboard,
+    format_job_status,
+    media_group_item,
+    start_broadcast_job,
+    stop_broadcast_job
+)
 from .core import AdminStates
 
+# Сколько ждать остальные сообщения альбома после первого, секунд
+ALBUM_COLLECT_DELAY = 1.0
+
+# Собираемые альбомы: media_group_id -> список сообщений
+_album_buffer = {}
+
+def _back_keyboard():
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="cancel_state"))
+    return keyboard
+
+async def show_segment_menu(message: types.Message):
+    """Выбор аудитории рассылки"""
+    keyboard = types.InlineKeyboardMarkup(row_width=2)
+    keyboard.add(
+        types.InlineKeyboardButton("👥 Все", callback_data=f"bcseg_{SEGMENT_ALL}"),
+        types.InlineKeyboardButton("🛒 С заказами", callback_data=f"bcseg_{SEGMENT_WITH_ORDERS}")
+    )
+    keyboard.add(
+        types.InlineKeyboardButton("🔗 Приглашённые", callback_data=f"bcseg_{SEGMENT_REFERRED_BY}"),
+        types.InlineKeyboardButton("📅 По дате регистрации", callback_data=f"bcseg_{SEGMENT_REGISTERED}")
+    )
+    keyboard.add(types.InlineKeyboardButton("⭐ Исключения", callback_data=f"bcseg_{SEGMENT_EXCEPTIONS}"))
+    keyboard.add(types.InlineKeyboardButton("📋 Рассылки", callback_data="bcjobs"))
+    keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="admin_back"))
+    await message.answer("Кому отправить рассылку?", reply_markup=keyboard)
+
+async def _ask_for_message(message: types.Message, state: FSMContext, segment):
+    """Показывает число получателей сегмента (dry-run) и ждет сообщение для рассылки"""
+    total = await run_db(count_recipients, segment=segment)
+    await state.update_data(broadcast_segment=segment)
+    await AdminStates.waiting_for_mass_message.set()
+    await message.answer(
+        f"Аудитория: {describe_segment(segment)}\n"
+        f"Получателей: {total}\n\n"
+        "Отправьте сообщение для массовой рассылки (текст, фото, видео, документ или альбом):",
+        reply_markup=_back_keyboard()
+    )
+
+async def segment_callback(callback: types.CallbackQuery, state: FSMContext):
+    """Выбор сегмента получателей"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("У вас нет прав доступа!", show_alert=True)
+        return
+    
+    await callback.answer()
+    await callback.message.delete()
+    segment_type = callback.data.split("_", 1)[1]
+    
+    if segment_type == SEGMENT_REFERRED_BY:
+        await AdminStates.waiting_for_segment_referrer.set()
+        await callback.message.answer("Введите ID пользователя, пригласившего получателей:", reply_markup=_back_keyboard())
+    elif segment_type == SEGMENT_REGISTERED:
+        await AdminStates.waiting_for_segment_dates.set()
+        await callback.message.answer(
+            "Введите период регистрации в формате ДД.ММ.ГГГГ-ДД.ММ.ГГГГ\n"
+            "(одну из дат можно не указывать, например 01.01.2025-):",
+            reply_markup=_back_keyboard()
+        )
+    elif segment_type == SEGMENT_ALL:
+        await _ask_for_message(callback.message, state, None)
+    else:
+        await _ask_for_message(callback.message, state, {"type": segment_type})
+
+async def segment_referrer_input(message: types.Message, state: FSMContext):
+    """ID пригласившего для сегмента рассылки"""
+    try:
+        referrer_id = int(message.text.strip())
+    except (TypeError, ValueError):
+        await message.answer("ID должен быть числом. Попробуйте еще раз:", reply_markup=_back_keyboard())
+        return
+    await _ask_for_message(message, state, {"type": SEGMENT_REFERRED_BY, "referrer_id": referrer_id})
+
+async def segment_dates_input(message: types.Message, state: FSMContext):
+    """Период регистрации для сегмента рассылки"""
+    try:
+        date_from, date_to = parse_date_range(message.text)
+    except ReversedDateRangeError:
+        await message.answer(
+            "Начальная дата периода позже конечной. Проверьте порядок дат.",
+            reply_markup=_back_keyboard()
+        )
+        return
+    except ValueError:
+        await message.answer(
+            "Не удалось разобрать период. Формат: ДД.ММ.ГГГГ-ДД.ММ.ГГГГ",
+            reply_markup=_back_keyboard()
+        )
+        return
+    
+    segment = {"type": SEGMENT_REGISTERED}
+    if date_from:
+        segment["date_from"] = date_from.isoformat()
+    if date_to:
+        segment["date_to"] = date_to.isoformat()
+    await _ask_for_message(message, state, segment)
+
 async def mass_message(message: types.Message, state: FSMContext):
-    """Отправка массовой рассылки всем пользователям"""
-    mass_msg_text = message.text
-    session = get_database_session()
+    """
+    Создает задание массовой рассылки из сообщения любого типа и запускает его в фоне.
+    Сохраняется только ссылка на сообщение: получатели получают copy_message,
+    альбом - send_media_group по file_id, так что медиа загружается в Telegram один раз
+    """
+    album = None
+    if message.media_group_id:
+        # Сообщения альбома приходят отдельными обновлениями - собираем их по media_group_id
+        if message.media_group_id in _album_buffer:
+            _album_buffer[message.media_group_id].append(message)
+            return
+        _album_buffer[message.media_group_id] = [message]
+        await asyncio.sleep(ALBUM_COLLECT_DELAY)
+        album = sorted(_album_buffer.pop(message.media_group_id), key=lambda m: m.message_id)
+    
+    segment = (await state.get_data()).get("broadcast_segment")
+    # Рассылка может идти долго - освобождаем состояние администратора сразу
+    await state.finish()
+    
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="admin_back"))
     
     try:
         # Get bot instance
         from bot import bot
         
-        # Get all active users
-        query = session.query(User)
-        if hasattr(User, 'is_blocked'):
-            query = query.filter(User.is_blocked == False)
+        total = await run_db(count_recipients, segment=segment)
         
-        users = query.all()
-        
-        if not users:
+        if not total:
             await message.answer("Нет пользователей для отправки сообщения.")
-            await state.finish()
             return
         
-        # Send progress report
-        status_msg = await message.answer(f"Отправка сообщения {len(users)} пользователям... 0%")
-        
-        # Send messages
-        success_count = 0
-        fail_count = 0
-        
-        for i, user in enumerate(users):
-            try:
-                # Update progress every 10 users
-                if i % 10 == 0 and i > 0:
-                    progress = int((i / len(users)) * 100)
-                    await status_msg.edit_text(f"Отправка сообщения {len(users)} пользователям... {progress}%")
-                
-                # Send message to user
-                await bot.send_message(chat_id=user.id, text=mass_msg_text)
-                success_count += 1
-                
-                # Small delay to avoid hitting rate limits
-                await asyncio.sleep(0.05)
-                
-            except Exception:
-                fail_count += 1
-        
-        # Final report with back button
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="admin_back"))
+        if album:
+            media = [item for item in (media_group_item(m) for m in album) if item]
+            if not media:
+                await message.answer("Этот тип альбома не поддерживается для рассылки.", reply_markup=keyboard)
+                return
+            caption = next((item["caption"] for item in media if item["caption"]), None)
+            job_params = {
+                "text": caption or f"[альбом: {len(media)}]",
+                "content_type": "media_group",
+                "media": media
+            }
+        else:
+            # Для текста тоже copy_message: сохраняется форматирование исходного сообщения
+            job_params = {
+                "text": message.text or message.caption or f"[{message.content_type}]",
+                "content_type": message.content_type,
+                "source_chat_id": message.chat.id,
+                "source_message_id": message.message_id
+            }
         
-        await status_msg.edit_text(
-            f"Отправка сообщений завершена:\n"
-            f"✅ Успешно отправлено: {success_count}\n"
-            f"❌ Не удалось отправить: {fail_count}",
-            reply_markup=keyboard
+        # Задание хранится в БД: после перезапуска бота рассылка продолжится с курсора
+        job_id = await run_db(
+            create_broadcast_job, created_by=message.from_user.id, total=total, segment=segment, **job_params
         )
+        job = await run_db(get_broadcast_job, job_id)
         
-        await state.finish()
+        status_msg = await message.answer(format_job_status(job), reply_markup=job_keyboard(job_id, job["status"]))
+        await run_db(set_broadcast_job_message, job_id, status_msg.chat.id, status_msg.message_id)
+        job = await run_db(get_broadcast_job, job_id)
+        
+        start_broadcast_job(bot, job)
         
     except Exception as e:
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="admin_back"))
         await message.answer(f"Ошибка при отправке массового сообщения: {str(e)}", reply_markup=keyboard)
+
+async def view_broadcast_jobs(message: types.Message):
+    """Список последних заданий рассылки"""
+    jobs = await run_db(get_broadcast_jobs)
+    
+    keyboard = types.InlineKeyboardMarkup()
+    if not jobs:
+        keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="admin_back"))
+        await message.answer("Рассылок пока не было.", reply_markup=keyboard)
+        return
+    
+    for job in jobs:
+        title = job["text"] if len(job["text"]) <= 30 else job["text"][:30] + "…"
+        keyboard.add(types.InlineKeyboardButton(
+            f"#{job['id']} [{job['status']}] {title}",
+            callback_data=f"bcjob_view_{job['id']}"
+        ))
+    keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="admin_back"))
+    await message.answer("Последние рассылки:", reply_markup=keyboard)
+
+async def broadcast_jobs_list_callback(callback: types.CallbackQuery, state: FSMContext):
+    """Открывает список рассылок (в том числе из ожидания текста рассылки)"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("У вас нет прав доступа!", show_alert=True)
+        return
+    
+    await callback.answer()
+    if await state.get_state():
         await state.finish()
-    finally:
-        session.close()
+    await callback.message.delete()
+    await view_broadcast_jobs(callback.message)
+
+async def broadcast_job_callback(callback: types.CallbackQuery):
+    """Просмотр, пауза, продолжение и отмена задания рассылки"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("У вас нет прав доступа!", show_alert=True)
+        return
+    
+    _, action, job_id = callback.data.split("_", 2)
+    job_id = int(job_id)
+    
+    if action == "pause":
+        changed = await run_db(set_broadcast_job_status, job_id, JOB_PAUSED, (JOB_RUNNING,))
+        if changed:
+            stop_broadcast_job(job_id, JOB_PAUSED)
+        await callback.answer("Рассылка приостановлена" if changed else "Рассылка уже не выполняется")
+    elif action == "resume":
+        changed = await run_db(set_broadcast_job_status, job_id, JOB_RUNNING, (JOB_PAUSED,))
+        if changed:
+            from bot import bot
+            start_broadcast_job(bot, await run_db(get_broadcast_job, job_id))
+        await callback.answer("Рассылка продолжена" if changed else "Рассылка не на паузе")
+    elif action == "cancel":
+        changed = await run_db(set_broadcast_job_status, job_id, JOB_CANCELLED, (JOB_RUNNING, JOB_PAUSED))
+        if changed:
+            stop_broadcast_job(job_id, JOB_CANCELLED)
+        await callback.answer("Рассылка отменена" if changed else "Рассылка уже завершена")
+    else:
+        await callback.answer()
+    
+    job = await run_db(get_broadcast_job, job_id)
+    if job is None:
+        return
+    
+    if action == "view":
+        await callback.message.delete()
+        status_msg = await callback.message.answer(format_job_status(job), reply_markup=job_keyboard(job_id, job["status"]))
+        # Прогресс выполняющегося задания показываем в новом сообщении
+        await run_db(set_broadcast_job_message, job_id, status_msg.chat.id, status_msg.message_id)
+    else:
+        try:
+            await callback.message.edit_text(format_job_status(job), reply_markup=job_keyboard(job_id, job["status"]))
+        except Exception:
+            pass
 
 def register_messaging_handlers(dp: Dispatcher):
     """Регистрирует обработчики для массовой рассылки"""
-    dp.register_message_handler(mass_message, state=AdminStates.waiting_for_mass_message)
\ No newline at end of file
+    dp.register_message_handler(
+        mass_message,
+        content_types=types.ContentTypes.ANY,
+        state=AdminStates.waiting_for_mass_message
+    )
+    dp.register_callback_query_handler(segment_callback, lambda c: c.data.startswith("bcseg_"), state="*")
+    dp.register_message_handler(segment_referrer_input, state=AdminStates.waiting_for_segment_referrer)
+    dp.register_message_handler(segment_dates_input, state=AdminStates.waiting_for_segment_dates)
+    dp.register_callback_query_handler(broadcast_jobs_list_callback, lambda c: c.data == "bcjobs", state="*")
+    dp.register_callback_query_handler(broadcast_job_callback, lambda c: c.data.startswith("bcjob_"), state="*")
@@ -2,7 +2,7 @@ import traceback
 from aiogram import types, Dispatcher
 from aiogram.dispatcher import FSMContext
 from handlers.admin.states import AdminStates
-from services.product_service import create_product, update_product_stock
+from services.product_service import create_product
 from utils.message_utils import safe_delete_message
 
 async def confirm_product_creation(callback: types.CallbackQuery, state: FSMContext):
@@ -26,23 +26,17 @@ async def confirm_product_creation(callback: types.CallbackQuery, state: FSMCont
     processing_message = await callback.message.answer("⏱ Создаем товар...")
     
     try:
-        # Создаем товар
-        product_id = create_product(name, description, price, image_url, category)
+        # Создаем товар вместе с остатком на складе
+        product_id = create_product(name, description, price, image_url, category, stock=stock)
         
         if product_id:
-            # Обновляем количество товара
-            stock_success = update_product_stock(product_id, stock)
-            
             # Удаляем сообщение о процессе
             await safe_delete_message(processing_message)
             
             keyboard = types.InlineKeyboardMarkup()
             keyboard.add(types.InlineKeyboardButton("◀️ К управлению товарами", callback_data="manage_products"))
             
-            if stock_success:
-                success_text = f"✅ Товар успешно создан!\n\nID товара: <code>{product_id}</code>"
-            else:
-                success_text = f"✅ Товар создан, но не удалось установить количество.\n\nID товара: <code>{product_id}</code>"
+            success_text = f"✅ Товар успешно создан!\n\nID товара: <code>{product_id}</code>"
             
             await callback.message.answer(
                 success_text, 
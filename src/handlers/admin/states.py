@@ -3,9 +3,13 @@ from aiogram.dispatcher.filters.state import State, StatesGroup
 # Состояния для операций админа
 class AdminStates(StatesGroup):
     waiting_for_search = State()
+    browsing_search_results = State()
     waiting_for_block_username = State()
     waiting_for_unblock_username = State()
     waiting_for_mass_message = State()
+    waiting_for_segment_referrer = State()
+    waiting_for_segment_dates = State()
+    waiting_for_orders_export_period = State()
     browsing_letters = State()
     browsing_users_by_letter = State()
     waiting_for_channel_input = State()
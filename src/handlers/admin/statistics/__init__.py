@@ -1,7 +1,9 @@
 from aiogram import Dispatcher
 
 # Ре-экспортируем функции для обратной совместимости
-from .users import view_user_statistics, export_user_list
+from .users import view_user_statistics, export_user_list, choose_export_format
+from .orders import ask_orders_export_period, orders_export_period_input, export_orders
+from .cache import view_cache_statistics
 from .referrals.stats import view_referral_statistics
 from .referrals.admin import admin_referral_link, admin_my_referrals
 
@@ -11,6 +13,12 @@ def register_statistics_handlers(dp: Dispatcher):
     dp.register_callback_query_handler(view_user_statistics, lambda c: c.data == "user_stats")
     dp.register_callback_query_handler(export_user_list, lambda c: c.data == "export_users")
     
+    # Выгрузка заказов за период
+    from ..states import AdminStates
+    dp.register_callback_query_handler(ask_orders_export_period, lambda c: c.data == "export_orders", state="*")
+    dp.register_message_handler(orders_export_period_input, state=AdminStates.waiting_for_orders_export_period)
+    dp.register_callback_query_handler(export_orders, lambda c: c.data.startswith("export_orders_"), state="*")
+    
     # Регистрируем обработчики для реферальной системы
     from .referrals import register_referral_handlers
     register_referral_handlers(dp)
@@ -20,6 +28,9 @@ __all__ = [
     'register_statistics_handlers',
     'view_user_statistics',
     'export_user_list',
+    'choose_export_format',
+    'export_orders',
+    'view_cache_statistics',
     'view_referral_statistics',
     'admin_referral_link',
     'admin_my_referrals'
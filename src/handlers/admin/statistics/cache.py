@@ -0,0 +1,27 @@
+from aiogram import types
+from utils.catalog_cache import get_catalog_cache_stats
+from utils.subscription_cache import membership_cache
+
+def _format_cache_stats(title, stats):
+    """Строка статистики одного кэша"""
+    return (
+        f"<b>{title}</b>\n"
+        f"Попадания: <b>{stats['hit_ratio']:.0%}</b> ({stats['hits']} / {stats['hits'] + stats['misses']})\n"
+        f"Записей: {stats['size']} из {stats['maxsize']}, вытеснено: {stats['evictions']}\n"
+        f"Память: ~{stats['memory_bytes'] / 1024:.1f} КБ\n"
+    )
+
+async def view_cache_statistics(message: types.Message):
+    """Показывает эффективность и объем кэшей в памяти"""
+    subscription_stats = membership_cache.stats()
+    subscription_stats["memory_bytes"] = membership_cache.memory_usage()
+    
+    text = "🗄 <b>Кэши:</b>\n\n"
+    text += _format_cache_stats("🛒 Каталог товаров", get_catalog_cache_stats()) + "\n"
+    text += _format_cache_stats("📢 Проверки подписки", subscription_stats)
+    
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.add(types.InlineKeyboardButton("🔄 Обновить", callback_data="admin_cache_stats"))
+    keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="admin_back"))
+    
+    await message.answer(text, parse_mode="HTML", reply_markup=keyboard)
@@ -0,0 +1,50 @@
+import os
+import asyncio
+import functools
+import tempfile
+from aiogram import types
+from utils.progress import ProgressReporter
+
+async def send_export(message: types.Message, export_func, total, filename, title, reply_markup=None):
+    """
+    Выполняет export_func(path, on_progress=...) в отдельном потоке и отправляет файл.
+    Файл создается во временном каталоге и удаляется после отправки
+
+    Args:
+        message: Сообщение, в чат которого отправляется файл
+        export_func: Функция выгрузки, пишущая файл по пути path; возвращает число строк
+        total: Ожидаемое число строк (для прогресса)
+        filename: Имя файла для пользователя
+        title: Заголовок сообщения с прогрессом
+
+    Returns:
+        int: Количество выгруженных строк
+    """
+    status_msg = await message.answer(f"{title}: {total} строк...")
+    reporter = ProgressReporter(total, edit=status_msg.edit_text, title=title)
+    
+    progress = {"done": 0}
+    
+    def on_progress(done):
+        progress["done"] = done
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = os.path.join(tmp_dir, filename)
+        
+        # Не пул потоков БД: выгрузка долгая и не должна занимать его потоки
+        loop = asyncio.get_running_loop()
+        export_task = loop.run_in_executor(None, functools.partial(export_func, filepath, on_progress=on_progress))
+        while True:
+            done, _ = await asyncio.wait({export_task}, timeout=1)
+            if done:
+                break
+            await reporter.update(progress["done"])
+        exported = export_task.result()
+        
+        await status_msg.delete()
+        await message.answer_document(
+            types.InputFile(filepath, filename=filename),
+            caption=f"Exported {exported} rows",
+            reply_markup=reply_markup
+        )
+    return exported
@@ -0,0 +1,106 @@
+import functools
+from datetime import datetime
+from aiogram import types
+from aiogram.dispatcher import FSMContext
+from config import EXPORT_CHUNK_SIZE
+from services.database import run_db
+from services.export_service import count_order_items, export_orders_xlsx, export_orders_csv_gz
+from utils.admin_utils import is_admin
+from utils.misc import parse_date_range, ReversedDateRangeError
+from ..states import AdminStates
+from .export import send_export
+
+def _period_token(value):
+    """Граница периода для callback_data: YYYYMMDD или x, если не задана"""
+    return value.strftime("%Y%m%d") if value else "x"
+
+def _parse_period_token(token):
+    return datetime.strptime(token, "%Y%m%d").date() if token != "x" else None
+
+def _describe_period(date_from, date_to):
+    return (
+        f"{date_from.strftime('%d.%m.%Y') if date_from else '…'}–"
+        f"{date_to.strftime('%d.%m.%Y') if date_to else '…'}"
+    )
+
+async def ask_orders_export_period(callback: types.CallbackQuery, state: FSMContext):
+    """Запрашивает период выгрузки заказов"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("У вас нет прав доступа!", show_alert=True)
+        return
+    
+    await callback.answer()
+    await callback.message.delete()
+    
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="cancel_state"))
+    await AdminStates.waiting_for_orders_export_period.set()
+    await callback.message.answer(
+        "Введите период заказов в формате ДД.ММ.ГГГГ-ДД.ММ.ГГГГ\n"
+        "(одну из дат можно не указывать, например 01.01.2025-):",
+        reply_markup=keyboard
+    )
+
+async def orders_export_period_input(message: types.Message, state: FSMContext):
+    """Проверяет период и предлагает формат выгрузки"""
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="cancel_state"))
+    try:
+        date_from, date_to = parse_date_range(message.text)
+    except ReversedDateRangeError:
+        await message.answer("Начальная дата периода позже конечной. Проверьте порядок дат.", reply_markup=keyboard)
+        return
+    except ValueError:
+        await message.answer("Не удалось разобрать период. Формат: ДД.ММ.ГГГГ-ДД.ММ.ГГГГ", reply_markup=keyboard)
+        return
+    
+    await state.finish()
+    total = await run_db(count_order_items, date_from, date_to)
+    
+    period = f"{_period_token(date_from)}_{_period_token(date_to)}"
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.add(
+        types.InlineKeyboardButton("📊 Excel (.xlsx)", callback_data=f"export_orders_xlsx_{period}"),
+        types.InlineKeyboardButton("🗜 CSV (.csv.gz)", callback_data=f"export_orders_csv_{period}")
+    )
+    keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="admin_back"))
+    await message.answer(
+        f"Период: {_describe_period(date_from, date_to)}\n"
+        f"Позиций заказов: {total}\n\n"
+        "Выберите формат выгрузки:",
+        reply_markup=keyboard
+    )
+
+async def export_orders(callback: types.CallbackQuery):
+    """Выгружает позиции заказов за период с данными заказа и названиями товаров"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("У вас нет прав доступа!", show_alert=True)
+        return
+    
+    await callback.answer()
+    message = callback.message
+    await message.delete()
+    
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="admin_back"))
+    
+    try:
+        _, _, export_format, date_from, date_to = callback.data.split("_")
+        date_from, date_to = _parse_period_token(date_from), _parse_period_token(date_to)
+        export_func, extension = {
+            "xlsx": (export_orders_xlsx, "xlsx"),
+            "csv": (export_orders_csv_gz, "csv.gz"),
+        }[export_format]
+        
+        total = await run_db(count_order_items, date_from, date_to)
+        filename = f"orders_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        await send_export(
+            message,
+            functools.partial(export_func, date_from=date_from, date_to=date_to, chunk_size=EXPORT_CHUNK_SIZE),
+            total,
+            filename,
+            f"🧾 Выгрузка заказов {_describe_period(date_from, date_to)}",
+            reply_markup=keyboard
+        )
+    except Exception as e:
+        await message.answer(f"Ошибка при выгрузке заказов: {str(e)}", reply_markup=keyboard)
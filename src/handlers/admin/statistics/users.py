@@ -1,9 +1,10 @@
-import os
-import openpyxl
-from openpyxl.styles import Font
+import functools
 from datetime import datetime, timedelta
 from aiogram import types
-from services.database import get_database_session, User
+from config import EXPORT_CHUNK_SIZE
+from services.database import get_database_session, run_db, User
+from services.export_service import count_users, export_users_xlsx, export_users_csv_gz
+from .export import send_export
 
 async def view_user_statistics(message: types.Message):
     """Показывает статистику пользователей"""
@@ -42,62 +43,42 @@ async def view_user_statistics(message: types.Message):
     finally:
         session.close()
 
-async def export_user_list(message: types.Message):
-    """Экспортирует список пользователей в Excel-файл"""
+async def choose_export_format(message: types.Message):
+    """Выбор выгрузки: пользователи в нужном формате или продажи за период"""
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.add(
+        types.InlineKeyboardButton("📊 Excel (.xlsx)", callback_data="export_users_xlsx"),
+        types.InlineKeyboardButton("🗜 CSV (.csv.gz)", callback_data="export_users_csv")
+    )
+    keyboard.add(types.InlineKeyboardButton("🧾 Заказы и продажи", callback_data="export_orders"))
+    keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="admin_back"))
+    await message.answer("Выберите формат экспорта пользователей или выгрузку продаж:", reply_markup=keyboard)
+
+async def export_user_list(message: types.Message, export_format="xlsx"):
+    """
+    Экспортирует список пользователей в xlsx или csv.gz.
+    Пользователи читаются порциями и пишутся во временный файл в отдельном потоке,
+    поэтому память ограничена размером порции, а бот продолжает обрабатывать обновления
+    """
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="admin_back"))
+    
+    export_func, extension = {
+        "xlsx": (export_users_xlsx, "xlsx"),
+        "csv": (export_users_csv_gz, "csv.gz"),
+    }[export_format]
+    
     try:
-        session = get_database_session()
-        users = session.query(User).all()
-        
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Users"
-        
-        headers = ["ID", "Username", "Full Name"]
-        if hasattr(User, 'is_blocked'):
-            headers.append("Blocked")
-        if hasattr(User, 'is_exception'):
-            headers.append("Exception")
-        if hasattr(User, 'created_at'):
-            headers.append("Registration Date")
-            
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_num)
-            cell.value = header
-            cell.font = Font(bold=True)
-        
-        for row_num, user in enumerate(users, 2):
-            ws.cell(row=row_num, column=1).value = user.id
-            ws.cell(row=row_num, column=2).value = user.username
-            ws.cell(row=row_num, column=3).value = user.full_name
-            
-            col = 4
-            if hasattr(User, 'is_blocked'):
-                ws.cell(row=row_num, column=col).value = "Yes" if user.is_blocked else "No"
-                col += 1
-            if hasattr(User, 'is_exception'):
-                ws.cell(row=row_num, column=col).value = "Yes" if user.is_exception else "No"
-                col += 1
-            if hasattr(User, 'created_at'):
-                ws.cell(row=row_num, column=col).value = user.created_at.strftime("%Y-%m-%d %H:%M:%S") if user.created_at else ""
-        
-        filename = f"users_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        filepath = os.path.join(os.getcwd(), filename)
-        wb.save(filepath)
-        
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="admin_back"))
-        
-        with open(filepath, 'rb') as file:
-            await message.answer_document(
-                types.InputFile(file, filename=filename),
-                caption=f"Exported {len(users)} users",
-                reply_markup=keyboard
-            )
-        
-        os.remove(filepath)
-        session.close()
+        total = await run_db(count_users)
+        filename = f"users_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        await send_export(
+            message,
+            functools.partial(export_func, chunk_size=EXPORT_CHUNK_SIZE),
+            total,
+            filename,
+            "📁 Экспорт пользователей",
+            reply_markup=keyboard
+        )
         
     except Exception as e:
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="admin_back"))
-        await message.answer(f"Error exporting users: {str(e)}", reply_markup=keyboard)
\ No newline at end of file
+        await message.answer(f"Error exporting users: {str(e)}", reply_markup=keyboard)
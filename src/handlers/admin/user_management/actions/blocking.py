@@ -34,8 +34,8 @@ async def handle_block_action(callback: types.CallbackQuery):
         user.is_blocked = not is_unblock
         session.commit()
         
-        # Уведомляем пользователя о блокировке (только если блокируем)
-        if not is_unblock:
+        # Уведомляем пользователя о блокировке (только если блокируем и бот может ему писать)
+        if not is_unblock and user.is_reachable is not False:
             try:
                 from bot import bot
                 await bot.send_message(
@@ -1,18 +1,8 @@
 from aiogram import types
 from utils.admin_utils import is_admin
-from services.order_service import OrderService
-from services.product_service import get_product_by_id
+from services.order_service import OrderService, order_item_name
 import traceback
 
-# Вспомогательная функция
-def get_product_name(product_id):
-    """Получает имя продукта по его ID"""
-    # ИСПРАВЛЕНО: Используем данные из базы данных
-    product = get_product_by_id(product_id)
-    if product:
-        return product.get('name', f"Товар #{product_id}")
-    return f"Товар #{product_id}"  # Возвращаем заглушку только если товар не найден
-
 async def view_order_details(callback: types.CallbackQuery):
     """Просмотр деталей конкретного заказа с улучшенной обработкой ошибок"""
     if not is_admin(callback.from_user.id):
@@ -84,7 +74,7 @@ async def view_order_details(callback: types.CallbackQuery):
         
         if items:
             for i, item in enumerate(items, 1):
-                product_name = get_product_name(item.product_id)
+                product_name = order_item_name(item)
                 item_total = item.price * item.quantity
                 message_text += f"{i}. <b>{product_name}</b> - {item.quantity} шт. × {item.price:.2f} ⭐ = {item_total:.2f} ⭐\n"
         else:
@@ -1,10 +1,13 @@
 from aiogram import Dispatcher, types
 from aiogram.dispatcher import FSMContext
-from sqlalchemy import func
-from services.database import get_database_session, User
+from services.database import run_db
+from services.user_service import UserService
 from utils.admin_utils import is_admin
 from ..core import AdminStates
 
+# Пользователей на странице алфавитного списка
+USERS_PER_PAGE = 7
+
 async def letter_select_handler(callback: types.CallbackQuery, state: FSMContext):
     """Обрабатывает выбор буквы для просмотра пользователей"""
     if not is_admin(callback.from_user.id):
@@ -34,26 +37,24 @@ async def letter_select_handler(callback: types.CallbackQuery, state: FSMContext
     
     await show_users_by_letter(callback.message, letter, 0, state)
 
-async def show_users_by_letter(message, letter, page, state):
-    """Показывает пользователей с именами, начинающимися на указанную букву"""
-    session = get_database_session()
+async def show_users_by_letter(message, letter, page, state, after_id=None, before_id=None):
+    """
+    Показывает пользователей с именами, начинающимися на указанную букву.
+    Страницы листаются keyset-курсором по (full_name, id): after_id - последний
+    пользователь предыдущей страницы, before_id - первый пользователь следующей
+    """
     try:
-        # Изменяем фильтр на first_name вместо username
-        users_query = session.query(User).filter(
-            func.upper(func.substr(User.full_name, 1, 1)) == letter.upper()
-        ).order_by(User.full_name)  # Также меняем сортировку
-        
-        total_users = users_query.count()
-        
-        users_per_page = 7
-        total_pages = max(1, (total_users + users_per_page - 1) // users_per_page)
+        with UserService() as user_service:
+            total_users = await run_db(user_service.count_users_by_initial, letter)
+            users, has_more = await run_db(
+                user_service.get_users_by_initial, letter, USERS_PER_PAGE, after_id, before_id
+            )
         
+        total_pages = max(1, (total_users + USERS_PER_PAGE - 1) // USERS_PER_PAGE)
         page = max(0, min(page, total_pages - 1))
         
         await state.update_data(page=page)
         
-        users = users_query.offset(page * users_per_page).limit(users_per_page).all()
-        
         keyboard = types.InlineKeyboardMarkup(row_width=1)
         
         for user in users:
@@ -62,20 +63,24 @@ async def show_users_by_letter(message, letter, page, state):
                 display_name, callback_data=f"view_user_{user.id}"
             ))
         
+        # При листании назад has_more говорит о предыдущих страницах, вперед - о следующих
+        has_prev = has_more if before_id is not None else after_id is not None
+        has_next = has_more if before_id is None else True
+        
         nav_buttons = []
         
-        if page > 0:
+        if has_prev and users:
             nav_buttons.append(types.InlineKeyboardButton(
-                "⬅️ Назад", callback_data="prev_page"
+                "⬅️ Назад", callback_data=f"prev_page_{users[0].id}"
             ))
         
         nav_buttons.append(types.InlineKeyboardButton(
             f"{page + 1}/{total_pages}", callback_data="page_info"
         ))
         
-        if page < total_pages - 1:
+        if has_next and users:
             nav_buttons.append(types.InlineKeyboardButton(
-                "➡️ Далее", callback_data="next_page"
+                "➡️ Далее", callback_data=f"next_page_{users[-1].id}"
             ))
         
         keyboard.row(*nav_buttons)
@@ -93,8 +98,6 @@ async def show_users_by_letter(message, letter, page, state):
         
     except Exception as e:
         await message.answer(f"Ошибка при получении списка пользователей: {str(e)}")
-    finally:
-        session.close()
 
 async def page_info_handler(callback: types.CallbackQuery, state: FSMContext):
     """Показывает информацию о текущей странице"""
@@ -105,18 +108,20 @@ async def prev_page_handler(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
     letter = data.get('letter', 'A')
     page = max(0, data.get('page', 0) - 1)
+    before_id = int(callback.data.rsplit("_", 1)[1])
     
     await callback.message.delete()
-    await show_users_by_letter(callback.message, letter, page, state)
+    await show_users_by_letter(callback.message, letter, page, state, before_id=before_id)
 
 async def next_page_handler(callback: types.CallbackQuery, state: FSMContext):
     """Обработчик перехода на следующую страницу"""
     data = await state.get_data()
     letter = data.get('letter', 'A')
     page = data.get('page', 0) + 1
+    after_id = int(callback.data.rsplit("_", 1)[1])
     
     await callback.message.delete()
-    await show_users_by_letter(callback.message, letter, page, state)
+    await show_users_by_letter(callback.message, letter, page, state, after_id=after_id)
 
 # Модифицируем обработчик возврата к выбору буквы
 async def back_to_letter_search(callback: types.CallbackQuery, state: FSMContext):
@@ -147,9 +152,9 @@ def register_pagination_handlers(dp: Dispatcher):
                                       state=AdminStates.browsing_letters)
     dp.register_callback_query_handler(page_info_handler, lambda c: c.data == "page_info", 
                                       state=AdminStates.browsing_users_by_letter)
-    dp.register_callback_query_handler(prev_page_handler, lambda c: c.data == "prev_page", 
+    dp.register_callback_query_handler(prev_page_handler, lambda c: c.data.startswith("prev_page_"), 
                                       state=AdminStates.browsing_users_by_letter)
-    dp.register_callback_query_handler(next_page_handler, lambda c: c.data == "next_page", 
+    dp.register_callback_query_handler(next_page_handler, lambda c: c.data.startswith("next_page_"), 
                                       state=AdminStates.browsing_users_by_letter)
     
     # Добавляем обработчик для "letter_search" во всех состояниях
@@ -1,11 +1,15 @@
 from aiogram import Dispatcher, types
 from aiogram.dispatcher import FSMContext
-from sqlalchemy import func
-from services.database import get_database_session, User
+from services.database import run_db
+from services.user_service import UserService
+from services.user_search_service import search_users, SEARCH_RANK_LIMIT
 from utils.admin_utils import is_admin
 from ..states import AdminStates
 from .display import show_user_info
 
+# Результатов поиска на странице
+SEARCH_RESULTS_PER_PAGE = 10
+
 async def text_search_handler(callback: types.CallbackQuery, state: FSMContext):
     """Обрабатывает поиск пользователя по тексту"""
     if not is_admin(callback.from_user.id):
@@ -53,24 +57,16 @@ async def letter_search_handler(callback: types.CallbackQuery, state: FSMContext
         except Exception as e:
             print(f"Не удалось удалить сообщение: {e}")
     
-    session = get_database_session()
     try:
-        users = session.query(User).all()
-        
-        first_letters = set()
-        for user in users:
-            # Изменяем проверку на full_name вместо username
-            if user.full_name and len(user.full_name) > 0:
-                first_letters.add(user.full_name[0].upper())
-        
-        first_letters = sorted(list(first_letters))
+        with UserService() as user_service:
+            initials = await run_db(user_service.get_name_initials)
         
         # Убедимся, что клавиатура выбора букв создается правильно
         keyboard = types.InlineKeyboardMarkup(row_width=4)
         letter_buttons = []
         
-        for letter in first_letters:
-            letter_buttons.append(types.InlineKeyboardButton(letter, callback_data=f"letter_{letter}"))
+        for letter, count in initials:
+            letter_buttons.append(types.InlineKeyboardButton(f"{letter} ({count})", callback_data=f"letter_{letter}"))
         
         # Группировка кнопок по 4 в ряд
         for i in range(0, len(letter_buttons), 4):
@@ -86,39 +82,86 @@ async def letter_search_handler(callback: types.CallbackQuery, state: FSMContext
         
     except Exception as e:
         await callback.message.answer(f"Ошибка при получении списка пользователей: {str(e)}")
-    finally:
-        session.close()
 
 async def search_user(message: types.Message, state: FSMContext):
-    """Поиск пользователя по имени/ID"""
+    """Поиск пользователя по имени/username/ID"""
     search_query = message.text.strip()
-    session = get_database_session()
-    
-    try:
-        user = session.query(User).filter(
-            (func.lower(User.username) == func.lower(search_query)) |
-            (func.lower(User.full_name).like(f"%{search_query.lower()}%")) |
-            (User.id == search_query if search_query.isdigit() else False)
-        ).first()
+    await state.update_data(search_query=search_query)
+    await show_search_results(message, search_query, 0, state)
 
-        if user:
-            await show_user_info(message, user, back_callback="admin_back")
-        else:
-            keyboard = types.InlineKeyboardMarkup()
+async def show_search_results(message, search_query, page, state):
+    """Показывает страницу результатов поиска, отсортированных по релевантности"""
+    keyboard = types.InlineKeyboardMarkup(row_width=1)
+    try:
+        users, total = await run_db(
+            search_users, search_query, SEARCH_RESULTS_PER_PAGE, page * SEARCH_RESULTS_PER_PAGE
+        )
+        
+        if not users:
             keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="admin_back"))
             await message.answer("Пользователь не найден.", reply_markup=keyboard)
+            await state.finish()
+            return
         
-        await state.finish()
+        # Единственное совпадение открываем сразу, как и раньше
+        if total == 1 and page == 0:
+            await state.finish()
+            await show_user_info(message, users[0], back_callback="admin_back")
+            return
+        
+        for user in users:
+            keyboard.add(types.InlineKeyboardButton(
+                f"{user.full_name} (@{user.username})", callback_data=f"view_user_{user.id}"
+            ))
+        
+        total_pages = max(1, (total + SEARCH_RESULTS_PER_PAGE - 1) // SEARCH_RESULTS_PER_PAGE)
+        nav_buttons = []
+        if page > 0:
+            nav_buttons.append(types.InlineKeyboardButton("⬅️ Назад", callback_data=f"usearch_page_{page - 1}"))
+        nav_buttons.append(types.InlineKeyboardButton(f"{page + 1}/{total_pages}", callback_data="usearch_info"))
+        if page + 1 < total_pages:
+            nav_buttons.append(types.InlineKeyboardButton("➡️ Далее", callback_data=f"usearch_page_{page + 1}"))
+        keyboard.row(*nav_buttons)
+        keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="search_user"))
+        
+        text = f"Найдено пользователей по запросу «{search_query}»: {total}"
+        if total > SEARCH_RANK_LIMIT:
+            text += "\nСовпадений слишком много для сортировки по релевантности - уточните запрос."
+        await message.answer(text, reply_markup=keyboard)
+        await AdminStates.browsing_search_results.set()
         
     except Exception as e:
-        keyboard = types.InlineKeyboardMarkup()
         keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="admin_back"))
         await message.answer(f"Ошибка при поиске пользователя: {str(e)}", reply_markup=keyboard)
         await state.finish()
-    finally:
-        session.close()
+
+async def search_page_handler(callback: types.CallbackQuery, state: FSMContext):
+    """Переход по страницам результатов поиска"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("У вас нет прав доступа!", show_alert=True)
+        return
+    
+    if callback.data == "usearch_info":
+        await callback.answer("Текущая страница", show_alert=True)
+        return
+    
+    await callback.answer()
+    data = await state.get_data()
+    search_query = data.get('search_query')
+    if not search_query:
+        await callback.message.answer("Поиск устарел, введите запрос заново.")
+        return
+    
+    page = int(callback.data.rsplit("_", 1)[1])
+    try:
+        await callback.message.delete()
+    except Exception as e:
+        print(f"Не удалось удалить сообщение: {e}")
+    await show_search_results(callback.message, search_query, page, state)
 
 def register_search_handlers(dp: Dispatcher):
     """Регистрирует обработчики поиска пользователей"""
     dp.register_message_handler(search_user, state=AdminStates.waiting_for_search)
+    dp.register_callback_query_handler(search_page_handler, lambda c: c.data.startswith("usearch_"),
+                                      state=AdminStates.browsing_search_results)
     dp.register_callback_query_handler(letter_search_handler, lambda c: c.data == "letter_search")
\ No newline at end of file
@@ -1,5 +1,5 @@
 from aiogram import types
-from services.database import get_database_session, User
+from services.database import run_db, User
 from keyboards.user_kb import user_kb
 from keyboards.admin_kb import admin_reply_kb
 from utils.admin_utils import is_admin
@@ -8,7 +8,7 @@ from utils.logger import setup_logger
 # Setup logger for this module
 logger = setup_logger('handlers.basic')
 
-async def start_command(message: types.Message):
+async def start_command(message: types.Message, user_ctx=None):
     """Handler for /start command"""
     user_id = message.from_user.id
     username = message.from_user.username or "unknown"
@@ -30,35 +30,36 @@ async def start_command(message: types.Message):
         from handlers.user.referral import process_referral
         
         with UserService() as user_service:
-            # Check if user already exists
-            existing_user = user_service.get_user_by_id(user_id)
-            is_new_user = not existing_user
-            
-            # Register new user if needed
-            if is_new_user:
-                try:
-                    new_user = User(
-                        id=user_id,
-                        username=username,
-                        full_name=full_name
-                    )
-                    user_service.session.add(new_user)
-                    user_service.session.commit()
-                    logger.info(f"New user registered: {user_id} ({username})")
-                    
-                    # Process referral for new users
-                    if referrer_id and referrer_id != user_id:
-                        await process_referral(user_service, user_id, referrer_id, full_name, username)
-                except Exception as e:
-                    logger.error(f"Error registering user: {e}", exc_info=True)
-                    user_service.session.rollback()
+            if user_ctx is not None:
+                # User was already loaded or registered by UserContextMiddleware
+                is_new_user = user_ctx.is_new
             else:
-                # Process referral even for existing users who haven't been referred before
-                if referrer_id and referrer_id != user_id:
-                    # Check if this user already has a referrer
-                    existing_referral = user_service.get_referral_by_user_id(user_id)
-                    if not existing_referral:
-                        await process_referral(user_service, user_id, referrer_id, full_name, username)
+                # Check if user already exists
+                existing_user = await run_db(user_service.get_user_by_id, user_id)
+                is_new_user = not existing_user
+                
+                # Register new user if needed
+                if is_new_user:
+                    try:
+                        new_user = User(
+                            id=user_id,
+                            username=username,
+                            full_name=full_name
+                        )
+                        user_service.session.add(new_user)
+                        user_service.session.commit()
+                        logger.info(f"New user registered: {user_id} ({username})")
+                    except Exception as e:
+                        logger.error(f"Error registering user: {e}", exc_info=True)
+                        user_service.session.rollback()
+            
+            # Process referral for new users and for existing users who haven't been referred before
+            if referrer_id and referrer_id != user_id:
+                existing_referral = None
+                if not is_new_user:
+                    existing_referral = await run_db(user_service.get_referral_by_user_id, user_id)
+                if not existing_referral:
+                    await process_referral(user_service, user_id, referrer_id, full_name, username)
             
             # Show normal welcome message with appropriate keyboard based on user type
             welcome_message = "Добро пожаловать в бота!" if not is_new_user else "Добро пожаловать! Вы успешно зарегистрированы."
@@ -68,6 +69,11 @@ async def start_command(message: types.Message):
             
             await message.answer(welcome_message, reply_markup=keyboard)
             
+            # Ссылка на товар из inline-поиска: /start product_<id>
+            if args and args.startswith("product_") and args[len("product_"):].isdigit():
+                from handlers.user.shop.product_detail import send_product_card
+                await send_product_card(message, int(args[len("product_"):]))
+            
     except Exception as e:
         logger.error(f"Error in start_command: {e}", exc_info=True)
         await message.answer("Произошла ошибка при обработке команды. Попробуйте позже.")
@@ -79,6 +85,7 @@ async def help_command(message: types.Message):
         "<b>Доступные команды:</b>\n"
         "/start - Запустить бота\n"
         "/help - Показать эту справку\n"
+        "/search - Найти товар по названию\n"
         "/referral - Получить реферальную ссылку\n"
         "/myreferrals - Показать ваших рефералов\n\n"
         
@@ -105,7 +112,7 @@ async def profile_command(message: types.Message):
         
         with UserService() as user_service:
             # Get user data from database
-            user = user_service.get_user_by_id(user_id)
+            user = await run_db(user_service.get_user_by_id, user_id)
             
             if not user:
                 logger.warning(f"User profile not found for ID: {user_id}")
@@ -114,7 +121,7 @@ async def profile_command(message: types.Message):
             
             # Get referral counts
             try:
-                referral_count = user_service.count_user_referrals(user_id)
+                referral_count = await run_db(user_service.count_user_referrals, user_id)
             except Exception as e:
                 logger.error(f"Error getting referral count for user {user_id}: {e}", exc_info=True)
                 referral_count = 0
@@ -122,9 +129,9 @@ async def profile_command(message: types.Message):
             # Get referrer info if available
             referrer = None
             try:
-                referral_info = user_service.get_referral_by_user_id(user_id)
+                referral_info = await run_db(user_service.get_referral_by_user_id, user_id)
                 if referral_info and referral_info.referred_by:
-                    referrer = user_service.get_user_by_id(referral_info.referred_by)
+                    referrer = await run_db(user_service.get_user_by_id, referral_info.referred_by)
             except Exception as e:
                 logger.error(f"Error getting referrer for user {user_id}: {e}", exc_info=True)
             
@@ -165,7 +172,7 @@ async def profile_command(message: types.Message):
             )
         )
 
-async def text_handler(message: types.Message):
+async def text_handler(message: types.Message, user_ctx=None):
     """Handle text messages for keyboard buttons"""
     text = message.text
     
@@ -174,12 +181,10 @@ async def text_handler(message: types.Message):
         await help_command(message)
         return
     
-    # For all other commands, check if user is blocked
-    with get_database_session() as session:
-        user = session.query(User).filter(User.id == message.from_user.id).first()
-        if user and hasattr(user, 'is_blocked') and user.is_blocked:
-            await message.answer("Ваш аккаунт заблокирован. Используйте кнопку 'ℹ️ Помощь' для поддержки.")
-            return
+    # For all other commands, check if user is blocked (context is loaded by UserContextMiddleware)
+    if user_ctx and user_ctx.is_blocked:
+        await message.answer("Ваш аккаунт заблокирован. Используйте кнопку 'ℹ️ Помощь' для поддержки.")
+        return
     
     # Process other commands for non-blocked users
     if text == "🔍 Профиль":
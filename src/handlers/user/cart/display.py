@@ -1,6 +1,6 @@
 from aiogram import types
-from services.database import get_database_session, CartItem
-from services.product_service import get_product_by_id
+from services.database import run_db
+from services.cart_service import get_cart_snapshot
 from utils.logger import setup_logger
 from utils.message_utils import safe_delete_message
 
@@ -24,109 +24,54 @@ async def view_cart(callback: types.CallbackQuery):
 async def show_cart(message, user_id):
     """Общий метод для отображения корзины"""
     try:
-        session = get_database_session()
-        try:
-            # Получаем товары из корзины пользователя
-            cart_items = session.query(CartItem).filter(
-                CartItem.user_id == user_id
-            ).all()
+        # Получаем товары корзины, корректируя количество по остаткам
+        cart = await run_db(get_cart_snapshot, user_id)
+        lines = cart["lines"]
+        
+        if not lines:
+            cart_kb = types.InlineKeyboardMarkup(row_width=1)
+            cart_kb.add(
+                types.InlineKeyboardButton("🛍️ Перейти к товарам", callback_data="back_to_categories")
+            )
             
-            if not cart_items:
-                # Корзина пуста
-                cart_kb = types.InlineKeyboardMarkup(row_width=1)
-                cart_kb.add(
-                    types.InlineKeyboardButton("🛍️ Перейти к товарам", callback_data="back_to_categories")
-                )
-                
-                await message.answer(
+            if cart["removed"]:
+                # Все товары стали недоступны
+                text = (
                     "🧺 <b>Ваша корзина</b>\n\n"
-                    "В данный момент ваша корзина пуста.\n"
-                    "Выберите товары в нашем меню!",
-                    parse_mode="HTML",
-                    reply_markup=cart_kb
-                )
-                return
-            
-            # Формируем сообщение с товарами в корзине
-            cart_text = "🧺 <b>Ваша корзина</b>\n\n"
-            total_items = 0
-            total_cost = 0
-            
-            valid_items = []  # Для отслеживания валидных товаров
-            unavailable_products = []  # Для отслеживания недоступных товаров
-            
-            for item in cart_items:
-                # Корректное получение ID товара с учетом типа данных
-                product_id = item.product_id
-                if isinstance(product_id, str) and product_id.isdigit():
-                    product_id = int(product_id)
-                
-                # Получаем данные товара из базы данных
-                product = get_product_by_id(product_id)
-                
-                # Проверяем, существует ли товар и доступен ли он
-                if not product or not product.get('active', True):
-                    unavailable_products.append(item)
-                    continue
-                
-                available_stock = product.get('stock', 0)
-                
-                # Проверка наличия на складе
-                if available_stock <= 0:
-                    unavailable_products.append(item)
-                    continue
-                
-                # Корректируем количество, если оно превышает доступное
-                actual_quantity = min(item.quantity, available_stock)
-                if actual_quantity != item.quantity:
-                    # Обновляем количество в БД
-                    item.quantity = actual_quantity
-                    session.commit()
-                
-                # Используем реальное название товара
-                product_name = product['name']
-                price = product['price']
-                item_cost = price * actual_quantity
-                total_items += actual_quantity
-                total_cost += item_cost
-                cart_text += f"• {product_name} - {actual_quantity} шт. × {price} ⭐ = {item_cost} ⭐\n"
-                
-                valid_items.append(item)
-                    
-            # Если есть недоступные товары, удаляем их из корзины
-            for item in unavailable_products:
-                session.delete(item)
-            
-            if unavailable_products:
-                session.commit()
-            
-            # Если все товары стали недоступны
-            if not valid_items:
-                cart_kb = types.InlineKeyboardMarkup(row_width=1)
-                cart_kb.add(
-                    types.InlineKeyboardButton("🛍️ Перейти к товарам", callback_data="back_to_categories")
+                    "Товары в вашей корзине больше недоступны.\n"
+                    "Пожалуйста, выберите другие товары."
                 )
-                
-                await message.answer(
+            else:
+                # Корзина пуста
+                text = (
                     "🧺 <b>Ваша корзина</b>\n\n"
-                    "Товары в вашей корзине больше недоступны.\n"
-                    "Пожалуйста, выберите другие товары.",
-                    parse_mode="HTML",
-                    reply_markup=cart_kb
+                    "В данный момент ваша корзина пуста.\n"
+                    "Выберите товары в нашем меню!"
                 )
-                return
-            
-            # Добавляем информацию об итогах
-            cart_text += f"\n<b>Всего товаров:</b> {total_items}\n"
-            cart_text += f"<b>Итоговая стоимость:</b> {total_cost} ⭐"
-            
-            # Создаем клавиатуру для управления корзиной
-            from .keyboards import create_cart_keyboard
-            cart_kb = create_cart_keyboard(valid_items)
             
-            await message.answer(cart_text, parse_mode="HTML", reply_markup=cart_kb)
-        finally:
-            session.close()
+            await message.answer(text, parse_mode="HTML", reply_markup=cart_kb)
+            return
+        
+        # Формируем сообщение с товарами в корзине
+        cart_text = "🧺 <b>Ваша корзина</b>\n\n"
+        total_items = 0
+        total_cost = 0
+        
+        for line in lines:
+            item_cost = line['price'] * line['quantity']
+            total_items += line['quantity']
+            total_cost += item_cost
+            cart_text += f"• {line['name']} - {line['quantity']} шт. × {line['price']} ⭐ = {item_cost} ⭐\n"
+        
+        # Добавляем информацию об итогах
+        cart_text += f"\n<b>Всего товаров:</b> {total_items}\n"
+        cart_text += f"<b>Итоговая стоимость:</b> {total_cost} ⭐"
+        
+        # Создаем клавиатуру для управления корзиной
+        from .keyboards import create_cart_keyboard
+        cart_kb = create_cart_keyboard(lines)
+        
+        await message.answer(cart_text, parse_mode="HTML", reply_markup=cart_kb)
             
     except Exception as e:
         logger.error(f"Error displaying cart for user {user_id}: {e}", exc_info=True)
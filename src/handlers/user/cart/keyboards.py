@@ -1,5 +1,4 @@
 from aiogram import types
-from services.product_service import get_product_by_id
 from utils.logger import setup_logger
 
 # Setup logger
@@ -15,19 +14,15 @@ def get_after_add_keyboard(product_id):
     )
     return keyboard
 
-def create_cart_keyboard(valid_items):
+def create_cart_keyboard(cart_lines):
     """Создает клавиатуру для отображения товаров в корзине"""
     cart_kb = types.InlineKeyboardMarkup(row_width=3)
     
     # Добавляем кнопки для каждого товара
-    for item in valid_items:
+    for line in cart_lines:
         try:
-            product_id = item.product_id
-            if isinstance(product_id, str) and product_id.isdigit():
-                product_id = int(product_id)
-            
-            product = get_product_by_id(product_id)
-            product_name = product['name'] if product else f"Товар {item.product_id}"
+            product_id = line['product_id']
+            product_name = line['name']
             
             # Добавляем кнопки управления количеством товара
             cart_kb.row(
@@ -36,7 +31,7 @@ def create_cart_keyboard(valid_items):
                     callback_data=f"remove_one_{product_id}"
                 ),
                 types.InlineKeyboardButton(
-                    f"{product_name} ({item.quantity})",
+                    f"{product_name} ({line['quantity']})",
                     callback_data=f"product_{product_id}"
                 ),
                 types.InlineKeyboardButton(
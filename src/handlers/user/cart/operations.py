@@ -1,6 +1,6 @@
 from aiogram import types
-from services.database import get_database_session, CartItem
-from services.product_service import get_product_stock
+from services.database import run_db
+from services.cart_service import clear_cart, add_one_to_cart, remove_one_from_cart, remove_from_cart
 from utils.logger import setup_logger
 from utils.message_utils import safe_delete_message
 
@@ -15,11 +15,9 @@ async def clear_cart_callback(callback: types.CallbackQuery):
     user_id = callback.from_user.id
     
     try:
-        with get_database_session() as session:
-            # Удаляем все товары из корзины пользователя
-            session.query(CartItem).filter(CartItem.user_id == user_id).delete()
-            session.commit()
-            
+        # Удаляем все товары из корзины пользователя
+        await run_db(clear_cart, user_id)
+        
         await callback.answer("Корзина очищена!")
         
         # Показываем пустую корзину
@@ -46,26 +44,15 @@ async def remove_one_item_callback(callback: types.CallbackQuery):
     user_id = callback.from_user.id
     
     try:
-        with get_database_session() as session:
-            # Находим товар в корзине
-            cart_item = session.query(CartItem).filter(
-                CartItem.user_id == user_id,
-                CartItem.product_id == product_id
-            ).first()
-            
-            if cart_item:
-                if cart_item.quantity > 1:
-                    # Уменьшаем количество на 1
-                    cart_item.quantity -= 1
-                    session.commit()
-                    await callback.answer(f"Удалена 1 шт. товара из корзины")
-                else:
-                    # Если остался 1 товар, удаляем его полностью
-                    session.delete(cart_item)
-                    session.commit()
-                    await callback.answer("Товар удален из корзины")
-            else:
-                await callback.answer("Товар не найден в корзине")
+        # Уменьшаем количество на 1 или удаляем товар полностью
+        result = await run_db(remove_one_from_cart, user_id, product_id)
+        
+        if result == "decreased":
+            await callback.answer(f"Удалена 1 шт. товара из корзины")
+        elif result == "removed":
+            await callback.answer("Товар удален из корзины")
+        else:
+            await callback.answer("Товар не найден в корзине")
                 
         # Удаляем текущее сообщение с корзиной перед обновлением
         try:
@@ -86,19 +73,11 @@ async def remove_all_item_callback(callback: types.CallbackQuery):
     user_id = callback.from_user.id
     
     try:
-        with get_database_session() as session:
-            # Находим и удаляем товар из корзины
-            cart_item = session.query(CartItem).filter(
-                CartItem.user_id == user_id,
-                CartItem.product_id == product_id
-            ).first()
-            
-            if cart_item:
-                session.delete(cart_item)
-                session.commit()
-                await callback.answer("Товар удален из корзины")
-            else:
-                await callback.answer("Товар не найден в корзине")
+        # Находим и удаляем товар из корзины
+        if await run_db(remove_from_cart, user_id, product_id):
+            await callback.answer("Товар удален из корзины")
+        else:
+            await callback.answer("Товар не найден в корзине")
                 
         # Удаляем текущее сообщение с корзиной перед обновлением
         try:
@@ -119,27 +98,15 @@ async def add_one_item_callback(callback: types.CallbackQuery):
     user_id = callback.from_user.id
     
     try:
-        # Проверяем доступные остатки товара
-        available_stock = get_product_stock(product_id)
+        # Увеличиваем количество на 1, не превышая доступный остаток
+        result, available_stock = await run_db(add_one_to_cart, user_id, product_id)
         
-        with get_database_session() as session:
-            # Находим товар в корзине
-            cart_item = session.query(CartItem).filter(
-                CartItem.user_id == user_id,
-                CartItem.product_id == product_id
-            ).first()
-            
-            if cart_item:
-                # Проверяем, не превышаем ли мы доступное количество
-                if cart_item.quantity < available_stock:
-                    # Увеличиваем количество на 1
-                    cart_item.quantity += 1
-                    session.commit()
-                    await callback.answer(f"Добавлена 1 шт. товара в корзину")
-                else:
-                    await callback.answer(f"Нельзя добавить больше! Доступно: {available_stock} шт.")
-            else:
-                await callback.answer("Товар не найден в корзине")
+        if result == "added":
+            await callback.answer(f"Добавлена 1 шт. товара в корзину")
+        elif result == "limit":
+            await callback.answer(f"Нельзя добавить больше! Доступно: {available_stock} шт.")
+        else:
+            await callback.answer("Товар не найден в корзине")
         
         # Удаляем текущее сообщение с корзиной перед обновлением
         try:
@@ -1,5 +1,6 @@
 from aiogram import types
-from services.database import get_database_session, CartItem
+from services.database import run_db
+from services.cart_service import add_to_cart
 from services.product_service import get_product_by_id
 from utils.logger import setup_logger
 from utils.message_utils import safe_delete_message
@@ -51,7 +52,7 @@ async def add_to_cart_with_quantity_callback(callback: types.CallbackQuery):
         logger.error(f"Error deleting message: {e}", exc_info=True)
     
     # Получаем информацию о товаре из базы данных
-    product = get_product_by_id(product_id)
+    product = await run_db(get_product_by_id, product_id)
     
     if not product:
         await callback.message.answer("❌ Товар не найден или был удален")
@@ -70,51 +71,23 @@ async def add_to_cart_with_quantity_callback(callback: types.CallbackQuery):
     user_id = callback.from_user.id
     
     try:
-        session = get_database_session()
-        try:
-            # Проверяем, есть ли уже такой товар в корзине
-            cart_item = session.query(CartItem).filter(
-                CartItem.user_id == user_id,
-                CartItem.product_id == product_id
-            ).first()
-            
-            if cart_item:
-                # Если товар уже есть, увеличиваем количество
-                new_quantity = cart_item.quantity + quantity
-                # Проверяем, не превышает ли новое количество доступный остаток
-                if new_quantity > available_stock:
-                    await callback.message.answer(
-                        f"⚠️ В вашей корзине уже есть {cart_item.quantity} шт. этого товара. "
-                        f"На складе осталось {available_stock} шт. "
-                        f"Вы не можете добавить еще {quantity} шт."
-                    )
-                    return
-                
-                cart_item.quantity = new_quantity
-            else:
-                # Если товара нет, добавляем новую запись
-                cart_item = CartItem(
-                    user_id=user_id,
-                    product_id=product_id,
-                    quantity=quantity
-                )
-                session.add(cart_item)
-            
-            session.commit()
-            
-            # Показываем сообщение об успешном добавлении
-            product_name = product['name']
+        added, in_cart = await run_db(add_to_cart, user_id, product_id, quantity, available_stock)
+        
+        if not added:
+            # Новое количество превышает доступный остаток
             await callback.message.answer(
-                f"✅ {product_name} ({quantity} шт.) добавлен в корзину!",
-                reply_markup=get_after_add_keyboard(product_id)
+                f"⚠️ В вашей корзине уже есть {in_cart} шт. этого товара. "
+                f"На складе осталось {available_stock} шт. "
+                f"Вы не можете добавить еще {quantity} шт."
             )
+            return
         
-        except Exception as e:
-            session.rollback()
-            logger.error(f"DB Error adding product to cart: {e}", exc_info=True)
-            await callback.message.answer("❌ Произошла ошибка при добавлении товара в корзину")
-        finally:
-            session.close()
+        # Показываем сообщение об успешном добавлении
+        product_name = product['name']
+        await callback.message.answer(
+            f"✅ {product_name} ({quantity} шт.) добавлен в корзину!",
+            reply_markup=get_after_add_keyboard(product_id)
+        )
     
     except Exception as e:
         logger.error(f"Error adding product to cart: {e}", exc_info=True)
@@ -1,20 +1,9 @@
 from aiogram import types
-from services.order_service import OrderService
-from services.product_service import get_product_by_id
+from services.order_service import OrderService, order_item_name
+from services.database import run_db
 import traceback
 from utils.message_utils import safe_delete_message
 
-# Вспомогательная функция
-def get_product_name(product_id):
-    """Получает имя продукта по его ID"""
-    try:
-        product = get_product_by_id(product_id)
-        if product:
-            return product.get('name', f"Товар #{product_id}") if isinstance(product, dict) else getattr(product, 'name', f"Товар #{product_id}")
-    except Exception as e:
-        print(f"Ошибка при получении имени продукта: {e}")
-    return f"Товар #{product_id}"
-
 async def view_my_order_detail(callback: types.CallbackQuery):
     """Показывает пользователю детали конкретного заказа"""
     user_id = callback.from_user.id
@@ -40,7 +29,7 @@ async def view_my_order_detail(callback: types.CallbackQuery):
     
     try:
         # Получаем данные заказа
-        order = order_service.get_order_by_id(order_id)
+        order = await run_db(order_service.get_order_by_id, order_id)
         
         print(f"Получены данные заказа: {order}")
         
@@ -56,7 +45,7 @@ async def view_my_order_detail(callback: types.CallbackQuery):
             return
         
         # Получаем товары в заказе
-        items = order_service.get_order_items(order_id)
+        items = await run_db(order_service.get_order_items, order_id)
         
         print(f"Получены товары заказа: {items}")
         
@@ -95,7 +84,7 @@ async def view_my_order_detail(callback: types.CallbackQuery):
         
         if items:
             for i, item in enumerate(items, 1):
-                product_name = get_product_name(item.product_id)
+                product_name = order_item_name(item)
                 item_total = item.price * item.quantity
                 message_text += f"{i}. <b>{product_name}</b> - {item.quantity} шт. × {item.price*100:.2f} ⭐ = {item_total*100:.2f} ⭐\n"
         else:
@@ -1,5 +1,6 @@
 from aiogram import types
 from services.order_service import OrderService
+from services.database import run_db
 import traceback
 
 async def view_my_orders(query_or_message):
@@ -31,10 +32,10 @@ async def view_my_orders(query_or_message):
     
     try:
         # Получаем статистику заказов
-        stats = order_service.get_order_stats(user_id)
+        stats = await run_db(order_service.get_order_stats, user_id)
         
         # Получаем список заказов
-        orders = order_service.get_user_orders(user_id)
+        orders = await run_db(order_service.get_user_orders, user_id)
         
         # Формируем заголовок с информацией и статистикой
         if stats["total_orders"] > 0:
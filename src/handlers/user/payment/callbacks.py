@@ -2,8 +2,10 @@ from aiogram import types
 from aiogram.types import PreCheckoutQuery
 from datetime import datetime
 
-from services.database import get_database_session, CartItem, Order, OrderItem
-from services.product_service import update_product_stock
+from services.database import run_db
+from services.order_service import create_paid_order, InsufficientStockError
+from services.inventory_service import has_reservation, reserve_items
+from config import RESERVATION_TTL
 from utils.logger import setup_logger
 from .notifications import send_order_success_notification, notify_admins_about_order
 
@@ -37,6 +39,19 @@ async def process_pre_checkout_query(pre_checkout_query: PreCheckoutQuery):
             )
             return
         
+        # Резерв мог истечь, пока счет был открыт - пробуем зарезервировать товар заново
+        payment_id = user_data["payment_id"]
+        if not await run_db(has_reservation, payment_id):
+            try:
+                await run_db(reserve_items, user_id, payment_id, user_data.get("order_items", []), RESERVATION_TTL)
+            except InsufficientStockError as e:
+                await bot.answer_pre_checkout_query(
+                    pre_checkout_query_id=pre_checkout_query.id,
+                    ok=False,
+                    error_message=f"Товар «{e.name}» закончился, пока счет был открыт. Обновите корзину."
+                )
+                return
+        
         # Все проверки прошли успешно, подтверждаем pre-checkout
         await bot.answer_pre_checkout_query(
             pre_checkout_query_id=pre_checkout_query.id,
@@ -68,46 +83,18 @@ async def process_successful_payment(message: types.Message):
         
         order_items = user_data.get("order_items", [])
         total_stars = user_data.get("total_cost_stars", 0)
-        order_id = None  # Создаем переменную для хранения ID заказа
         
-        # Обновляем остатки товаров и создаем заказ в одной транзакции
-        with get_database_session() as session:
-            # Обновляем остатки товаров на складе
-            for item in order_items:
-                product_id = item["product_id"]
-                quantity = item["quantity"]
-                
-                # Уменьшаем количество товара на складе
-                update_product_stock(product_id, -quantity)  # отрицательное значение для уменьшения
-            
-            # Создаем запись о заказе в базе данных
-            # Создаем заказ
-            new_order = Order(
-                user_id=user_id,
-                total_amount=payment_info.total_amount / 100,  # переводим из сотых долей звезды
-                payment_id=payment_info.telegram_payment_charge_id,
-                shipping_address=f"{message.from_user.full_name}, {payment_info.order_info.phone_number if hasattr(payment_info, 'order_info') and payment_info.order_info else 'Не указан'}"
-            )
-            session.add(new_order)
-            session.flush()  # чтобы получить ID заказа
-            
-            # Сохраняем ID заказа для использования вне блока with
-            order_id = new_order.id
-            
-            # Добавляем товары в заказ
-            for item in order_items:
-                order_item = OrderItem(
-                    order_id=order_id,
-                    product_id=item["product_id"],
-                    quantity=item["quantity"],
-                    price=item["price"]
-                )
-                session.add(order_item)
-            
-            # Очищаем корзину пользователя
-            session.query(CartItem).filter(CartItem.user_id == user_id).delete()
-            
-            session.commit()
+        # Списываем остатки, создаем заказ и очищаем корзину в пуле потоков БД
+        order_id = await run_db(
+            create_paid_order,
+            user_id,
+            order_items,
+            payment_info.total_amount / 100,  # переводим из сотых долей звезды
+            payment_info.telegram_payment_charge_id,
+            f"{message.from_user.full_name}, {payment_info.order_info.phone_number if hasattr(payment_info, 'order_info') and payment_info.order_info else 'Не указан'}",
+            # Резерв товаров хранится под payload счета, выставленного в pay_with_stars_callback
+            payment_info.invoice_payload
+        )
         
         # Отправляем уведомление пользователю
         await send_order_success_notification(message, order_id, total_stars)
@@ -115,6 +102,19 @@ async def process_successful_payment(message: types.Message):
         # Уведомляем администраторов о новом заказе
         await notify_admins_about_order(order_id, message.from_user, total_stars, len(order_items))
         
+    except InsufficientStockError as e:
+        # Заказ и списания откатились целиком - остатки не ушли в минус
+        logger.error(
+            f"Paid order for user {user_id} rejected: not enough stock for product {e.product_id}, "
+            f"payment {payment_info.telegram_payment_charge_id}"
+        )
+        await message.answer(
+            f"Платеж получен, но товара «{e.name}» уже недостаточно на складе, поэтому заказ не оформлен. "
+            "Пожалуйста, свяжитесь с поддержкой и сообщите номер платежа: "
+            f"<code>{payment_info.telegram_payment_charge_id}</code>",
+            parse_mode="HTML"
+        )
+        
     except Exception as e:
         logger.error(f"Error processing successful payment for user {user_id}: {e}", exc_info=True)
         await message.answer(
@@ -2,8 +2,10 @@ from aiogram import types
 from aiogram.types import LabeledPrice
 import uuid
 
-from services.product_service import get_product_stock
-from config import PAYMENT_PROVIDER_TOKEN, PAYMENT_CURRENCY
+from services.inventory_service import reserve_items, release_reservation, InsufficientStockError
+from services.product_service import find_unavailable_items
+from services.database import run_db
+from config import PAYMENT_PROVIDER_TOKEN, PAYMENT_CURRENCY, RESERVATION_TTL
 from utils.logger import setup_logger
 
 # Настройка логгера для этого модуля
@@ -28,15 +30,23 @@ async def pay_with_stars_callback(callback: types.CallbackQuery):
         # Цена уже в звездах, конвертировать не нужно
         total_stars = user_data.get("total_cost_stars", 0)
         
-        # Проверяем доступность товаров перед оплатой
-        out_of_stock_items = []
-        for item in order_items:
-            available_stock = get_product_stock(item["product_id"])
-            if available_stock < item["quantity"]:
-                out_of_stock_items.append(f"{item['name']} (доступно: {available_stock} шт.)")
+        # Повторное нажатие "Оплатить" выставляет новый счет - старый резерв больше не нужен
+        if user_data.get("payment_id"):
+            await run_db(release_reservation, user_data["payment_id"])
         
-        if out_of_stock_items:
-            # Если есть товары, которых нет в наличии
+        # Создаем уникальный идентификатор платежа
+        payment_id = f"order_{user_id}_{uuid.uuid4().hex[:8]}"
+        
+        # Резервируем товары до оплаты, чтобы последнюю единицу не оплатили двое
+        try:
+            await run_db(reserve_items, user_id, payment_id, order_items, RESERVATION_TTL)
+        except InsufficientStockError:
+            # Показываем, чего и сколько осталось: остатки всех позиций одним запросом на чтение
+            out_of_stock_items = [
+                f"{item['name']} (доступно: {max(available_stock, 0)} шт.)"
+                for item, available_stock in await run_db(find_unavailable_items, order_items)
+            ]
+            
             error_text = "⚠️ <b>Некоторые товары отсутствуют в нужном количестве:</b>\n\n"
             error_text += "\n".join([f"• {item}" for item in out_of_stock_items])
             error_text += "\n\nПожалуйста, вернитесь в корзину и обновите заказ."
@@ -51,9 +61,6 @@ async def pay_with_stars_callback(callback: types.CallbackQuery):
             return
         
         # Для звезд используем одну общую позицию
-        # Создаем уникальный идентификатор платежа
-        payment_id = f"order_{user_id}_{uuid.uuid4().hex[:8]}"
-        
         # Сохраняем ID платежа и сумму в звездах
         user_data["payment_id"] = payment_id
         user_data["total_cost_stars"] = total_stars
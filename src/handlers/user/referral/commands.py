@@ -2,6 +2,7 @@ from aiogram import types
 from utils.admin_utils import is_admin
 from utils.logger import setup_logger
 from services.user_service import UserService
+from services.database import run_db
 from .utils import get_bot_username
 
 # Setup logger for this module
@@ -33,7 +34,7 @@ async def referral_command(message: types.Message):
     
     # Get how many users this user has referred
     with UserService() as user_service:
-        referral_count = user_service.count_user_referrals(user_id)
+        referral_count = await run_db(user_service.count_user_referrals, user_id)
     
     # Create share buttons with cleaner formatting
     keyboard = types.InlineKeyboardMarkup(row_width=1)
@@ -59,7 +60,7 @@ async def my_referrals_command(message: types.Message):
     user_id = message.from_user.id
     
     with UserService() as user_service:
-        referrals = user_service.get_user_referrals(user_id)
+        referrals = await run_db(user_service.get_user_referrals, user_id)
         
         if not referrals:
             # Add a button to get referral link when no referrals found
@@ -77,7 +78,7 @@ async def my_referrals_command(message: types.Message):
         referral_text = f"👥 <b>Ваши приглашённые пользователи</b> ({total_referrals}):\n\n"
         
         for i, ref in enumerate(referrals, 1):
-            user = user_service.get_user_by_id(ref.user_id)
+            user = await run_db(user_service.get_user_by_id, ref.user_id)
             if user:
                 date_str = ref.created_at.strftime("%d.%m.%Y %H:%M") if hasattr(ref, 'created_at') else "неизвестно"
                 username_display = f"@{user.username}" if user.username else "без username"
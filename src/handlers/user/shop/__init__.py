@@ -2,6 +2,7 @@ from aiogram import Dispatcher, types
 from .categories import register_category_handlers, show_categories
 from .products import register_products_handlers
 from .product_detail import register_product_detail_handlers
+from .search import register_search_handlers
 from ..cart import register_cart_handlers
 
 async def menu_command(message: types.Message):
@@ -18,6 +19,7 @@ def register_shop_handlers(dp: Dispatcher):
     register_category_handlers(dp)
     register_products_handlers(dp)
     register_product_detail_handlers(dp)
+    register_search_handlers(dp)
     
     # Регистрируем обработчики корзины
     register_cart_handlers(dp)
@@ -1,18 +1,20 @@
 from aiogram import types, Dispatcher
 from aiogram.dispatcher import FSMContext
 from services.product_service import get_product_categories
+from services.database import run_db
 from utils.message_utils import safe_delete_message
 from keyboards.user_kb import user_kb
 
 async def show_categories(message: types.Message, edit=False):
     """Показывает список категорий товаров"""
-    categories = get_product_categories()
+    categories = await run_db(get_product_categories)
     
     # Создаем клавиатуру с категориями и кнопкой "Все товары"
     categories_kb = types.InlineKeyboardMarkup(row_width=2)
     
     # Добавляем кнопку "Все товары"
     categories_kb.add(types.InlineKeyboardButton("🛍️ Все товары", callback_data="shop_category_all"))
+    categories_kb.add(types.InlineKeyboardButton("🔍 Поиск товаров", callback_data="shop_search"))
     
     # Добавляем кнопки для каждой категории
     for category in categories:
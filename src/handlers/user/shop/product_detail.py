@@ -1,6 +1,7 @@
 from aiogram import types, Dispatcher
 from aiogram.dispatcher import FSMContext
 from services.product_service import get_product_by_id
+from services.database import run_db
 from utils.message_utils import safe_delete_message
 from utils.logger import setup_logger
 
@@ -17,15 +18,19 @@ async def show_product_detail(callback: types.CallbackQuery):
     # Удаляем предыдущее сообщение
     await safe_delete_message(callback.message)
     
+    await send_product_card(callback.message, product_id)
+
+async def send_product_card(message: types.Message, product_id):
+    """Отправляет карточку товара в чат message (из каталога, поиска или ссылки /start product_<id>)"""
     # Получаем данные о товаре
-    product = get_product_by_id(product_id)
+    product = await run_db(get_product_by_id, product_id)
     
     if not product:
         # Если товар не найден
         keyboard = types.InlineKeyboardMarkup()
         keyboard.add(types.InlineKeyboardButton("◀️ К списку товаров", callback_data="back_to_categories"))
         
-        await callback.message.answer(
+        await message.answer(
             "❌ <b>Товар не найден</b>\n\n"
             "К сожалению, данный товар недоступен или был удален.",
             reply_markup=keyboard,
@@ -72,7 +77,7 @@ async def show_product_detail(callback: types.CallbackQuery):
     # Отправляем сообщение с информацией о товаре
     if product.get('image_url'):
         # С изображением
-        await callback.message.answer_photo(
+        await message.answer_photo(
             photo=product['image_url'],
             caption=product_text,
             reply_markup=product_kb,
@@ -80,7 +85,7 @@ async def show_product_detail(callback: types.CallbackQuery):
         )
     else:
         # Без изображения
-        await callback.message.answer(
+        await message.answer(
             product_text,
             reply_markup=product_kb,
             parse_mode="HTML"
@@ -116,7 +121,7 @@ async def select_quantity_callback(callback: types.CallbackQuery):
     
     # Получаем информацию о товаре для отображения названия
     try:
-        product = get_product_by_id(int(product_id))
+        product = await run_db(get_product_by_id, int(product_id))
         product_name = product['name'] if product else f"Товар {product_id}"
         
         # Создаем клавиатуру с выбором количества
@@ -1,30 +1,33 @@
 from aiogram import types, Dispatcher
 from aiogram.dispatcher import FSMContext
-from services.product_service import get_active_products
+from services.product_service import get_active_products_page
+from services.database import run_db
 from utils.message_utils import safe_delete_message
 from utils.logger import setup_logger
 
 # Setup logger
 logger = setup_logger('handlers.shop.products')
 
-async def show_products(message: types.Message, category=None, page=0):
+async def show_products(message: types.Message, category=None, after_id=None, before_id=None):
     """
-    Отображает список товаров с пагинацией
+    Отображает список товаров с keyset-пагинацией
     
     Args:
         message: Объект сообщения
         category: Категория товаров (или None для всех)
-        page: Номер страницы (начиная с 0)
+        after_id: ID последнего товара предыдущей страницы (переход вперед)
+        before_id: ID первого товара следующей страницы (переход назад)
     """
     # Настройки пагинации
     products_per_page = 8
-    offset = page * products_per_page
     
-    # Получаем товары для указанной страницы и категории
-    products = get_active_products(
-        category=category, 
-        limit=products_per_page, 
-        offset=offset
+    # Получаем товары для страницы одним запросом; has_more - есть ли товары дальше по направлению
+    products, has_more = await run_db(
+        get_active_products_page,
+        category=category,
+        limit=products_per_page,
+        after_id=after_id,
+        before_id=before_id
     )
     
     # Если нет товаров
@@ -58,26 +61,23 @@ async def show_products(message: types.Message, category=None, page=0):
         else:
             products_kb.add(product_buttons[i])
     
-    # Добавляем пагинацию, если товаров много
-    # Здесь нужна дополнительная проверка есть ли больше товаров
-    check_more = get_active_products(
-        category=category, 
-        limit=1, 
-        offset=offset + products_per_page
-    )
+    # Кнопки навигации ссылаются на крайние товары текущей страницы
+    if before_id is not None:
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = after_id is not None, has_more
     
+    category_param = f"_{category}" if category else ""
     navigation_buttons = []
     
-    if page > 0:
-        category_param = f"_{category}" if category else ""
+    if has_prev:
         navigation_buttons.append(
-            types.InlineKeyboardButton("⬅️ Назад", callback_data=f"shop_page_{page-1}{category_param}")
+            types.InlineKeyboardButton("⬅️ Назад", callback_data=f"shop_page_b{products[0]['id']}{category_param}")
         )
     
-    if check_more:
-        category_param = f"_{category}" if category else ""
+    if has_next:
         navigation_buttons.append(
-            types.InlineKeyboardButton("➡️ Вперед", callback_data=f"shop_page_{page+1}{category_param}")
+            types.InlineKeyboardButton("➡️ Вперед", callback_data=f"shop_page_a{products[-1]['id']}{category_param}")
         )
     
     # Добавляем кнопки навигации
@@ -102,16 +102,25 @@ async def pagination_callback(callback: types.CallbackQuery):
     """Обработка пагинации товаров"""
     await callback.answer()
     
-    # Получаем данные о странице и возможной категории
-    data_parts = callback.data.replace("shop_page_", "").split("_")
-    page = int(data_parts[0])
+    # Получаем курсор (a<id> - вперед, b<id> - назад) и возможную категорию
+    data_parts = callback.data.replace("shop_page_", "", 1).split("_", 1)
+    cursor = data_parts[0]
     category = data_parts[1] if len(data_parts) > 1 else None
     
+    try:
+        cursor_id = int(cursor[1:])
+    except ValueError:
+        logger.warning(f"Invalid pagination cursor: {callback.data}")
+        return
+    
     # Удаляем предыдущее сообщение
     await safe_delete_message(callback.message)
     
-    # Показываем следующую страницу
-    await show_products(callback.message, category=category, page=page)
+    # Показываем соседнюю страницу
+    if cursor.startswith("b"):
+        await show_products(callback.message, category=category, before_id=cursor_id)
+    else:
+        await show_products(callback.message, category=category, after_id=cursor_id)
 
 async def back_to_categories_callback(callback: types.CallbackQuery):
     """Обработка возврата к категориям"""
@@ -1,7 +1,8 @@
 from aiogram import types, Dispatcher
 from aiogram.dispatcher import FSMContext
 from services.product_service import get_product_by_id
-from services.database import get_database_session, CartItem
+from services.database import run_db
+from services.cart_service import add_to_cart as add_product_to_cart
 from utils.message_utils import safe_delete_message
 from utils.logger import setup_logger
 
@@ -19,7 +20,7 @@ async def select_quantity(callback: types.CallbackQuery, state: FSMContext):
     await safe_delete_message(callback.message)
     
     # Получаем информацию о товаре
-    product = get_product_by_id(product_id)
+    product = await run_db(get_product_by_id, product_id)
     
     if not product:
         await callback.message.answer(
@@ -90,7 +91,7 @@ async def add_to_cart(callback: types.CallbackQuery, state: FSMContext):
     await safe_delete_message(callback.message)
     
     # Получаем информацию о товаре из базы данных
-    product = get_product_by_id(product_id)
+    product = await run_db(get_product_by_id, product_id)
     
     if not product:
         await callback.message.answer(
@@ -117,44 +118,20 @@ async def add_to_cart(callback: types.CallbackQuery, state: FSMContext):
     user_id = callback.from_user.id
     
     try:
-        session = get_database_session()
+        added, in_cart = await run_db(add_product_to_cart, user_id, product_id, quantity, available_stock)
         
-        # Проверяем, есть ли уже такой товар в корзине
-        cart_item = session.query(CartItem).filter(
-            CartItem.user_id == user_id,
-            CartItem.product_id == str(product_id)  # Преобразуем в строку, если в БД хранится как VARCHAR
-        ).first()
-        
-        if cart_item:
-            # Если товар уже есть, увеличиваем количество
-            new_quantity = cart_item.quantity + quantity
-            
-            # Проверяем, не превышает ли новое количество доступный остаток
-            if new_quantity > available_stock:
-                await callback.message.answer(
-                    f"⚠️ В вашей корзине уже есть {cart_item.quantity} шт. этого товара. "
-                    f"На складе осталось {available_stock} шт. "
-                    f"Вы не можете добавить еще {quantity} шт.",
-                    reply_markup=types.InlineKeyboardMarkup().add(
-                        types.InlineKeyboardButton("🛒 Перейти в корзину", callback_data="view_cart"),
-                        types.InlineKeyboardButton("◀️ Назад", callback_data=f"product_{product_id}")
-                    )
+        if not added:
+            # Новое количество превышает доступный остаток
+            await callback.message.answer(
+                f"⚠️ В вашей корзине уже есть {in_cart} шт. этого товара. "
+                f"На складе осталось {available_stock} шт. "
+                f"Вы не можете добавить еще {quantity} шт.",
+                reply_markup=types.InlineKeyboardMarkup().add(
+                    types.InlineKeyboardButton("🛒 Перейти в корзину", callback_data="view_cart"),
+                    types.InlineKeyboardButton("◀️ Назад", callback_data=f"product_{product_id}")
                 )
-                session.close()
-                return
-            
-            cart_item.quantity = new_quantity
-        else:
-            # Если товара нет, добавляем новую запись
-            cart_item = CartItem(
-                user_id=user_id,
-                product_id=str(product_id),  # Преобразуем в строку, если в БД хранится как VARCHAR
-                quantity=quantity
             )
-            session.add(cart_item)
-        
-        session.commit()
-        session.close()
+            return
         
         # Показываем сообщение об успешном добавлении
         keyboard = types.InlineKeyboardMarkup(row_width=1)
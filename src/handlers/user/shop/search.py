@@ -0,0 +1,182 @@
+from aiogram import types, Dispatcher
+from aiogram.dispatcher import FSMContext
+from aiogram.utils.markdown import quote_html
+from config import INLINE_CACHE_TIME
+from services.product_search_service import search_products, search_product_ids, get_storefront_products
+from services.database import run_db
+from states.product_states import ShopStates
+from utils.message_utils import safe_delete_message
+from utils.logger import setup_logger
+
+# Setup logger
+logger = setup_logger('handlers.shop.search')
+
+# Товаров на странице результатов поиска
+SEARCH_RESULTS_PER_PAGE = 8
+
+async def search_command(message: types.Message, state: FSMContext):
+    """Команда /search [запрос]: без запроса спрашивает, что искать"""
+    search_query = message.get_args().strip()
+    if search_query:
+        await state.reset_state(with_data=False)
+        await state.update_data(product_search_query=search_query)
+        await show_search_results(message, search_query, 0)
+        return
+    await ask_search_query(message)
+
+async def ask_search_query(message: types.Message):
+    """Просит ввести запрос для поиска товаров"""
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.add(types.InlineKeyboardButton("◀️ К категориям", callback_data="back_to_categories"))
+    await message.answer(
+        "🔍 Введите название товара, категорию или слово из описания:",
+        reply_markup=keyboard
+    )
+    await ShopStates.waiting_for_search_query.set()
+
+async def search_button_callback(callback: types.CallbackQuery):
+    """Кнопка поиска в списке категорий"""
+    await callback.answer()
+    await safe_delete_message(callback.message)
+    await ask_search_query(callback.message)
+
+async def search_query_input(message: types.Message, state: FSMContext):
+    """Запрос, введенный после кнопки поиска"""
+    search_query = message.text.strip()
+    # Запрос остается в данных состояния для листания результатов
+    await state.reset_state(with_data=False)
+    await state.update_data(product_search_query=search_query)
+    await show_search_results(message, search_query, 0)
+
+async def show_search_results(message: types.Message, search_query, offset):
+    """Показывает страницу найденных товаров"""
+    products, total = await run_db(search_products, search_query, SEARCH_RESULTS_PER_PAGE, offset)
+
+    keyboard = types.InlineKeyboardMarkup(row_width=2)
+
+    if not products:
+        keyboard.add(types.InlineKeyboardButton("🔍 Искать еще", callback_data="shop_search"))
+        keyboard.add(types.InlineKeyboardButton("◀️ К категориям", callback_data="back_to_categories"))
+        await message.answer(
+            f"😔 По запросу «{search_query}» ничего не найдено.",
+            reply_markup=keyboard
+        )
+        return
+
+    product_buttons = [
+        types.InlineKeyboardButton(f"{product['name']} - {product['price']} ⭐", callback_data=f"product_{product['id']}")
+        for product in products
+    ]
+    for i in range(0, len(product_buttons), 2):
+        keyboard.row(*product_buttons[i:i + 2])
+
+    navigation_buttons = []
+    if offset > 0:
+        navigation_buttons.append(types.InlineKeyboardButton(
+            "⬅️ Назад", callback_data=f"psearch_{max(0, offset - SEARCH_RESULTS_PER_PAGE)}"
+        ))
+    if offset + SEARCH_RESULTS_PER_PAGE < total:
+        navigation_buttons.append(types.InlineKeyboardButton(
+            "➡️ Вперед", callback_data=f"psearch_{offset + SEARCH_RESULTS_PER_PAGE}"
+        ))
+    if navigation_buttons:
+        keyboard.row(*navigation_buttons)
+
+    keyboard.add(types.InlineKeyboardButton("🔍 Искать еще", callback_data="shop_search"))
+    keyboard.add(types.InlineKeyboardButton("◀️ К категориям", callback_data="back_to_categories"))
+
+    await message.answer(
+        f"🔍 Найдено по запросу «{search_query}»: {total}\n\n"
+        "Выберите товар для просмотра подробной информации:",
+        reply_markup=keyboard
+    )
+
+async def search_page_callback(callback: types.CallbackQuery, state: FSMContext):
+    """Листание результатов поиска"""
+    await callback.answer()
+
+    data = await state.get_data()
+    search_query = data.get('product_search_query')
+    if not search_query:
+        await safe_delete_message(callback.message)
+        await ask_search_query(callback.message)
+        return
+
+    try:
+        offset = int(callback.data.replace("psearch_", "", 1))
+    except ValueError:
+        logger.warning(f"Invalid search page: {callback.data}")
+        return
+
+    await safe_delete_message(callback.message)
+    await show_search_results(callback.message, search_query, offset)
+
+async def inline_product_search(inline_query: types.InlineQuery):
+    """
+    Поиск товаров в inline-режиме (@bot запрос). Ответ кэширует Telegram (cache_time),
+    а ID результатов по запросу - кэш каталога на сервере
+    """
+    search_query = inline_query.query.strip()
+    if not search_query:
+        await inline_query.answer([], cache_time=INLINE_CACHE_TIME, is_personal=False)
+        return
+
+    product_ids = await run_db(search_product_ids, search_query)
+    products = await run_db(get_storefront_products, product_ids)
+
+    # Карточка товара открывается в личном чате с ботом по ссылке /start product_<id>
+    bot_username = (await inline_query.bot.me).username
+
+    results = []
+    for product in products:
+        keyboard = types.InlineKeyboardMarkup()
+        keyboard.add(types.InlineKeyboardButton(
+            "🛒 Открыть в магазине", url=f"https://t.me/{bot_username}?start=product_{product['id']}"
+        ))
+        stock_text = f"в наличии {product['stock']} шт." if product['stock'] > 0 else "нет в наличии"
+        description = f"{product['price']} ⭐ · {stock_text}"
+        if product.get('category'):
+            description += f" · {product['category']}"
+        text = (
+            f"<b>{quote_html(product['name'])}</b>\n\n{quote_html(product.get('description') or '')}\n\n"
+            f"💰 <b>Цена:</b> {product['price']} ⭐"
+        )
+        # В image_url хранится file_id фото из Telegram, а не ссылка - такое фото отправляется как кэшированное
+        if product.get('image_url'):
+            results.append(types.InlineQueryResultCachedPhoto(
+                id=str(product['id']),
+                photo_file_id=product['image_url'],
+                title=product['name'],
+                description=description,
+                caption=text,
+                parse_mode="HTML",
+                reply_markup=keyboard
+            ))
+        else:
+            results.append(types.InlineQueryResultArticle(
+                id=str(product['id']),
+                title=product['name'],
+                description=description,
+                input_message_content=types.InputTextMessageContent(text, parse_mode="HTML"),
+                reply_markup=keyboard
+            ))
+
+    await inline_query.answer(results, cache_time=INLINE_CACHE_TIME, is_personal=False)
+
+def register_search_handlers(dp: Dispatcher):
+    """Регистрирует обработчики поиска товаров"""
+    dp.register_message_handler(search_command, commands=["search"], state="*")
+    dp.register_message_handler(search_query_input, state=ShopStates.waiting_for_search_query)
+
+    dp.register_callback_query_handler(
+        search_button_callback,
+        lambda c: c.data == "shop_search",
+        state="*"
+    )
+    dp.register_callback_query_handler(
+        search_page_callback,
+        lambda c: c.data and c.data.startswith("psearch_"),
+        state="*"
+    )
+
+    dp.register_inline_handler(inline_product_search, state="*")
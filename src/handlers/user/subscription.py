@@ -1,10 +1,12 @@
 from aiogram import types
-from services.database import get_database_session, User
 from utils.logger import setup_logger
 from utils.admin_utils import is_admin
 from keyboards.user_kb import user_kb
 from keyboards.admin_kb import admin_reply_kb
-from utils.subscription_utils import check_user_subscriptions
+from utils.subscription_utils import check_user_subscriptions, get_tracked_channel_ids_cached
+from utils.subscription_cache import cache_membership
+from services.channel_member_service import save_member_status, is_member_status
+from services.database import run_db
 from utils.message_utils import show_subscription_message
 
 # Setup logger for this module
@@ -21,7 +23,7 @@ async def check_subscription_command(message: types.Message):
         else:
             await message.answer("You are not subscribed. Please subscribe to continue.")
 
-async def check_subscription_callback(callback: types.CallbackQuery):
+async def check_subscription_callback(callback: types.CallbackQuery, user_ctx=None):
     """Handle the Check Subscription button with improved error handling"""
     user_id = callback.from_user.id
     
@@ -33,35 +35,29 @@ async def check_subscription_callback(callback: types.CallbackQuery):
     except Exception as e:
         logger.error(f"Error answering callback for user {user_id}: {e}", exc_info=True)
     
-    # Check if user is an exception first
-    try:
-        with get_database_session() as session:
-            user = session.query(User).filter(User.id == user_id).first()
+    # Check if user is an exception first (context is loaded by UserContextMiddleware)
+    if user_ctx and user_ctx.is_exception:
+        logger.info(f"User {user_id} is marked as exception, bypassing subscription checks")
+        
+        try:
+            # User is an exception, show special message
+            await callback.message.delete()  # Delete the subscription check message
             
-            if user and hasattr(user, 'is_exception') and user.is_exception:
-                logger.info(f"User {user_id} is marked as exception, bypassing subscription checks")
+            # Send special message for exception users
+            keyboard = user_kb
+            if is_admin(user_id):
+                keyboard = admin_reply_kb
                 
-                try:
-                    # User is an exception, show special message
-                    await callback.message.delete()  # Delete the subscription check message
-                    
-                    # Send special message for exception users
-                    keyboard = user_kb
-                    if is_admin(user_id):
-                        keyboard = admin_reply_kb
-                        
-                    await callback.message.answer(
-                        "✨ <b>Вы являетесь исключительным пользователем!</b>\n\n"
-                        "Вам не требуется подписка на каналы для использования бота.",
-                        parse_mode="HTML",
-                        reply_markup=keyboard
-                    )
-                    return
-                except Exception as e:
-                    logger.error(f"Error handling exception user display for {user_id}: {e}", exc_info=True)
-                    # Продолжаем выполнение, чтобы попробовать обычную проверку подписок
-    except Exception as e:
-        logger.error(f"Error checking if user {user_id} is an exception: {e}", exc_info=True)
+            await callback.message.answer(
+                "✨ <b>Вы являетесь исключительным пользователем!</b>\n\n"
+                "Вам не требуется подписка на каналы для использования бота.",
+                parse_mode="HTML",
+                reply_markup=keyboard
+            )
+            return
+        except Exception as e:
+            logger.error(f"Error handling exception user display for {user_id}: {e}", exc_info=True)
+            # Продолжаем выполнение, чтобы попробовать обычную проверку подписок
     
     # Regular subscription check with improved error handling
     try:
@@ -74,7 +70,9 @@ async def check_subscription_callback(callback: types.CallbackQuery):
             return
             
         try:
-            is_subscribed, not_subscribed_channels = await check_user_subscriptions(bot, user_id)
+            # Пользователь мог только что подписаться, а событие chat_member - не дойти:
+            # не доверяем ни кэшу, ни сохраненным отказам, спрашиваем Bot API и сохраняем ответ
+            is_subscribed, not_subscribed_channels = await check_user_subscriptions(bot, user_id, force_refresh=True)
         except Exception as e:
             logger.error(f"Error checking subscription status for user {user_id}: {e}", exc_info=True)
             await callback.message.answer(
@@ -130,10 +128,29 @@ async def check_subscription_callback(callback: types.CallbackQuery):
         except Exception as inner_e:
             logger.error(f"Error sending error message to user {user_id}: {inner_e}", exc_info=True)
 
+async def channel_member_update(update: types.ChatMemberUpdated):
+    """Сохраняет изменение статуса участника в отслеживаемом канале (бот должен быть админом канала)"""
+    channel_id = str(update.chat.id)
+    if channel_id not in await get_tracked_channel_ids_cached():
+        return
+    
+    user_id = update.new_chat_member.user.id
+    status = update.new_chat_member.status
+    
+    try:
+        await run_db(save_member_status, user_id, channel_id, status)
+        cache_membership(user_id, channel_id, is_member_status(status))
+        logger.info(f"Channel member update: user={user_id} channel={channel_id} status={status}")
+    except Exception as e:
+        logger.error(f"Error saving channel member update for user {user_id} in {channel_id}: {e}", exc_info=True)
+
 def register_subscription_handlers(dp):
     """Регистрация обработчиков для системы подписок"""
     # Регистрация команды проверки подписки
     dp.register_message_handler(check_subscription_command, commands=["subscription", "check_subscription"])
     
     # Регистрация обработчика callback-запросов для проверки подписки
-    dp.register_callback_query_handler(check_subscription_callback, lambda c: c.data == "check_subscription")
\ No newline at end of file
+    dp.register_callback_query_handler(check_subscription_callback, lambda c: c.data == "check_subscription")
+    
+    # События вступления/выхода из каналов обновляют сохраненный статус подписки
+    dp.register_chat_member_handler(channel_member_update)
\ No newline at end of file
@@ -18,6 +18,9 @@ admin_inlin_kb.add(
     InlineKeyboardButton("🔗 Пригласительная ссылка", callback_data="admin_ref_link"),
     InlineKeyboardButton("🛒 Товары", callback_data="manage_products")
 )
+admin_inlin_kb.add(
+    InlineKeyboardButton("🗄 Кэш", callback_data="admin_cache_stats")
+)
 
 # Admin-specific keyboard with admin panel button
 admin_reply_kb = ReplyKeyboardMarkup(resize_keyboard=True)
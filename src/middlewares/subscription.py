@@ -2,7 +2,6 @@ from aiogram import types
 from aiogram.dispatcher.handler import CancelHandler
 from aiogram.dispatcher.middlewares import BaseMiddleware
 from utils.admin_utils import is_admin
-from services.database import get_database_session, User
 from utils.subscription_utils import check_user_subscriptions
 from utils.message_utils import show_subscription_message
 
@@ -15,7 +14,7 @@ class SubscriptionMiddleware(BaseMiddleware):
             return  # Skip ALL checks for help
         
         from bot import bot
-        await self._check_subscription(bot, message.from_user.id, message)
+        await self._check_subscription(bot, message.from_user.id, data.get("user_ctx"), message)
     
     async def on_pre_process_callback_query(self, callback_query: types.CallbackQuery, data: dict):
         # Allow subscription check and help-related callbacks to pass through
@@ -23,31 +22,26 @@ class SubscriptionMiddleware(BaseMiddleware):
             return
         
         from bot import bot
-        await self._check_subscription(bot, callback_query.from_user.id, callback_query.message, callback_query)
+        await self._check_subscription(bot, callback_query.from_user.id, data.get("user_ctx"), callback_query.message, callback_query)
     
-    async def _check_subscription(self, bot, user_id: int, message_obj, callback_query=None):
+    async def _check_subscription(self, bot, user_id: int, user_ctx, message_obj, callback_query=None):
         # Skip check for admins
         if is_admin(user_id):
             return
         
-        # Проверка на исключения и блокировки...
-        session = get_database_session()
-        try:
-            user = session.query(User).filter(User.id == user_id).first()
-            if user:
-                # Skip check for exception users
-                if hasattr(user, 'is_exception') and user.is_exception:
-                    return
-                
-                # Check if user is blocked
-                if hasattr(user, 'is_blocked') and user.is_blocked:
-                    if callback_query:
-                        await callback_query.answer("Ваш аккаунт заблокирован. Используйте кнопку 'ℹ️ Помощь' для поддержки.", show_alert=True)
-                    else:
-                        await message_obj.answer("Ваш аккаунт заблокирован. Используйте кнопку 'ℹ️ Помощь' для поддержки.")
-                    raise CancelHandler()
-        finally:
-            session.close()
+        # Проверка на исключения и блокировки по контексту из UserContextMiddleware
+        if user_ctx:
+            # Skip check for exception users
+            if user_ctx.is_exception:
+                return
+            
+            # Check if user is blocked
+            if user_ctx.is_blocked:
+                if callback_query:
+                    await callback_query.answer("Ваш аккаунт заблокирован. Используйте кнопку 'ℹ️ Помощь' для поддержки.", show_alert=True)
+                else:
+                    await message_obj.answer("Ваш аккаунт заблокирован. Используйте кнопку 'ℹ️ Помощь' для поддержки.")
+                raise CancelHandler()
         
         # Check subscriptions
         is_subscribed, not_subscribed_channels = await check_user_subscriptions(bot, user_id)
@@ -62,4 +56,4 @@ class SubscriptionMiddleware(BaseMiddleware):
             await show_subscription_message(message_obj, not_subscribed_channels)
             
             # Cancel further processing - don't run the actual handler
-            raise CancelHandler()
\ No newline at end of file
+            raise CancelHandler()
@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+from aiogram import types
+from aiogram.dispatcher.middlewares import BaseMiddleware
+from services.database import run_in_session, User
+
+@dataclass(frozen=True)
+class UserContext:
+    """Снимок пользователя, загруженный один раз на обновление"""
+    id: int
+    is_blocked: bool
+    is_exception: bool
+    is_new: bool
+
+class UserContextMiddleware(BaseMiddleware):
+    """
+    Загружает (или регистрирует) пользователя одним обращением к БД
+    и кладет UserContext в data["user_ctx"] для остальных middleware и обработчиков
+    """
+
+    async def on_pre_process_message(self, message: types.Message, data: dict):
+        data["user_ctx"] = await self._load_context(message.from_user)
+
+    async def on_pre_process_callback_query(self, callback_query: types.CallbackQuery, data: dict):
+        data["user_ctx"] = await self._load_context(callback_query.from_user)
+
+    async def _load_context(self, user: types.User) -> UserContext:
+        user_ctx = await run_in_session(
+            self._load_or_register,
+            user.id,
+            user.username,
+            user.full_name
+        )
+        if user_ctx.is_new:
+            print(f"New user registered: {user.username or 'unknown'} ({user.id})")
+        return user_ctx
+
+    @staticmethod
+    def _load_or_register(session, user_id: int, username: str, full_name: str) -> UserContext:
+        db_user = session.query(User).filter(User.id == user_id).first()
+
+        if not db_user:
+            # Auto register new user
+            session.add(User(
+                id=user_id,
+                username=username or "unknown",
+                full_name=full_name or "Unknown User"
+            ))
+            return UserContext(id=user_id, is_blocked=False, is_exception=False, is_new=True)
+
+        # Пользователь снова пишет боту - значит, он опять доступен для рассылок
+        if db_user.is_reachable is False:
+            db_user.is_reachable = True
+            db_user.unreachable_since = None
+
+        return UserContext(
+            id=user_id,
+            is_blocked=bool(db_user.is_blocked),
+            is_exception=bool(db_user.is_exception),
+            is_new=False
+        )
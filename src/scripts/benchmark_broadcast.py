@@ -0,0 +1,109 @@
+import sys
+import os
+import asyncio
+import time
+from collections import deque
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from aiohttp import web
+from aiogram import Bot
+from aiogram.bot.api import TelegramAPIServer
+from utils.broadcast import Broadcaster
+
+# Параметры локального "Bot API"
+FAKE_API_PORT = 8089
+FAKE_API_LATENCY = 0.04  # Секунд на ответ
+FAKE_API_LIMIT = 30  # Сообщений в секунду, после чего отвечаем 429
+BLOCKED_EVERY = 50  # Каждый N-й получатель "заблокировал бота"
+
+RECIPIENTS = 400
+FAKE_TOKEN = "123456:AAHvnLodDAZKMxz4ED9K6DZDp54Nk-ZCPZ0"
+
+class FakeBotAPI:
+    """Минимальный sendMessage с задержкой, флуд-лимитом и заблокированными чатами"""
+
+    def __init__(self):
+        self.accepted = deque()
+        self.flood_errors = 0
+
+    async def handle(self, request):
+        await asyncio.sleep(FAKE_API_LATENCY)
+        data = await request.post()
+        chat_id = int(data["chat_id"])
+
+        now = time.monotonic()
+        while self.accepted and now - self.accepted[0] > 1:
+            self.accepted.popleft()
+
+        if len(self.accepted) >= FAKE_API_LIMIT:
+            self.flood_errors += 1
+            return web.json_response({
+                "ok": False, "error_code": 429,
+                "description": "Too Many Requests: retry after 1",
+                "parameters": {"retry_after": 1}
+            }, status=429)
+
+        if chat_id % BLOCKED_EVERY == 0:
+            return web.json_response({
+                "ok": False, "error_code": 403,
+                "description": "Forbidden: bot was blocked by the user"
+            }, status=403)
+
+        self.accepted.append(now)
+        return web.json_response({"ok": True, "result": {
+            "message_id": 1, "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"}, "text": data.get("text")
+        }})
+
+async def recipients():
+    for chat_id in range(1, RECIPIENTS + 1):
+        yield chat_id
+
+async def legacy_broadcast(bot):
+    """Прежний цикл: по одному сообщению с фиксированной паузой 0.05 с"""
+    sent = 0
+    async for chat_id in recipients():
+        try:
+            await bot.send_message(chat_id=chat_id, text="test")
+            sent += 1
+            await asyncio.sleep(0.05)
+        except Exception:
+            pass
+    return sent
+
+async def run_case(title, api, coro_factory):
+    api.flood_errors = 0
+    started = time.perf_counter()
+    sent = await coro_factory()
+    elapsed = time.perf_counter() - started
+    print(f"{title:<28} | {sent:>8} | {api.flood_errors:>5} | {elapsed:>7.1f} | {sent / elapsed:>8.1f}")
+
+async def run_benchmark():
+    api = FakeBotAPI()
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", api.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", FAKE_API_PORT).start()
+
+    bot = Bot(token=FAKE_TOKEN, server=TelegramAPIServer.from_base(f"http://127.0.0.1:{FAKE_API_PORT}"))
+    send = lambda chat_id: bot.send_message(chat_id=chat_id, text="test")
+
+    print(f"Получателей: {RECIPIENTS}, лимит API: {FAKE_API_LIMIT}/с, задержка ответа: {FAKE_API_LATENCY * 1000:.0f} мс")
+    print(f"{'вариант':<28} | {'доставл.':>8} | {'429':>5} | {'время,с':>7} | {'сообщ./с':>8}")
+    print("-" * 70)
+    try:
+        await run_case("последовательно + sleep", api, lambda: legacy_broadcast(bot))
+        for rate in (25, 29, 45):
+            async def engine(rate=rate):
+                stats = await Broadcaster(rate=rate, workers=10, per_chat_interval=0).run(recipients(), send)
+                return stats.sent
+            await run_case(f"Broadcaster rate={rate}", api, engine)
+    finally:
+        await (await bot.get_session()).close()
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())
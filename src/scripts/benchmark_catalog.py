@@ -0,0 +1,91 @@
+import sys
+import os
+import tempfile
+import time
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, event
+from services import database
+from services.database import Base, Product, ProductInventory
+from services.product_service import get_all_products, get_active_products
+from utils.catalog_cache import invalidate_catalog
+
+# Размеры каталога для замеров
+CATALOG_SIZES = [100, 1000, 10000]
+
+class QueryCounter:
+    """Считает SQL-запросы, выполненные через engine"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+def fill_catalog(session, size):
+    """Создает size товаров, у каждого второго есть остаток"""
+    session.bulk_insert_mappings(Product, [
+        {"id": i, "name": f"Товар {i:05d}", "description": "", "price": 10 + i % 50,
+         "category": f"Категория {i % 10}", "active": True}
+        for i in range(1, size + 1)
+    ])
+    session.bulk_insert_mappings(ProductInventory, [
+        {"product_id": i, "stock": (i % 2) * 10, "reserved": 0}
+        for i in range(1, size + 1)
+    ])
+    session.commit()
+
+def get_all_products_n_plus_one():
+    """Прежняя реализация: отдельный запрос остатка на каждый товар"""
+    session = database.get_database_session()
+    try:
+        result = []
+        for product in session.query(Product).filter(Product.active == True).order_by(Product.created_at.desc()).all():
+            stock_result = session.execute(
+                "SELECT stock FROM product_inventory WHERE product_id = :product_id",
+                {"product_id": product.id}
+            ).fetchone()
+            result.append({"id": product.id, "stock": stock_result[0] if stock_result else 0})
+        return result
+    finally:
+        session.close()
+
+def measure(counter, func, *args, **kwargs):
+    """Возвращает (число запросов, время в мс, число строк)"""
+    # Кэш каталога общий для всех размеров - без сброса замерялся бы результат прошлого прогона
+    invalidate_catalog()
+    counter.count = 0
+    started = time.perf_counter()
+    rows = func(*args, **kwargs)
+    elapsed = (time.perf_counter() - started) * 1000
+    return counter.count, elapsed, len(rows)
+
+def run_benchmark():
+    print(f"{'товаров':>8} | {'вариант':<24} | {'запросов':>8} | {'время, мс':>10} | {'строк':>6}")
+    print("-" * 70)
+
+    for size in CATALOG_SIZES:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+            Base.metadata.create_all(engine)
+            # Сервисы берут сессии из SessionLocal - направляем их во временную базу
+            database.SessionLocal.configure(bind=engine)
+            fill_catalog(database.get_database_session(), size)
+            counter = QueryCounter(engine)
+
+            cases = [
+                ("N+1 (прежний)", get_all_products_n_plus_one, (), {}),
+                ("get_all_products", get_all_products, (), {}),
+                ("get_active_products", get_active_products, (), {}),
+            ]
+            for title, func, args, kwargs in cases:
+                queries, elapsed, rows = measure(counter, func, *args, **kwargs)
+                print(f"{size:>8} | {title:<24} | {queries:>8} | {elapsed:>10.1f} | {rows:>6}")
+            print("-" * 70)
+            engine.dispose()
+
+if __name__ == "__main__":
+    run_benchmark()
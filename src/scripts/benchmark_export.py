@@ -0,0 +1,130 @@
+import sys
+import os
+import json
+import resource
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from services import database
+from services.database import Base, User, Product, Order, OrderItem
+
+# Число позиций заказов для замеров; по 4 позиции в заказе
+ORDER_ITEM_COUNTS = [10000, 100000, 1000000]
+ITEMS_PER_ORDER = 4
+USERS = 1000
+PRODUCTS = 200
+# Прежний способ (все объекты ORM + обычная книга openpyxl) замеряем только на небольших объемах
+LEGACY_MAX_ITEMS = 100000
+
+def fill_database(path, item_count):
+    """Временная база с item_count позициями заказов"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    started = datetime(2025, 1, 1)
+    order_count = item_count // ITEMS_PER_ORDER
+    with engine.begin() as connection:
+        connection.execute(User.__table__.insert(), [
+            {"id": i, "username": f"user{i}", "full_name": f"User {i}",
+             "is_blocked": False, "is_exception": False, "is_reachable": True}
+            for i in range(1, USERS + 1)
+        ])
+        connection.execute(Product.__table__.insert(), [
+            {"id": i, "name": f"Товар {i}", "price": 10 + i % 50, "active": True}
+            for i in range(1, PRODUCTS + 1)
+        ])
+        batch = 50000
+        for first in range(1, order_count + 1, batch):
+            last = min(first + batch, order_count + 1)
+            connection.execute(Order.__table__.insert(), [
+                {"id": i, "user_id": i % USERS + 1, "total_amount": 100.0, "status": "new",
+                 "created_at": started + timedelta(minutes=i)}
+                for i in range(first, last)
+            ])
+            connection.execute(OrderItem.__table__.insert(), [
+                {"order_id": i, "product_id": (i + j) % PRODUCTS + 1, "quantity": 1 + j, "price": 25.0}
+                for i in range(first, last) for j in range(ITEMS_PER_ORDER)
+            ])
+    engine.dispose()
+
+def legacy_export(path):
+    """Все позиции объектами ORM и обычная книга openpyxl - как делала прежняя выгрузка пользователей"""
+    import openpyxl
+    session = database.get_database_session()
+    try:
+        rows = session.query(Order, OrderItem).join(OrderItem, OrderItem.order_id == Order.id).all()
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        for row_num, (order, item) in enumerate(rows, 1):
+            ws.cell(row=row_num, column=1).value = order.id
+            ws.cell(row=row_num, column=2).value = order.created_at
+            ws.cell(row=row_num, column=3).value = item.product_id
+            ws.cell(row=row_num, column=4).value = item.quantity
+            ws.cell(row=row_num, column=5).value = item.price
+        wb.save(path)
+        return len(rows)
+    finally:
+        session.close()
+
+def run_child(db_path, case):
+    """Выполняется в отдельном процессе, чтобы пик памяти мерился только для одного варианта"""
+    from services.export_service import export_orders_xlsx, export_orders_csv_gz
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    database.SessionLocal.configure(bind=engine)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    export_func = {
+        "legacy xlsx": legacy_export,
+        "stream xlsx": export_orders_xlsx,
+        "stream csv.gz": export_orders_csv_gz,
+    }[case]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out_path = os.path.join(tmp_dir, "export")
+        started = time.perf_counter()
+        rows = export_func(out_path)
+        elapsed = time.perf_counter() - started
+        size = os.path.getsize(out_path)
+
+    # ru_maxrss в Linux - килобайты
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"rows": rows, "elapsed": elapsed, "size": size,
+                      "peak_mb": peak / 1024, "growth_mb": (peak - baseline) / 1024}))
+
+def run_benchmark():
+    print(f"{'позиций':>8} | {'вариант':<14} | {'строк':>8} | {'время,с':>8} | {'файл,МБ':>8} | {'пик RSS,МБ':>10} | {'рост,МБ':>8}")
+    print("-" * 84)
+    for item_count in ORDER_ITEM_COUNTS:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "bench.db")
+            # Заполняем в отдельном процессе: ru_maxrss наследуется дочерними процессами,
+            # и разросшийся при заполнении родитель исказил бы замеры
+            subprocess.run([sys.executable, __file__, "--fill", db_path, str(item_count)], check=True)
+
+            cases = ["stream csv.gz", "stream xlsx"]
+            if item_count <= LEGACY_MAX_ITEMS:
+                cases.insert(0, "legacy xlsx")
+            for case in cases:
+                output = subprocess.run(
+                    [sys.executable, __file__, "--child", db_path, case],
+                    check=True, capture_output=True, text=True
+                ).stdout.strip().splitlines()[-1]
+                result = json.loads(output)
+                print(
+                    f"{item_count:>8} | {case:<14} | {result['rows']:>8} | {result['elapsed']:>8.1f} | "
+                    f"{result['size'] / 1024 / 1024:>8.1f} | {result['peak_mb']:>10.1f} | {result['growth_mb']:>8.1f}"
+                )
+        print("-" * 84)
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], sys.argv[3])
+    elif len(sys.argv) == 4 and sys.argv[1] == "--fill":
+        fill_database(sys.argv[2], int(sys.argv[3]))
+    else:
+        run_benchmark()
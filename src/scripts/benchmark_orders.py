@@ -0,0 +1,109 @@
+import sys
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, event
+from services import database
+from services.database import Base, Product, ProductInventory, CartItem, Order, OrderItem, session_scope
+from services.order_service import create_order_from_cart, InsufficientStockError
+
+# Параметры замера: покупателей больше, чем товара на складе
+BUYERS = 200
+INITIAL_STOCK = 50
+THREADS = 16
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+def prepare_database(tmp_dir):
+    """Временная база: один товар и корзина с ним у каждого покупателя"""
+    engine = create_engine(
+        f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}",
+        connect_args={"check_same_thread": False, "timeout": database.SQLITE_BUSY_TIMEOUT}
+    )
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    Base.metadata.create_all(engine)
+    # Сервисы берут сессии из SessionLocal - направляем их во временную базу
+    database.SessionLocal.configure(bind=engine)
+
+    with session_scope() as session:
+        session.add(Product(id=1, name="Товар", description="", price=10, active=True))
+        session.add(ProductInventory(product_id=1, stock=INITIAL_STOCK, reserved=0))
+        session.add_all([
+            CartItem(user_id=user_id, product_id=1, quantity=1)
+            for user_id in range(1, BUYERS + 1)
+        ])
+    return engine
+
+def legacy_checkout(user_id):
+    """Прежний порядок: проверка остатка, заказ, затем отдельное списание read-then-write"""
+    with session_scope() as session:
+        stock = session.execute(
+            "SELECT stock FROM product_inventory WHERE product_id = 1"
+        ).scalar()
+        if stock < 1:
+            return False
+
+        order = Order(user_id=user_id, total_amount=10, status="pending")
+        session.add(order)
+        session.flush()
+        session.add(OrderItem(order_id=order.id, product_id=1, quantity=1, price=10))
+        session.query(CartItem).filter(CartItem.user_id == user_id).delete()
+
+    # Отдельная транзакция: прочитать остаток и записать уменьшенный
+    with session_scope() as session:
+        stock = session.execute(
+            "SELECT stock FROM product_inventory WHERE product_id = 1"
+        ).scalar()
+        session.execute(
+            "UPDATE product_inventory SET stock = :stock WHERE product_id = 1",
+            {"stock": max(0, stock - 1)}
+        )
+    return True
+
+def transactional_checkout(user_id):
+    """Новый порядок: create_order_from_cart с условным списанием в одной транзакции"""
+    try:
+        return create_order_from_cart(user_id, "Адрес") is not None
+    except InsufficientStockError:
+        return False
+
+def run_case(title, checkout):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = prepare_database(tmp_dir)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=THREADS) as pool:
+            results = list(pool.map(checkout, range(1, BUYERS + 1)))
+        elapsed = time.perf_counter() - started
+
+        with session_scope() as session:
+            orders = session.query(Order).count()
+            stock = session.query(ProductInventory.stock).filter(ProductInventory.product_id == 1).scalar()
+
+        engine.dispose()
+
+    accepted = sum(results)
+    oversold = max(0, orders - INITIAL_STOCK)
+    print(
+        f"{title:<16} | {accepted:>7} | {BUYERS - accepted:>8} | {stock:>7} | {oversold:>8} | "
+        f"{elapsed:>7.2f} | {BUYERS / elapsed:>8.0f}"
+    )
+
+def run_benchmark():
+    print(f"Покупателей: {BUYERS}, потоков: {THREADS}, остаток: {INITIAL_STOCK}")
+    print(f"{'вариант':<16} | {'заказов':>7} | {'отказов':>8} | {'остаток':>7} | {'перепрод':>8} | {'время,с':>7} | {'заказ/с':>8}")
+    print("-" * 82)
+    run_case("read-then-write", legacy_checkout)
+    run_case("транзакция", transactional_checkout)
+
+if __name__ == "__main__":
+    run_benchmark()
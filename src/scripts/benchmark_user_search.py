@@ -0,0 +1,70 @@
+import sys
+import os
+import random
+import tempfile
+import time
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from services import database
+from services.database import Base, User, session_scope
+from services.user_search_service import create_user_search_index, _search_fts, _search_like
+
+# Размеры таблицы пользователей для замеров
+USER_COUNTS = [100000, 1000000]
+# Сколько раз повторяем каждый запрос
+REPEATS = 20
+PAGE_SIZE = 10
+
+FIRST_NAMES = ["Иван", "Мария", "Алексей", "Ольга", "Дмитрий", "Анна", "Сергей", "Елена", "John", "Kate"]
+LAST_NAMES = ["Иванов", "Петрова", "Смирнов", "Кузнецова", "Попов", "Соколова", "Lee", "Smith", "Brown", "Miller"]
+
+QUERIES = ["Мария", "смирн", "user123456", "Kate Smith", "несуществующий"]
+
+def fill_database(engine, user_count):
+    """Заполняет users; индекс FTS5 заполняется триггером при вставке"""
+    rnd = random.Random(42)
+    with engine.begin() as connection:
+        create_user_search_index(connection)
+        batch = 50000
+        for first in range(1, user_count + 1, batch):
+            connection.execute(User.__table__.insert(), [
+                {"id": i, "username": f"user{i}",
+                 "full_name": f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}{'' if i % 7 else ' ' + str(i)}",
+                 "is_blocked": False, "is_exception": False, "is_reachable": True}
+                for i in range(first, min(first + batch, user_count + 1))
+            ])
+
+def measure(search_func, query):
+    """Среднее время одного поиска в миллисекундах и число найденных"""
+    with session_scope() as session:
+        search_func(session, query, PAGE_SIZE, 0)  # прогрев кеша страниц
+        started = time.perf_counter()
+        for _ in range(REPEATS):
+            _, total = search_func(session, query, PAGE_SIZE, 0)
+        return (time.perf_counter() - started) / REPEATS * 1000, total
+
+def run_benchmark():
+    print(f"{'пользователей':>13} | {'запрос':<16} | {'LIKE, мс':>9} | {'найдено':>8} | {'FTS5, мс':>9} | {'найдено':>8}")
+    print("-" * 78)
+    for user_count in USER_COUNTS:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+            Base.metadata.create_all(engine)
+            database.SessionLocal.configure(bind=engine)
+
+            started = time.perf_counter()
+            fill_database(engine, user_count)
+            print(f"Заполнение {user_count} пользователей: {time.perf_counter() - started:.1f} с")
+
+            for query in QUERIES:
+                like_ms, like_total = measure(_search_like, query)
+                fts_ms, fts_total = measure(_search_fts, query)
+                print(f"{user_count:>13} | {query:<16} | {like_ms:>9.2f} | {like_total:>8} | {fts_ms:>9.2f} | {fts_total:>8}")
+            engine.dispose()
+        print("-" * 78)
+
+if __name__ == "__main__":
+    run_benchmark()
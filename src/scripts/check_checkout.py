@@ -0,0 +1,146 @@
+"""
+Проверка сценариев оформления заказа на временной базе: каждый сценарий готовит данные,
+вызывает сервис и сверяет заказ и остатки. При расхождении скрипт завершается с кодом 1.
+
+Запуск из src: python scripts/check_checkout.py
+"""
+import sys
+import os
+import tempfile
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from services import database
+from services.database import Base, Product, ProductInventory, CartItem, Order, OrderItem, StockReservation, session_scope
+from services.inventory_service import reserve_items
+from services.order_service import create_paid_order, create_order_from_cart
+from services.cart_service import get_cart_snapshot
+
+def check_paid_reservation_of_last_unit():
+    """Покупатель зарезервировал последнюю единицу и оплатил счет - заказ создается из резерва"""
+    with session_scope() as session:
+        session.add(Product(id=1, name="Последний", description="", price=10, active=True))
+        session.add(ProductInventory(product_id=1, stock=1, reserved=0))
+
+    items = [{"product_id": 1, "quantity": 1, "price": 10, "name": "Последний"}]
+    reserve_items(1, "order_1_payload", items, 600)
+    order_id = create_paid_order(1, items, 10, "charge-1", "Адрес", "order_1_payload")
+
+    with session_scope() as session:
+        order = session.query(Order).filter(Order.id == order_id).one()
+        inventory = session.query(ProductInventory).filter(ProductInventory.product_id == 1).one()
+        reservations = session.query(StockReservation).count()
+        problems = []
+        if order.payment_id != "charge-1":
+            problems.append(f"в заказе payment_id={order.payment_id!r}, ожидался ID платежа Telegram")
+        if (inventory.stock, inventory.reserved) != (0, 0):
+            problems.append(f"остаток {inventory.stock}, резерв {inventory.reserved}, ожидались 0 и 0")
+        if reservations:
+            problems.append(f"осталось резервов: {reservations}")
+        return problems
+
+def check_inactive_product_in_cart():
+    """Скрытый товар в корзине не попадает в заказ и не списывается бесплатно"""
+    with session_scope() as session:
+        session.add_all([
+            Product(id=1, name="В продаже", description="", price=10, active=True),
+            Product(id=2, name="Скрытый", description="", price=20, active=False),
+            ProductInventory(product_id=1, stock=5, reserved=0),
+            ProductInventory(product_id=2, stock=5, reserved=0),
+            CartItem(user_id=1, product_id=1, quantity=1),
+            CartItem(user_id=1, product_id=2, quantity=1),
+        ])
+
+    result = create_order_from_cart(1, "Адрес")
+
+    with session_scope() as session:
+        problems = []
+        if result is None:
+            return ["заказ не создан"]
+        if result["total_amount"] != 10:
+            problems.append(f"сумма заказа {result['total_amount']}, ожидалось 10")
+        product_ids = [row[0] for row in session.query(OrderItem.product_id).all()]
+        if product_ids != [1]:
+            problems.append(f"товары в заказе {product_ids}, ожидался только [1]")
+        hidden_stock = session.query(ProductInventory.stock).filter(ProductInventory.product_id == 2).scalar()
+        if hidden_stock != 5:
+            problems.append(f"остаток скрытого товара {hidden_stock}, ожидалось 5")
+        return problems
+
+def check_cart_item_added_after_checkout():
+    """Товар, добавленный в корзину после выставления счета, остается в корзине после оплаты"""
+    with session_scope() as session:
+        session.add_all([
+            Product(id=1, name="Оплаченный", description="", price=10, active=True),
+            Product(id=2, name="Добавленный", description="", price=20, active=True),
+            ProductInventory(product_id=1, stock=5, reserved=0),
+            ProductInventory(product_id=2, stock=5, reserved=0),
+            CartItem(user_id=1, product_id=1, quantity=1),
+            CartItem(user_id=1, product_id=2, quantity=1),
+        ])
+
+    items = [{"product_id": 1, "quantity": 1, "price": 10, "name": "Оплаченный"}]
+    create_paid_order(1, items, 10, "charge-1", "Адрес")
+
+    with session_scope() as session:
+        cart = [row[0] for row in session.query(CartItem.product_id).filter(CartItem.user_id == 1).all()]
+        if cart != [2]:
+            return [f"в корзине {cart}, ожидался только [2]"]
+        return []
+
+def check_cart_during_payment():
+    """Корзина, открытая во время оплаты, не урезает позицию, зарезервированную счетом покупателя"""
+    with session_scope() as session:
+        session.add_all([
+            Product(id=1, name="Оплачиваемый", description="", price=10, active=True),
+            ProductInventory(product_id=1, stock=2, reserved=0),
+            CartItem(user_id=1, product_id=1, quantity=2),
+        ])
+
+    reserve_items(1, "order_1_payload", [{"product_id": 1, "quantity": 2, "name": "Оплачиваемый"}], 600)
+    cart = get_cart_snapshot(1)
+
+    if cart["removed"] or [line["quantity"] for line in cart["lines"]] != [2]:
+        return [f"корзина {cart}, ожидалась позиция с количеством 2"]
+    return []
+
+CHECKS = [
+    ("paid reservation of last unit", check_paid_reservation_of_last_unit),
+    ("inactive product in cart", check_inactive_product_in_cart),
+    ("cart item added after checkout", check_cart_item_added_after_checkout),
+    ("cart during payment", check_cart_during_payment),
+]
+
+def main():
+    failures = 0
+    for name, check in CHECKS:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'checkout.db')}")
+            Base.metadata.create_all(engine)
+            # Сервисы берут сессии из SessionLocal - направляем их во временную базу
+            database.SessionLocal.configure(bind=engine)
+            try:
+                problems = check()
+            except Exception as e:
+                problems = [f"{type(e).__name__}: {e}"]
+            finally:
+                engine.dispose()
+
+        if problems:
+            failures += 1
+            print(f"FAIL {name}")
+            for problem in problems:
+                print(f"       {problem}")
+        else:
+            print(f"ok   {name}")
+
+    if failures:
+        print(f"\nНе прошло сценариев: {failures}")
+        return 1
+    print("Все сценарии оформления заказа прошли")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+Проверка планов запросов сервисов: каждый запрос, который выполняет сервисная функция,
+прогоняется через EXPLAIN QUERY PLAN на базе с текущей схемой. Если SQLite
+читает таблицу целиком (SCAN без индекса), скрипт печатает план и завершается с кодом 1.
+
+Запуск из src: python scripts/check_query_plans.py [-v]
+"""
+import sys
+import os
+import re
+import tempfile
+from datetime import date, datetime
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, event
+from services import database
+from services.database import Base, User, Referral, Product, ProductInventory, Order, OrderItem, CartItem, StockReservation
+
+# SCAN <таблица> [AS <псевдоним>] без индекса; "SCAN t USING [COVERING] INDEX" - обход индекса, он допустим
+_FULL_SCAN_RE = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+def build_cases():
+    """
+    Проверяемые сценарии: (название, функция, таблицы, которые сценарий по смыслу читает целиком).
+    Функции импортируются здесь, после подмены базы
+    """
+    from services.user_service import UserService
+    from services.referral_service import ReferralService
+    from services.order_service import OrderService
+    from services import product_service, cart_service, inventory_service, broadcast_service, export_service
+    from services.channel_member_service import get_member_statuses
+    from services.user_search_service import search_users
+    from services.product_search_service import search_products
+
+    def with_service(service_class, method, *args):
+        def run():
+            service = service_class()
+            try:
+                return getattr(service, method)(*args)
+            finally:
+                service.close_session()
+        return run
+
+    def consume(iterator):
+        for _ in iterator:
+            pass
+
+    return [
+        # Пользователи
+        ("user by id", with_service(UserService, "get_user_by_id", 1), ()),
+        ("user by username", with_service(UserService, "get_user_by_username", "user1"), ()),
+        ("name initials", with_service(UserService, "get_name_initials"), ()),
+        ("users by initial", with_service(UserService, "count_users_by_initial", "U"), ()),
+        ("users by initial, next page", with_service(UserService, "get_users_by_initial", "U", 7, 1), ()),
+        ("users by initial, previous page", with_service(UserService, "get_users_by_initial", "U", 7, None, 2), ()),
+        ("user search", lambda: search_users("user"), ()),
+        ("user search by id", lambda: search_users("1"), ()),
+        # Рефералы
+        ("referrals of user", with_service(ReferralService, "get_user_referrals", 1), ()),
+        ("referral count", with_service(ReferralService, "count_user_referrals", 1), ()),
+        ("referral of user", with_service(ReferralService, "get_referral_by_user_id", 2), ()),
+        ("users with referrer", with_service(ReferralService, "get_total_users_with_referrer"), ()),
+        ("top referrers", with_service(ReferralService, "get_top_referrers"), ()),
+        # Каталог
+        ("storefront page", lambda: product_service.get_active_products_page(), ()),
+        ("storefront next page", lambda: product_service.get_active_products_page(after_id=1), ()),
+        ("category page", lambda: product_service.get_active_products_page(category="cat"), ()),
+        ("category previous page", lambda: product_service.get_active_products_page(category="cat", before_id=2), ()),
+        ("product card", lambda: product_service.get_product_by_id(1), ()),
+        ("categories", lambda: product_service.get_product_categories(), ()),
+        ("product search", lambda: search_products("prod"), ()),
+        ("stock levels", lambda: product_service.get_stock_levels([1, 2]), ()),
+        # Корзина и заказы
+        ("cart", lambda: cart_service.get_cart_snapshot(1), ()),
+        ("checkout items", lambda: cart_service.get_checkout_items(1), ()),
+        ("user orders", with_service(OrderService, "get_user_orders", 1), ()),
+        ("order items", with_service(OrderService, "get_order_items", 1), ()),
+        ("order stats", with_service(OrderService, "get_order_stats", 1), ()),
+        ("reservation check", lambda: inventory_service.has_reservation("pay-1"), ()),
+        ("expired reservations", lambda: inventory_service.release_expired_reservations(), ()),
+        ("channel statuses", lambda: get_member_statuses(1, [-100]), ()),
+        # Рассылки: первая порция и подсчет по всем пользователям читают users целиком по смыслу
+        ("broadcast first chunk", lambda: broadcast_service.get_recipient_chunk(job_id=1), ("users",)),
+        ("broadcast next chunk", lambda: broadcast_service.get_recipient_chunk(after_id=1, job_id=1), ()),
+        ("broadcast count", lambda: broadcast_service.count_recipients(), ("users",)),
+        ("segment with orders", lambda: broadcast_service.get_recipient_chunk(
+            after_id=1, segment={"type": broadcast_service.SEGMENT_WITH_ORDERS}), ()),
+        ("segment referred by", lambda: broadcast_service.get_recipient_chunk(
+            after_id=1, segment={"type": broadcast_service.SEGMENT_REFERRED_BY, "referrer_id": 1}), ()),
+        ("segment registered", lambda: broadcast_service.count_recipients(
+            segment={"type": broadcast_service.SEGMENT_REGISTERED, "date_from": "2025-01-01", "date_to": "2025-01-31"}), ()),
+        # Выгрузки: первая порция пользователей - начало обхода по первичному ключу
+        ("export users", lambda: consume(export_service.iter_user_rows(chunk_size=1)), ("users",)),
+        ("export orders", lambda: consume(export_service.iter_order_rows(date(2025, 1, 1), date(2025, 1, 31), chunk_size=1)), ()),
+        ("count order items", lambda: export_service.count_order_items(date(2025, 1, 1), date(2025, 1, 31)), ()),
+    ]
+
+def fill_database(engine):
+    """Несколько строк, чтобы сервисы прошли все ветки (курсоры, соединения с товарами)"""
+    with engine.begin() as connection:
+        connection.execute(User.__table__.insert(), [
+            {"id": i, "username": f"user{i}", "full_name": f"User {i}", "name_initial": "U",
+             "is_blocked": False, "is_exception": False, "is_reachable": True, "created_at": datetime(2025, 1, i)}
+            for i in (1, 2)
+        ])
+        connection.execute(Referral.__table__.insert(), [{"user_id": 2, "referred_by": 1}])
+        connection.execute(Product.__table__.insert(), [
+            {"id": i, "name": f"prod {i}", "price": 10, "category": "cat", "active": True} for i in (1, 2)
+        ])
+        connection.execute(ProductInventory.__table__.insert(), [{"product_id": i, "stock": 5, "reserved": 0} for i in (1, 2)])
+        connection.execute(CartItem.__table__.insert(), [{"user_id": 1, "product_id": 1, "quantity": 1}])
+        connection.execute(Order.__table__.insert(), [
+            {"id": 1, "user_id": 1, "total_amount": 10, "status": "paid", "created_at": datetime(2025, 1, 2)}
+        ])
+        connection.execute(OrderItem.__table__.insert(), [{"order_id": 1, "product_id": 1, "quantity": 1, "price": 10}])
+        connection.execute(StockReservation.__table__.insert(), [
+            {"payment_id": "pay-1", "user_id": 1, "product_id": 1, "quantity": 1, "expires_at": datetime(2030, 1, 1)}
+        ])
+
+def explain(engine, statement, parameters):
+    """Строки плана (detail) для запроса с теми же параметрами"""
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        return [row[3] for row in cursor.fetchall()]
+    finally:
+        raw.close()
+
+def full_scans(plan, tables, allowed):
+    """Таблицы из схемы, которые план читает целиком"""
+    scanned = []
+    for line in plan:
+        match = _FULL_SCAN_RE.match(line)
+        if match and match.group(1) in tables and match.group(1) not in allowed:
+            scanned.append(match.group(1))
+    return scanned
+
+def main(verbose=False):
+    from services.user_search_service import create_user_search_index
+    from services.product_search_service import create_product_search_index
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'plans.db')}")
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            create_user_search_index(connection)
+            create_product_search_index(connection)
+        fill_database(engine)
+        database.SessionLocal.configure(bind=engine)
+
+        captured = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT") and not executemany:
+                captured.append((statement, parameters))
+
+        tables = set(Base.metadata.tables)
+        failures = 0
+        for name, func, allowed in build_cases():
+            captured.clear()
+            func()
+            if not captured:
+                print(f"?    {name}: сервис не выполнил ни одного запроса")
+                failures += 1
+                continue
+
+            for statement, parameters in list(captured):
+                plan = explain(engine, statement, parameters)
+                scanned = full_scans(plan, tables, allowed)
+                if scanned:
+                    failures += 1
+                    print(f"FAIL {name}: полный просмотр {', '.join(sorted(set(scanned)))}")
+                    print("     " + " ".join(statement.split()))
+                    for line in plan:
+                        print(f"       {line}")
+                elif verbose:
+                    print(f"ok   {name}: {' | '.join(plan)}")
+
+        engine.dispose()
+
+    if failures:
+        print(f"\nЗапросов с полным просмотром таблицы: {failures}")
+        return 1
+    print("Все запросы сервисов используют индексы")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(verbose="-v" in sys.argv[1:]))
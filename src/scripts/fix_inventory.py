@@ -8,6 +8,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from services.database import get_database_session, Product, ProductInventory
 from utils.logger import setup_logger
+from utils.progress import ProgressReporter
 
 logger = setup_logger('scripts.fix_inventory')
 
@@ -23,8 +24,15 @@ def fix_inventory():
         print(f"Найдено товаров: {len(products)}")
         print("=" * 50)
         
+        reporter = ProgressReporter(len(products), title="Проверка запасов")
+        
         # Проверяем каждый товар
-        for product in products:
+        for checked, product in enumerate(products):
+            progress_text = reporter.poll(checked)
+            if progress_text:
+                print(progress_text)
+                print("-" * 50)
+            
             # Проверяем запись в инвентаре
             inventory = session.query(ProductInventory).filter(
                 ProductInventory.product_id == product.id
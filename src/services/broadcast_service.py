@@ -0,0 +1,237 @@
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import and_, exists, func, select
+from .database import session_scope, User, Order, Referral, BroadcastJob, BroadcastDelivery
+
+# Статусы задания рассылки
+JOB_RUNNING = "running"
+JOB_PAUSED = "paused"
+JOB_CANCELLED = "cancelled"
+JOB_COMPLETED = "completed"
+
+# Сегменты получателей. Сегмент - словарь {"type": ..., параметры}, None - все пользователи
+SEGMENT_ALL = "all"
+SEGMENT_WITH_ORDERS = "with_orders"
+SEGMENT_REFERRED_BY = "referred_by"  # {"referrer_id": int}
+SEGMENT_REGISTERED = "registered"  # {"date_from": "YYYY-MM-DD", "date_to": "YYYY-MM-DD"}, границы включительно
+SEGMENT_EXCEPTIONS = "exceptions"
+
+def segment_criteria(segment):
+    """
+    Условия SQL для сегмента. Каждое опирается на индекс:
+    orders.user_id, referrals.user_id/referred_by, users.created_at
+    
+    Raises:
+        ValueError: Неизвестный тип сегмента
+    """
+    segment_type = (segment or {}).get("type", SEGMENT_ALL)
+    if segment_type == SEGMENT_ALL:
+        return []
+    # IN (подзапрос) вместо коррелированного EXISTS: SQLite берет ID из индекса
+    # orders/referrals и ищет пользователей по первичному ключу, а не сканирует users
+    if segment_type == SEGMENT_WITH_ORDERS:
+        return [User.id.in_(select(Order.user_id))]
+    if segment_type == SEGMENT_REFERRED_BY:
+        return [User.id.in_(
+            select(Referral.user_id).where(Referral.referred_by == int(segment["referrer_id"]))
+        )]
+    if segment_type == SEGMENT_REGISTERED:
+        criteria = []
+        if segment.get("date_from"):
+            criteria.append(User.created_at >= datetime.fromisoformat(segment["date_from"]))
+        if segment.get("date_to"):
+            criteria.append(User.created_at < datetime.fromisoformat(segment["date_to"]) + timedelta(days=1))
+        return criteria
+    if segment_type == SEGMENT_EXCEPTIONS:
+        return [User.is_exception == True]
+    raise ValueError(f"Unknown broadcast segment: {segment_type}")
+
+def describe_segment(segment):
+    """Описание сегмента для администратора"""
+    segment_type = (segment or {}).get("type", SEGMENT_ALL)
+    if segment_type == SEGMENT_WITH_ORDERS:
+        return "пользователи с заказами"
+    if segment_type == SEGMENT_REFERRED_BY:
+        return f"приглашённые пользователем {segment['referrer_id']}"
+    if segment_type == SEGMENT_REGISTERED:
+        date_from = datetime.fromisoformat(segment["date_from"]).strftime("%d.%m.%Y") if segment.get("date_from") else "…"
+        date_to = datetime.fromisoformat(segment["date_to"]).strftime("%d.%m.%Y") if segment.get("date_to") else "…"
+        return f"зарегистрированные {date_from}–{date_to}"
+    if segment_type == SEGMENT_EXCEPTIONS:
+        return "пользователи-исключения"
+    return "все пользователи"
+
+def _recipients_query(session, include_unreachable=False, segment=None):
+    query = session.query(User.id).filter(User.is_blocked == False, *segment_criteria(segment))
+    if not include_unreachable:
+        query = query.filter(User.is_reachable == True)
+    return query
+
+def get_recipient_chunk(after_id=None, limit=500, job_id=None, include_unreachable=False, segment=None):
+    """
+    Следующая порция получателей рассылки по возрастанию ID (keyset, без OFFSET)
+    
+    Args:
+        after_id: ID последнего получателя предыдущей порции
+        limit: Размер порции
+        job_id: Если указан, пропускаются пользователи, которым это задание уже доставлено
+        include_unreachable: Включать пользователей, до которых бот не смог достучаться
+        segment: Сегмент получателей (см. segment_criteria)
+    
+    Returns:
+        list: ID пользователей
+    """
+    with session_scope() as session:
+        query = _recipients_query(session, include_unreachable, segment)
+        if after_id is not None:
+            query = query.filter(User.id > after_id)
+        if job_id is not None:
+            query = query.filter(~exists().where(and_(
+                BroadcastDelivery.job_id == job_id,
+                BroadcastDelivery.user_id == User.id
+            )))
+        return [user_id for (user_id,) in query.order_by(User.id).limit(limit).all()]
+
+def count_recipients(include_unreachable=False, segment=None):
+    """Количество получателей рассылки (незаблокированные и доступные пользователи сегмента) одним COUNT"""
+    with session_scope() as session:
+        query = _recipients_query(session, include_unreachable, segment)
+        return query.with_entities(func.count(User.id)).scalar()
+
+def mark_users_unreachable(session, user_ids):
+    """Помечает пользователей недоступными одним UPDATE на порцию ID"""
+    if not user_ids:
+        return 0
+    return session.query(User).filter(User.id.in_(user_ids), User.is_reachable == True).update(
+        {User.is_reachable: False, User.unreachable_since: datetime.now()},
+        synchronize_session=False
+    )
+
+def _job_to_dict(job):
+    return {
+        "id": job.id,
+        "text": job.text,
+        "content_type": job.content_type or "text",
+        "source_chat_id": job.source_chat_id,
+        "source_message_id": job.source_message_id,
+        "media": json.loads(job.media) if job.media else None,
+        "segment": json.loads(job.segment) if job.segment else None,
+        "status": job.status,
+        "cursor": job.cursor,
+        "total": job.total or 0,
+        "sent": job.sent or 0,
+        "failed": job.failed or 0,
+        "unreachable": job.unreachable or 0,
+        "created_by": job.created_by,
+        "status_chat_id": job.status_chat_id,
+        "status_message_id": job.status_message_id,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at
+    }
+
+def create_broadcast_job(text, created_by, total, content_type="text",
+                         source_chat_id=None, source_message_id=None, media=None, segment=None):
+    """
+    Создает задание рассылки в статусе running и возвращает его ID.
+    Хранится только ссылка на исходное сообщение (или file_id альбома), а не сам контент
+    
+    Args:
+        text: Текст или подпись сообщения
+        created_by: ID администратора
+        total: Число получателей на момент создания
+        content_type: Тип исходного сообщения (text, photo, video, document, media_group...)
+        source_chat_id: Чат исходного сообщения для copy_message
+        source_message_id: ID исходного сообщения
+        media: Список элементов альбома для send_media_group
+        segment: Сегмент получателей, None - все пользователи
+    """
+    with session_scope() as session:
+        job = BroadcastJob(
+            text=text,
+            content_type=content_type,
+            source_chat_id=source_chat_id,
+            source_message_id=source_message_id,
+            media=json.dumps(media, ensure_ascii=False) if media else None,
+            segment=json.dumps(segment, ensure_ascii=False) if segment else None,
+            created_by=created_by,
+            total=total,
+            status=JOB_RUNNING
+        )
+        session.add(job)
+        session.flush()
+        return job.id
+
+def get_broadcast_job(job_id):
+    """Задание рассылки в виде словаря или None"""
+    with session_scope() as session:
+        job = session.query(BroadcastJob).get(job_id)
+        return _job_to_dict(job) if job else None
+
+def get_broadcast_jobs(status=None, limit=10):
+    """Последние задания рассылки, при необходимости только с указанным статусом"""
+    with session_scope() as session:
+        query = session.query(BroadcastJob)
+        if status is not None:
+            query = query.filter(BroadcastJob.status == status)
+        return [_job_to_dict(job) for job in query.order_by(BroadcastJob.id.desc()).limit(limit).all()]
+
+def set_broadcast_job_status(job_id, status, expected=None):
+    """
+    Меняет статус задания
+    
+    Args:
+        job_id: ID задания
+        status: Новый статус
+        expected: Если указан, статус меняется только из этих статусов
+    
+    Returns:
+        bool: True, если статус изменен
+    """
+    with session_scope() as session:
+        query = session.query(BroadcastJob).filter(BroadcastJob.id == job_id)
+        if expected:
+            query = query.filter(BroadcastJob.status.in_(expected))
+        values = {"status": status, "updated_at": datetime.now()}
+        if status in (JOB_CANCELLED, JOB_COMPLETED):
+            values["finished_at"] = datetime.now()
+        return query.update(values, synchronize_session=False) > 0
+
+def set_broadcast_job_message(job_id, chat_id, message_id):
+    """Запоминает сообщение администратора, в котором показывается прогресс"""
+    with session_scope() as session:
+        session.query(BroadcastJob).filter(BroadcastJob.id == job_id).update(
+            {"status_chat_id": chat_id, "status_message_id": message_id},
+            synchronize_session=False
+        )
+
+def save_broadcast_progress(job_id, deliveries, cursor=None):
+    """
+    Записывает порцию результатов доставки одной вставкой и сдвигает курсор задания.
+    Недоступные получатели в той же транзакции помечаются у User и пропускаются следующими рассылками
+    
+    Args:
+        job_id: ID задания
+        deliveries: Список пар (user_id, status)
+        cursor: Новый курсор - все получатели с ID не больше него обработаны
+    """
+    with session_scope() as session:
+        if deliveries:
+            now = datetime.now()
+            session.execute(BroadcastDelivery.__table__.insert(), [
+                {"job_id": job_id, "user_id": user_id, "status": status, "created_at": now}
+                for user_id, status in deliveries
+            ])
+            mark_users_unreachable(session, [user_id for user_id, status in deliveries if status == "unreachable"])
+        
+        values = {BroadcastJob.updated_at: datetime.now()}
+        if deliveries:
+            sent = sum(1 for _, status in deliveries if status == "sent")
+            unreachable = sum(1 for _, status in deliveries if status == "unreachable")
+            values.update({
+                BroadcastJob.sent: BroadcastJob.sent + sent,
+                BroadcastJob.failed: BroadcastJob.failed + len(deliveries) - sent,
+                BroadcastJob.unreachable: BroadcastJob.unreachable + unreachable
+            })
+        if cursor is not None:
+            values[BroadcastJob.cursor] = cursor
+        session.query(BroadcastJob).filter(BroadcastJob.id == job_id).update(values, synchronize_session=False)
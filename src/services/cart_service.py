@@ -0,0 +1,174 @@
+from sqlalchemy import func, select
+from services.database import session_scope, CartItem, Product, StockReservation
+from services.product_service import stock_expression
+from utils.logger import setup_logger
+
+# Настройка логгера
+logger = setup_logger('services.cart')
+
+def _own_reserved_expression(user_id):
+    """
+    Сколько товара строки корзины зарезервировано счетами самого покупателя.
+    Резерв уже вычтен из свободного остатка, но покупателю он доступен: открытая
+    во время оплаты корзина не должна урезать позицию, за которую он платит
+    """
+    return select(func.coalesce(func.sum(StockReservation.quantity), 0)).where(
+        StockReservation.user_id == user_id,
+        StockReservation.product_id == CartItem.product_id
+    ).correlate(CartItem).scalar_subquery()
+
+def _available_for_user(user_id):
+    """Свободный остаток товара плюс собственный резерв покупателя"""
+    return stock_expression() + _own_reserved_expression(user_id)
+
+def _cart_rows(session, user_id):
+    """
+    Строки корзины вместе с товаром и доступным покупателю остатком одним запросом.
+    Для удаленных товаров Product равен None
+    """
+    return session.query(CartItem, Product, _available_for_user(user_id)).outerjoin(
+        Product, Product.id == CartItem.product_id
+    ).filter(
+        CartItem.user_id == user_id
+    ).order_by(CartItem.id).all()
+
+def get_cart_snapshot(user_id):
+    """
+    Загружает корзину пользователя одним запросом, корректирует количество
+    по остаткам и удаляет недоступные товары в той же транзакции
+
+    Args:
+        user_id: ID пользователя
+
+    Returns:
+        dict: {"lines": [...], "removed": int} - строки корзины и число удаленных позиций
+    """
+    lines = []
+    removed = 0
+
+    with session_scope() as session:
+        for item, product, stock in _cart_rows(session, user_id):
+            # Товар удален, скрыт или закончился на складе
+            if product is None or not product.active or stock <= 0:
+                session.delete(item)
+                removed += 1
+                continue
+
+            # Корректируем количество, если оно превышает доступное
+            actual_quantity = min(item.quantity, stock)
+            if actual_quantity != item.quantity:
+                item.quantity = actual_quantity
+
+            lines.append({
+                "product_id": product.id,
+                "name": product.name,
+                "price": product.price,
+                "quantity": actual_quantity
+            })
+
+    return {"lines": lines, "removed": removed}
+
+def load_checkout_items(session, user_id):
+    """
+    Товары корзины с ценами и названиями для оформления заказа в транзакции вызывающего кода.
+    Удаленные и скрытые товары пропускаются - их нельзя купить, а нехватку
+    остатка проверяет списание в place_order
+    """
+    return [{
+        "product_id": item.product_id,
+        "quantity": item.quantity,
+        "price": product.price,
+        "name": product.name
+    } for item, product, stock in _cart_rows(session, user_id)
+        if product is not None and product.active]
+
+def get_checkout_items(user_id):
+    """Возвращает товары корзины с ценами и названиями для оформления заказа"""
+    with session_scope() as session:
+        return load_checkout_items(session, user_id)
+
+def add_to_cart(user_id, product_id, quantity, available_stock):
+    """
+    Добавляет товар в корзину, не превышая доступный остаток
+
+    Returns:
+        tuple: (успех, количество товара в корзине до добавления)
+    """
+    with session_scope() as session:
+        cart_item = session.query(CartItem).filter(
+            CartItem.user_id == user_id,
+            CartItem.product_id == int(product_id)
+        ).first()
+
+        if cart_item:
+            if cart_item.quantity + quantity > available_stock:
+                return False, cart_item.quantity
+
+            previous_quantity = cart_item.quantity
+            cart_item.quantity += quantity
+            return True, previous_quantity
+
+        session.add(CartItem(user_id=user_id, product_id=int(product_id), quantity=quantity))
+        return True, 0
+
+def add_one_to_cart(user_id, product_id):
+    """
+    Увеличивает количество товара в корзине на 1, сверяясь с остатком в том же запросе
+
+    Returns:
+        tuple: ("added", "limit" или "missing"; доступный остаток)
+    """
+    with session_scope() as session:
+        row = session.query(CartItem, _available_for_user(user_id)).outerjoin(
+            Product, Product.id == CartItem.product_id
+        ).filter(
+            CartItem.user_id == user_id,
+            CartItem.product_id == int(product_id)
+        ).first()
+
+        if not row:
+            return "missing", 0
+
+        cart_item, available_stock = row
+        if cart_item.quantity >= available_stock:
+            return "limit", available_stock
+
+        cart_item.quantity += 1
+        return "added", available_stock
+
+def remove_one_from_cart(user_id, product_id):
+    """
+    Уменьшает количество товара в корзине на 1, удаляя позицию при нуле
+
+    Returns:
+        str: "decreased", "removed" или "missing"
+    """
+    with session_scope() as session:
+        cart_item = session.query(CartItem).filter(
+            CartItem.user_id == user_id,
+            CartItem.product_id == int(product_id)
+        ).first()
+
+        if not cart_item:
+            return "missing"
+
+        if cart_item.quantity > 1:
+            cart_item.quantity -= 1
+            return "decreased"
+
+        session.delete(cart_item)
+        return "removed"
+
+def remove_from_cart(user_id, product_id):
+    """Удаляет позицию товара из корзины. Возвращает True, если позиция была"""
+    with session_scope() as session:
+        deleted = session.query(CartItem).filter(
+            CartItem.user_id == user_id,
+            CartItem.product_id == int(product_id)
+        ).delete()
+        return deleted > 0
+
+def clear_cart(user_id):
+    """Удаляет все товары из корзины пользователя"""
+    with session_scope() as session:
+        session.query(CartItem).filter(CartItem.user_id == user_id).delete()
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+from .database import session_scope, ChannelMember
+
+# Статусы, при которых пользователь считается подписанным
+MEMBER_STATUSES = ('member', 'administrator', 'creator')
+
+def is_member_status(status):
+    """Проверяет, означает ли статус chat_member подписку на канал"""
+    return status in MEMBER_STATUSES
+
+def save_member_status(user_id, channel_id, status):
+    """Создает или обновляет статус пользователя в канале"""
+    with session_scope() as session:
+        member = session.query(ChannelMember).filter(
+            ChannelMember.user_id == user_id,
+            ChannelMember.channel_id == str(channel_id)
+        ).first()
+        
+        if member:
+            member.status = status
+            member.updated_at = datetime.now()
+        else:
+            session.add(ChannelMember(
+                user_id=user_id,
+                channel_id=str(channel_id),
+                status=status,
+                updated_at=datetime.now()
+            ))
+
+def get_member_statuses(user_id, channel_ids, max_age=None):
+    """
+    Возвращает известные статусы пользователя в указанных каналах одним запросом
+    
+    Args:
+        user_id: ID пользователя
+        channel_ids: Список Telegram ID каналов
+        max_age: Максимальный возраст записи в секундах (None - без ограничения)
+    
+    Returns:
+        dict: {channel_id: status} только для найденных записей
+    """
+    if not channel_ids:
+        return {}
+    
+    with session_scope() as session:
+        query = session.query(ChannelMember.channel_id, ChannelMember.status).filter(
+            ChannelMember.user_id == user_id,
+            ChannelMember.channel_id.in_([str(channel_id) for channel_id in channel_ids])
+        )
+        if max_age is not None:
+            query = query.filter(ChannelMember.updated_at >= datetime.now() - timedelta(seconds=max_age))
+        
+        return {channel_id: status for channel_id, status in query.all()}
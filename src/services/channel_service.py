@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
-from .database import Channel, get_database_session
+from .database import Channel, ChannelMember, get_database_session
+from utils.subscription_cache import invalidate_channel
 from typing import List, Optional
 
 class ChannelService:
@@ -21,6 +22,7 @@ class ChannelService:
         )
         self.session.add(new_channel)
         self.session.commit()
+        invalidate_channel(channel_id)
         return new_channel
     
     def get_channel_by_id(self, channel_id: str) -> Optional[Channel]:
@@ -35,6 +37,10 @@ class ChannelService:
         """Get all channels"""
         return self.session.query(Channel).all()
     
+    def get_all_channel_ids(self) -> List[str]:
+        """Get Telegram IDs of all channels"""
+        return [channel_id for (channel_id,) in self.session.query(Channel.channel_id).all()]
+    
     def get_enabled_channels(self) -> List[Channel]:
         """Get only enabled channels"""
         return self.session.query(Channel).filter(Channel.is_enabled == True).all()
@@ -45,6 +51,7 @@ class ChannelService:
         if channel:
             channel.is_enabled = not channel.is_enabled
             self.session.commit()
+            invalidate_channel(channel.channel_id)
         return channel
     
     def toggle_channel_by_id(self, db_id: int) -> Optional[Channel]:
@@ -53,14 +60,19 @@ class ChannelService:
         if channel:
             channel.is_enabled = not channel.is_enabled
             self.session.commit()
+            invalidate_channel(channel.channel_id)
         return channel
     
     def delete_channel(self, channel_id: str) -> bool:
         """Delete a channel from the database"""
         channel = self.get_channel_by_id(channel_id)
         if channel:
+            channel_id = channel.channel_id
             self.session.delete(channel)
+            # Сохраненные статусы подписки для канала больше не нужны
+            self.session.query(ChannelMember).filter(ChannelMember.channel_id == channel_id).delete()
             self.session.commit()
+            invalidate_channel(channel_id)
             return True
         return False
     
@@ -68,8 +80,12 @@ class ChannelService:
         """Delete a channel using its database ID"""
         channel = self.get_channel_by_id_db(db_id)
         if channel:
+            channel_id = channel.channel_id
             self.session.delete(channel)
+            # Сохраненные статусы подписки для канала больше не нужны
+            self.session.query(ChannelMember).filter(ChannelMember.channel_id == channel_id).delete()
             self.session.commit()
+            invalidate_channel(channel_id)
             return True
         return False
     
@@ -1,15 +1,44 @@
-from sqlalchemy import create_engine, Column, Integer, String, Sequence, Boolean, DateTime, BigInteger, func, UniqueConstraint, Float, ForeignKey, Text
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, Column, Integer, String, Sequence, Boolean, DateTime, BigInteger, func, UniqueConstraint, Float, ForeignKey, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
 
 # Глобальная переменная для соединения с базой данных
 DATABASE_URL = "sqlite:///database.db"  # Измените, если используете другую БД
-engine = create_engine(DATABASE_URL)
+
+# Количество потоков, в которых выполняются запросы к БД из асинхронного кода
+DB_EXECUTOR_WORKERS = 4
+
+# Сколько секунд SQLite ждет освобождения блокировки записи
+SQLITE_BUSY_TIMEOUT = 15
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Соединения SQLite создаются в потоках пула, поэтому отключаем проверку потока
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT} if IS_SQLITE else {}
+)
+
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL позволяет читать базу параллельно с записью из других потоков"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
 
 # Создаем фабрику сессий
 SessionLocal = sessionmaker(bind=engine)
 
+# Пул потоков для блокирующих запросов к БД, вызываемых из обработчиков
+_db_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+
 Base = declarative_base()
 
 class User(Base):
@@ -19,13 +48,30 @@ class User(Base):
     full_name = Column(String(100), nullable=False)
     is_blocked = Column(Boolean, default=False)
     is_exception = Column(Boolean, default=False)  # New field for user exceptions
-    created_at = Column(DateTime, default=datetime.now)
+    is_reachable = Column(Boolean, nullable=False, default=True, server_default='1')  # False, если бот заблокирован или аккаунт удален
+    unreachable_since = Column(DateTime, nullable=True)
+    name_initial = Column(String(1), nullable=True)  # Первая буква full_name в верхнем регистре, обновляется автоматически
+    created_at = Column(DateTime, default=datetime.now, index=True)
+    
+    __table_args__ = (
+        # Алфавитный список пользователей: буквы через GROUP BY и keyset по (name_initial, full_name, id)
+        Index('ix_users_initial_name_id', 'name_initial', 'full_name', 'id'),
+    )
+
+def get_name_initial(full_name):
+    """Первая буква имени в верхнем регистре (str.upper, в отличие от upper() в SQLite, понимает кириллицу)"""
+    return full_name[0].upper() if full_name else None
+
+@event.listens_for(User.full_name, 'set')
+def _sync_name_initial(target, value, oldvalue, initiator):
+    """Держит name_initial в актуальном состоянии при регистрации и смене имени"""
+    target.name_initial = get_name_initial(value)
 
 class Referral(Base):
     __tablename__ = 'referrals'
     id = Column(Integer, Sequence('referral_id_seq'), primary_key=True)
-    user_id = Column(Integer, nullable=False)
-    referred_by = Column(Integer, nullable=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    referred_by = Column(Integer, nullable=True, index=True)
     created_at = Column(DateTime, default=datetime.now)
 
 class Channel(Base):
@@ -36,12 +82,64 @@ class Channel(Base):
     is_enabled = Column(Boolean, default=True)  # New field to control if subscription is required
     added_at = Column(DateTime, default=datetime.now)
 
+class ChannelMember(Base):
+    """Статус пользователя в канале, обновляемый из событий chat_member"""
+    __tablename__ = 'channel_members'
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(BigInteger, nullable=False)
+    channel_id = Column(String(100), nullable=False)
+    status = Column(String(20), nullable=False)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    __table_args__ = (
+        UniqueConstraint('user_id', 'channel_id', name='uq_channel_member'),
+    )
+
+class BroadcastJob(Base):
+    """Рассылка, которую можно приостановить и продолжить после перезапуска бота"""
+    __tablename__ = 'broadcast_jobs'
+    
+    id = Column(Integer, primary_key=True)
+    text = Column(Text, nullable=False)  # Текст или подпись (для списка рассылок и старых текстовых заданий)
+    content_type = Column(String(20), nullable=False, default="text", server_default="text")
+    source_chat_id = Column(BigInteger, nullable=True)  # Исходное сообщение администратора для copy_message
+    source_message_id = Column(Integer, nullable=True)
+    media = Column(Text, nullable=True)  # JSON альбома: [{"type", "media" (file_id), "caption"}]
+    segment = Column(Text, nullable=True)  # JSON сегмента получателей, None - все пользователи
+    status = Column(String(20), nullable=False, default="running", index=True)  # running, paused, cancelled, completed
+    cursor = Column(BigInteger, nullable=True)  # ID последнего получателя, до которого рассылка подтверждена
+    total = Column(Integer, default=0)
+    sent = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    unreachable = Column(Integer, default=0)
+    created_by = Column(BigInteger, nullable=True)
+    status_chat_id = Column(BigInteger, nullable=True)  # Сообщение с прогрессом у администратора
+    status_message_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    finished_at = Column(DateTime, nullable=True)
+
+class BroadcastDelivery(Base):
+    """Результат доставки рассылки одному пользователю"""
+    __tablename__ = 'broadcast_deliveries'
+    
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey('broadcast_jobs.id'), nullable=False)
+    user_id = Column(BigInteger, nullable=False)
+    status = Column(String(20), nullable=False)  # sent, failed, unreachable
+    created_at = Column(DateTime, default=datetime.now)
+    
+    __table_args__ = (
+        UniqueConstraint('job_id', 'user_id', name='uq_broadcast_delivery'),
+    )
+
 class CartItem(Base):
     __tablename__ = 'cart_items'
     
     id = Column(Integer, primary_key=True)
     user_id = Column(BigInteger, nullable=False)
-    product_id = Column(String, nullable=False)
+    product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
     quantity = Column(Integer, default=1)
     created_at = Column(DateTime, default=func.now())
     
@@ -54,7 +152,7 @@ class ProductInventory(Base):
     __tablename__ = 'product_inventory'
     
     id = Column(Integer, primary_key=True)
-    product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
+    product_id = Column(Integer, ForeignKey('products.id'), nullable=False, index=True)
     stock = Column(Integer, default=0)
     reserved = Column(Integer, default=0)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -62,6 +160,23 @@ class ProductInventory(Base):
     # Связь с товаром
     product = relationship("Product", back_populates="inventory")
 
+class StockReservation(Base):
+    """Резерв товара на время оплаты счета; суммы резервов хранятся в product_inventory.reserved"""
+    __tablename__ = 'stock_reservations'
+    
+    id = Column(Integer, primary_key=True)
+    payment_id = Column(String(64), nullable=False, index=True)
+    user_id = Column(BigInteger, nullable=False)
+    product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=func.now())
+    
+    # Собственные резервы покупателя по товару корзины возвращаются в доступный ему остаток
+    __table_args__ = (
+        Index('ix_stock_reservations_user_id_product_id', 'user_id', 'product_id'),
+    )
+
 class Product(Base):
     """Модель товара"""
     __tablename__ = 'products'
@@ -78,6 +193,12 @@ class Product(Base):
     
     # Связь с инвентарем
     inventory = relationship("ProductInventory", uselist=False, back_populates="product", cascade="all, delete-orphan")
+    
+    # Постраничный вывод витрины идет по (name, id) среди активных товаров, в том числе внутри категории
+    __table_args__ = (
+        Index('ix_products_active_name_id', 'active', 'name', 'id'),
+        Index('ix_products_active_category_name_id', 'active', 'category', 'name', 'id'),
+    )
 
 class Order(Base):
     __tablename__ = 'orders'
@@ -89,22 +210,30 @@ class Order(Base):
     payment_id = Column(String, nullable=True)
     shipping_address = Column(String, nullable=True)
     status = Column(String, default="new")
-    created_at = Column(DateTime, default=func.now())
+    created_at = Column(DateTime, default=func.now(), index=True)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Определяем отношение с явным условием соединения
     user = relationship('User', foreign_keys=[user_id], backref="orders")
     items = relationship('OrderItem', backref='order', cascade="all, delete-orphan")
+    
+    # Заказы пользователя выбираются по user_id и сортируются по дате - индекс покрывает и фильтр, и сортировку
+    __table_args__ = (
+        Index('ix_orders_user_id_created_at', 'user_id', 'created_at'),
+    )
 
 class OrderItem(Base):
     __tablename__ = 'order_items'
     
     id = Column(Integer, primary_key=True)
-    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False)
-    product_id = Column(String, nullable=False)
+    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
     quantity = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)
     created_at = Column(DateTime, default=func.now())
+    
+    # Товар позиции (в том числе скрытый); у удаленного товара - None
+    product = relationship('Product')
 
 def get_database_session():
     """
@@ -119,6 +248,43 @@ def create_tables():
     """
     Base.metadata.create_all(engine)
 
+@contextmanager
+def session_scope():
+    """
+    Открывает сессию, фиксирует транзакцию при успехе и откатывает при ошибке.
+    Объекты остаются доступными после закрытия сессии (expire_on_commit=False)
+    """
+    session = SessionLocal(expire_on_commit=False)
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+async def run_db(func, *args, **kwargs):
+    """
+    Выполняет блокирующую функцию работы с БД в пуле потоков,
+    не останавливая обработку остальных обновлений
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, functools.partial(func, *args, **kwargs))
+
+async def run_in_session(func, *args, **kwargs):
+    """
+    Выполняет func(session, *args, **kwargs) в пуле потоков внутри session_scope()
+    """
+    def _call():
+        with session_scope() as session:
+            return func(session, *args, **kwargs)
+    return await run_db(_call)
+
+def shutdown_db_executor():
+    """Дожидается завершения запросов и останавливает пул потоков БД"""
+    _db_executor.shutdown(wait=True)
+
 # Добавляем класс SessionManager для работы с контекстным менеджером
 class SessionManager:
     def __init__(self):
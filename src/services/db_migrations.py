@@ -1,5 +1,5 @@
-from sqlalchemy import inspect, text
-from .database import engine, Base, Product, ProductInventory
+from sqlalchemy import inspect, text, Integer
+from .database import engine, Base, Product, ProductInventory, User, Order, OrderItem, Referral, StockReservation, get_name_initial
 
 def check_table_exists(table_name):
     """Проверяет, существует ли таблица в базе данных"""
@@ -22,8 +22,101 @@ def run_migrations():
             with connection.begin():
                 ProductInventory.__table__.create(engine)
     
+    # Флаг доступности пользователя для рассылок
+    user_columns = {column['name'] for column in inspect(engine).get_columns('users')}
+    with engine.begin() as connection:
+        if 'is_reachable' not in user_columns:
+            print("Добавление колонки users.is_reachable...")
+            connection.execute(text("ALTER TABLE users ADD COLUMN is_reachable BOOLEAN NOT NULL DEFAULT 1"))
+        if 'unreachable_since' not in user_columns:
+            connection.execute(text("ALTER TABLE users ADD COLUMN unreachable_since DATETIME"))
+        if 'name_initial' not in user_columns:
+            print("Добавление колонки users.name_initial...")
+            connection.execute(text("ALTER TABLE users ADD COLUMN name_initial VARCHAR(1)"))
+            backfill_name_initials(connection)
+    
+    # Полнотекстовые индексы поиска пользователей и товаров (create_all виртуальные таблицы не создает)
+    if engine.dialect.name == 'sqlite':
+        from .user_search_service import create_user_search_index
+        from .product_search_service import create_product_search_index
+        for table_name, create_index in (('users_fts', create_user_search_index),
+                                         ('products_fts', create_product_search_index)):
+            if not check_table_exists(table_name):
+                print(f"Создание индекса {table_name}...")
+                with engine.begin() as connection:
+                    create_index(connection)
+    
+    # Индексы каталога, сегментов рассылки, выгрузок и резервов для уже существующих таблиц
+    for table in (Product.__table__, ProductInventory.__table__, User.__table__,
+                  Order.__table__, OrderItem.__table__, Referral.__table__, StockReservation.__table__):
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    
+    # Заменен составным ix_orders_user_id_created_at
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX IF EXISTS ix_orders_user_id"))
+    
+    convert_product_id_columns()
+    
+    # Остаток читается без побочных эффектов, поэтому у каждого товара должна быть строка инвентаря
+    with engine.begin() as connection:
+        created = connection.execute(text(
+            "INSERT INTO product_inventory (product_id, stock, reserved, updated_at) "
+            "SELECT products.id, 0, 0, CURRENT_TIMESTAMP FROM products "
+            "WHERE NOT EXISTS (SELECT 1 FROM product_inventory WHERE product_inventory.product_id = products.id)"
+        )).rowcount
+        if created:
+            print(f"Добавлены строки инвентаря для товаров без остатка: {created}")
+    
     print("Миграции успешно выполнены.")
 
+def convert_product_id_columns():
+    """
+    Переводит cart_items.product_id и order_items.product_id из строки в целочисленный
+    внешний ключ на products.id (то же, что миграция a8d0f2b4c6e1, для баз без Alembic)
+    """
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+    
+    inspector = inspect(engine)
+    for table_name in ('cart_items', 'order_items'):
+        if not check_table_exists(table_name):
+            continue
+        column = next(column for column in inspector.get_columns(table_name) if column['name'] == 'product_id')
+        if isinstance(column['type'], Integer):
+            continue
+        
+        print(f"Перевод {table_name}.product_id в целое число...")
+        with engine.begin() as connection:
+            if table_name == 'cart_items':
+                # Позиции с нечисловым ID и дубли после приведения в корзине не нужны
+                connection.execute(text("DELETE FROM cart_items WHERE product_id = '' OR product_id GLOB '*[^0-9]*'"))
+                connection.execute(text(
+                    "DELETE FROM cart_items WHERE id NOT IN ("
+                    "SELECT MAX(id) FROM cart_items GROUP BY user_id, CAST(product_id AS INTEGER))"
+                ))
+            # batch-режим пересоздает таблицу и копирует строки с CAST(product_id AS INTEGER)
+            operations = Operations(MigrationContext.configure(connection))
+            with operations.batch_alter_table(table_name, recreate='always') as batch_op:
+                batch_op.alter_column('product_id', existing_type=column['type'], type_=Integer(), existing_nullable=False)
+                batch_op.create_foreign_key(f'fk_{table_name}_product_id_products', 'products', ['product_id'], ['id'])
+
+def backfill_name_initials(connection, batch_size=5000):
+    """Заполняет users.name_initial порциями (upper() в SQLite не понимает кириллицу)"""
+    after_id = 0
+    while True:
+        rows = connection.execute(
+            text("SELECT id, full_name FROM users WHERE id > :after_id ORDER BY id LIMIT :limit"),
+            {"after_id": after_id, "limit": batch_size}
+        ).fetchall()
+        if not rows:
+            return
+        connection.execute(
+            text("UPDATE users SET name_initial = :initial WHERE id = :user_id"),
+            [{"user_id": user_id, "initial": get_name_initial(full_name)} for user_id, full_name in rows]
+        )
+        after_id = rows[-1][0]
+
 def recreate_inventory_table():
     """
     Пересоздаёт таблицу инвентаря, если её структура некорректна
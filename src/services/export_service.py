@@ -0,0 +1,199 @@
+import csv
+import gzip
+from datetime import datetime, timedelta
+from sqlalchemy import func, tuple_
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from .database import session_scope, User, Order, OrderItem, Product
+
+# Колонки экспорта пользователей: заголовок и поле User
+USER_EXPORT_COLUMNS = [
+    ("ID", User.id),
+    ("Username", User.username),
+    ("Full Name", User.full_name),
+    ("Blocked", User.is_blocked),
+    ("Exception", User.is_exception),
+    ("Registration Date", User.created_at),
+]
+
+def count_users():
+    """Количество пользователей для прогресса экспорта"""
+    with session_scope() as session:
+        return session.query(User.id).count()
+
+def iter_user_rows(chunk_size=5000):
+    """
+    Строки экспорта пользователей порциями по возрастанию ID (keyset, без OFFSET).
+    Читаются кортежи колонок, а не объекты ORM; каждая порция - отдельная короткая сессия
+    """
+    columns = [column for _, column in USER_EXPORT_COLUMNS]
+    after_id = None
+    while True:
+        with session_scope() as session:
+            query = session.query(*columns)
+            if after_id is not None:
+                query = query.filter(User.id > after_id)
+            chunk = query.order_by(User.id).limit(chunk_size).all()
+        if not chunk:
+            return
+        for row in chunk:
+            yield _format_user_row(row)
+        after_id = chunk[-1][0]
+
+def _format_user_row(row):
+    user_id, username, full_name, is_blocked, is_exception, created_at = row
+    return [
+        user_id,
+        username,
+        full_name,
+        "Yes" if is_blocked else "No",
+        "Yes" if is_exception else "No",
+        created_at.strftime("%Y-%m-%d %H:%M:%S") if created_at else ""
+    ]
+
+def write_xlsx(path, sheet_title, headers, rows, chunk_size=5000, on_progress=None):
+    """
+    Пишет строки в xlsx потоково (write_only: строки сразу уходят в файл, а не в память)
+
+    Args:
+        path: Путь к файлу
+        sheet_title: Название листа
+        headers: Заголовки колонок
+        rows: Итератор строк
+        chunk_size: Как часто вызывать on_progress (в строках)
+        on_progress: Необязательная функция on_progress(done)
+
+    Returns:
+        int: Количество записанных строк
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_title)
+
+    header = []
+    for title in headers:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    ws.append(header)
+
+    done = 0
+    for row in rows:
+        ws.append(row)
+        done += 1
+        if on_progress and done % chunk_size == 0:
+            on_progress(done)
+
+    wb.save(path)
+    return done
+
+def write_csv_gz(path, headers, rows, chunk_size=5000, on_progress=None):
+    """Пишет строки в CSV со сжатием gzip; параметры как у write_xlsx"""
+    done = 0
+    with gzip.open(path, "wt", encoding="utf-8-sig", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(headers)
+        for row in rows:
+            writer.writerow(row)
+            done += 1
+            if on_progress and done % chunk_size == 0:
+                on_progress(done)
+    return done
+
+def export_users_xlsx(path, chunk_size=5000, on_progress=None):
+    """Выгрузка пользователей в xlsx. Returns: количество пользователей"""
+    headers = [title for title, _ in USER_EXPORT_COLUMNS]
+    return write_xlsx(path, "Users", headers, iter_user_rows(chunk_size), chunk_size, on_progress)
+
+def export_users_csv_gz(path, chunk_size=5000, on_progress=None):
+    """Выгрузка пользователей в csv.gz. Returns: количество пользователей"""
+    headers = [title for title, _ in USER_EXPORT_COLUMNS]
+    return write_csv_gz(path, headers, iter_user_rows(chunk_size), chunk_size, on_progress)
+
+# Колонки выгрузки продаж: одна строка на позицию заказа
+ORDER_EXPORT_HEADERS = [
+    "Order ID", "Order Date", "User ID", "Username", "Status", "Payment ID", "Order Total",
+    "Product ID", "Product", "Quantity", "Price", "Line Total"
+]
+
+def _orders_period_filter(date_from=None, date_to=None):
+    """Условия по дате заказа; date_to включительно"""
+    criteria = []
+    if date_from:
+        criteria.append(Order.created_at >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        criteria.append(Order.created_at < datetime.combine(date_to, datetime.min.time()) + timedelta(days=1))
+    return criteria
+
+def count_order_items(date_from=None, date_to=None):
+    """Количество позиций заказов за период (для прогресса выгрузки)"""
+    with session_scope() as session:
+        return session.query(func.count(OrderItem.id)).join(Order, Order.id == OrderItem.order_id).filter(
+            *_orders_period_filter(date_from, date_to)
+        ).scalar()
+
+def iter_order_rows(date_from=None, date_to=None, chunk_size=5000):
+    """
+    Позиции заказов за период с данными заказа и названием товара.
+    Сначала по индексу orders.created_at находится диапазон ID заказов, затем позиции
+    читаются порциями keyset по (order_id, id) через индекс order_items.order_id
+    """
+    period = _orders_period_filter(date_from, date_to)
+    with session_scope() as session:
+        first_id, last_id = session.query(func.min(Order.id), func.max(Order.id)).filter(*period).one()
+    if first_id is None:
+        return
+
+    after = None
+    while True:
+        with session_scope() as session:
+            query = session.query(
+                Order.id, Order.created_at, Order.user_id, User.username, Order.status,
+                Order.payment_id, Order.total_amount, OrderItem.id, OrderItem.product_id,
+                Product.name, OrderItem.quantity, OrderItem.price
+            ).join(
+                OrderItem, OrderItem.order_id == Order.id
+            ).outerjoin(
+                User, User.id == Order.user_id
+            ).outerjoin(
+                Product, Product.id == OrderItem.product_id
+            ).filter(
+                Order.id.between(after[0] if after else first_id, last_id),
+                *period
+            )
+            if after is not None:
+                query = query.filter(tuple_(Order.id, OrderItem.id) > tuple_(*after))
+            chunk = query.order_by(Order.id, OrderItem.id).limit(chunk_size).all()
+        if not chunk:
+            return
+        for row in chunk:
+            yield _format_order_row(row)
+        after = (chunk[-1][0], chunk[-1][7])
+
+def _format_order_row(row):
+    (order_id, created_at, user_id, username, status, payment_id, total_amount,
+     _item_id, product_id, product_name, quantity, price) = row
+    return [
+        order_id,
+        created_at.strftime("%Y-%m-%d %H:%M:%S") if created_at else "",
+        user_id,
+        username or "",
+        status or "",
+        payment_id or "",
+        total_amount,
+        product_id,
+        product_name or "",
+        quantity,
+        price,
+        round((price or 0) * (quantity or 0), 2)
+    ]
+
+def export_orders_xlsx(path, date_from=None, date_to=None, chunk_size=5000, on_progress=None):
+    """Выгрузка продаж за период в xlsx. Returns: количество позиций"""
+    rows = iter_order_rows(date_from, date_to, chunk_size)
+    return write_xlsx(path, "Orders", ORDER_EXPORT_HEADERS, rows, chunk_size, on_progress)
+
+def export_orders_csv_gz(path, date_from=None, date_to=None, chunk_size=5000, on_progress=None):
+    """Выгрузка продаж за период в csv.gz. Returns: количество позиций"""
+    rows = iter_order_rows(date_from, date_to, chunk_size)
+    return write_csv_gz(path, ORDER_EXPORT_HEADERS, rows, chunk_size, on_progress)
@@ -1,64 +1,131 @@
-from services.database import get_database_session
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from services.database import session_scope, StockReservation
 from utils.logger import setup_logger
+from utils.catalog_cache import invalidate_stock
 
 # Настройка логгера
 logger = setup_logger('services.inventory')
 
-def decrease_stock(product_id, quantity):
+class InsufficientStockError(Exception):
+    """Доступного остатка (stock - reserved) не хватает; транзакция откатывается целиком"""
+    
+    def __init__(self, product_id, name=None):
+        self.product_id = product_id
+        self.name = name or f"Товар #{product_id}"
+        super().__init__(f"Insufficient stock for product {product_id}")
+
+# Резерв создается только если свободного остатка хватает - без чтения перед записью
+_RESERVE_SQL = text(
+    "UPDATE product_inventory SET reserved = COALESCE(reserved, 0) + :quantity "
+    "WHERE product_id = :product_id AND stock - COALESCE(reserved, 0) >= :quantity"
+)
+
+_RELEASE_SQL = text(
+    "UPDATE product_inventory SET reserved = CASE WHEN reserved > :quantity THEN reserved - :quantity ELSE 0 END "
+    "WHERE product_id = :product_id"
+)
+
+_DELETE_RESERVATION_SQL = text("DELETE FROM stock_reservations WHERE id = :id")
+
+def reserve_items(user_id, payment_id, items, ttl):
     """
-    Уменьшает количество товара на складе на указанное значение
+    Резервирует товары счета одной транзакцией
     
     Args:
-        product_id: ID товара
-        quantity: Количество, которое нужно вычесть
+        user_id: ID пользователя
+        payment_id: Payload счета, к которому привязан резерв
+        items: Список {"product_id", "quantity", "name"}
+        ttl: Время жизни резерва в секундах
     
-    Returns:
-        bool: True в случае успеха, False в случае ошибки
+    Raises:
+        InsufficientStockError: Если свободного остатка не хватает (ничего не резервируется)
     """
-    session = None
-    try:
-        # Преобразуем product_id в int, если он строка
-        if isinstance(product_id, str) and product_id.isdigit():
-            product_id = int(product_id)
+    expires_at = datetime.now() + timedelta(seconds=ttl)
+    
+    with session_scope() as session:
+        # Одинаковый порядок блокировок у всех покупателей
+        for item in sorted(items, key=lambda item: int(item["product_id"])):
+            product_id = int(item["product_id"])
+            result = session.execute(_RESERVE_SQL, {"product_id": product_id, "quantity": item["quantity"]})
+            if result.rowcount == 0:
+                raise InsufficientStockError(product_id, item.get("name"))
             
-        session = get_database_session()
-        
-        # Получаем текущее количество
-        result = session.execute(
-            "SELECT stock FROM product_inventory WHERE product_id = :product_id",
-            {"product_id": product_id}
-        ).fetchone()
-        
-        if not result:
-            # Если записи нет, создаем новую с нулевым запасом
-            session.execute(
-                "INSERT INTO product_inventory (product_id, stock, reserved) VALUES (:product_id, 0, 0)",
-                {"product_id": product_id}
-            )
-            current_stock = 0
-        else:
-            current_stock = result[0]
-        print(f"Текущий запас для товара {product_id}: {current_stock}")
-        print(f"Количество для вычитания: {quantity}")
-        # Вычисляем новое количество (не меньше нуля)
-        new_stock = max(0, current_stock - quantity)
-        
-        # Обновляем запись
-        session.execute(
-            "UPDATE product_inventory SET stock = :stock WHERE product_id = :product_id",
-            {"product_id": product_id, "stock": new_stock}
-        )
-        
-        # Логируем изменение для отладки
-        logger.info(f"Decreased stock for product {product_id}: {current_stock} -> {new_stock} (-{quantity})")
-        
-        session.commit()
-        return True
-    except Exception as e:
-        logger.error(f"Error decreasing stock: {e}", exc_info=True)
-        if session:
-            session.rollback()
-        return False
-    finally:
-        if session:
-            session.close()
\ No newline at end of file
+            session.add(StockReservation(
+                payment_id=payment_id,
+                user_id=user_id,
+                product_id=product_id,
+                quantity=item["quantity"],
+                expires_at=expires_at
+            ))
+    
+    invalidate_stock()
+    logger.info(f"Reserved {len(items)} items for payment {payment_id} until {expires_at:%H:%M:%S}")
+
+def _release_reservations(session, reservations):
+    """
+    Удаляет резервы и возвращает их количество в свободный остаток.
+    Резерв, уже снятый другим потоком (оплата или очистка), пропускается
+    
+    Returns:
+        tuple: ({product_id: снятое количество}, число снятых резервов)
+    """
+    released = {}
+    released_count = 0
+    for reservation in reservations:
+        if session.execute(_DELETE_RESERVATION_SQL, {"id": reservation.id}).rowcount == 0:
+            continue
+        released[reservation.product_id] = released.get(reservation.product_id, 0) + reservation.quantity
+        released_count += 1
+    return released, released_count
+
+def consume_reservation(session, payment_id):
+    """
+    Снимает резервы счета в транзакции оформления заказа (reserved уменьшает вызывающий код)
+    
+    Returns:
+        dict: {product_id: зарезервированное количество}
+    """
+    reservations = session.query(StockReservation).filter(StockReservation.payment_id == payment_id).all()
+    released, _ = _release_reservations(session, reservations)
+    return released
+
+def release_reserved_quantity(session, product_id, quantity):
+    """Возвращает количество из резерва в свободный остаток в транзакции вызывающего кода"""
+    session.execute(_RELEASE_SQL, {"product_id": product_id, "quantity": quantity})
+
+def has_reservation(payment_id):
+    """Проверяет, что резерв счета еще действует"""
+    with session_scope() as session:
+        return session.query(StockReservation.id).filter(
+            StockReservation.payment_id == payment_id,
+            StockReservation.expires_at > datetime.now()
+        ).first() is not None
+
+def release_reservation(payment_id):
+    """Отменяет резерв счета (например, при выставлении нового счета). Возвращает число позиций"""
+    with session_scope() as session:
+        reservations = session.query(StockReservation).filter(StockReservation.payment_id == payment_id).all()
+        released, _ = _release_reservations(session, reservations)
+        for product_id, quantity in released.items():
+            release_reserved_quantity(session, product_id, quantity)
+    
+    if released:
+        invalidate_stock()
+    return len(released)
+
+def release_expired_reservations():
+    """Снимает просроченные резервы и возвращает товар в свободный остаток. Возвращает число резервов"""
+    with session_scope() as session:
+        reservations = session.query(StockReservation).filter(
+            StockReservation.expires_at <= datetime.now()
+        ).all()
+        # Резервы, которые успела снять оплата или другой проход очистки, не считаются
+        released, released_count = _release_reservations(session, reservations)
+        for product_id, quantity in released.items():
+            release_reserved_quantity(session, product_id, quantity)
+    
+    if released:
+        invalidate_stock()
+        logger.info(f"Released {released_count} expired reservations for {len(released)} products")
+    return released_count
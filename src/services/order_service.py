@@ -1,6 +1,14 @@
-from sqlalchemy import func
+import datetime
+from sqlalchemy import func, text
 from sqlalchemy.orm import joinedload, contains_eager
-from .database import get_database_session, Order, OrderItem, User
+from .database import get_database_session, session_scope, Order, OrderItem, User, CartItem
+from .cart_service import load_checkout_items
+from .inventory_service import InsufficientStockError, consume_reservation, release_reserved_quantity
+from utils.catalog_cache import invalidate_stock
+
+def order_item_name(item):
+    """Название товара позиции заказа; товар подгружен get_order_items, для удаленного - заглушка"""
+    return item.product.name if item.product is not None else f"Товар #{item.product_id}"
 
 class OrderService:
     """Сервис для работы с заказами пользователей с правильными стратегиями загрузки"""
@@ -42,7 +50,10 @@ class OrderService:
         Получает элементы заказа по ID заказа напрямую
         """
         try:
-            return self.session.query(OrderItem).filter(OrderItem.order_id == order_id).all()
+            # Товары подгружаются тем же запросом через LEFT JOIN
+            return self.session.query(OrderItem).options(
+                joinedload(OrderItem.product)
+            ).filter(OrderItem.order_id == order_id).order_by(OrderItem.id).all()
         except Exception as e:
             print(f"Ошибка при получении элементов заказа: {e}")
             return []
@@ -92,4 +103,132 @@ class OrderService:
             return self.session.query(User).filter(User.id == user_id).first()
         except Exception as e:
             print(f"Ошибка при получении пользователя: {e}")
-            return None
\ No newline at end of file
+            return None
+
+# Списание проходит только при достаточном остатке - без чтения перед записью.
+# :reserved - количество из резерва этого счета, остальное берется из свободного остатка
+_DECREMENT_STOCK_SQL = text(
+    "UPDATE product_inventory SET stock = stock - :quantity, reserved = COALESCE(reserved, 0) - :reserved "
+    "WHERE product_id = :product_id AND COALESCE(reserved, 0) >= :reserved "
+    "AND stock - COALESCE(reserved, 0) >= :quantity - :reserved"
+)
+
+def place_order(session, user_id, items, shipping_address, payment_id=None, invoice_payload=None, status="pending"):
+    """
+    Списывает остатки, создает заказ с позициями и убирает заказанные товары из корзины в одной транзакции.
+    Если у счета invoice_payload есть резерв, он снимается и списывается в той же транзакции.
+    При нехватке любого товара выбрасывает InsufficientStockError - вызывающий
+    session_scope откатывает все изменения
+    
+    Args:
+        session: Сессия из session_scope
+        user_id: ID пользователя
+        items: Список {"product_id", "quantity", "price", "name"}
+        shipping_address: Адрес доставки
+        payment_id: ID платежа Telegram (для оплаченных заказов), сохраняется в заказе
+        invoice_payload: Payload счета, под которым хранится резерв товаров
+        status: Статус заказа
+    
+    Returns:
+        Order: Созданный заказ (ID уже назначен)
+    """
+    reserved = consume_reservation(session, invoice_payload) if invoice_payload else {}
+    
+    # Одинаковый порядок списания у всех покупателей
+    for item in sorted(items, key=lambda item: int(item["product_id"])):
+        product_id = int(item["product_id"])
+        result = session.execute(_DECREMENT_STOCK_SQL, {
+            "product_id": product_id,
+            "quantity": item["quantity"],
+            "reserved": reserved.pop(product_id, 0)
+        })
+        if result.rowcount == 0:
+            raise InsufficientStockError(item["product_id"], item.get("name"))
+    
+    # Резерв по товарам, которых нет в заказе, возвращаем в свободный остаток
+    for product_id, quantity in reserved.items():
+        release_reserved_quantity(session, product_id, quantity)
+    
+    new_order = Order(
+        user_id=user_id,
+        total_amount=sum(item["price"] * item["quantity"] for item in items),
+        payment_id=payment_id,
+        shipping_address=shipping_address,
+        status=status,
+        created_at=datetime.datetime.now(),
+        updated_at=datetime.datetime.now()
+    )
+    session.add(new_order)
+    session.flush()  # Чтобы получить ID заказа
+    
+    session.add_all([
+        OrderItem(
+            order_id=new_order.id,
+            product_id=int(item["product_id"]),
+            quantity=item["quantity"],
+            price=item["price"]
+        )
+        for item in items
+    ])
+    
+    # Убираем из корзины только оформленные товары: добавленное после чтения корзины остается
+    session.query(CartItem).filter(
+        CartItem.user_id == user_id,
+        CartItem.product_id.in_({int(item["product_id"]) for item in items})
+    ).delete(synchronize_session=False)
+    
+    return new_order
+
+def create_order_from_cart(user_id, shipping_address):
+    """
+    Создает заказ из корзины пользователя: списание остатков, позиции заказа
+    и очистка корзины выполняются одной транзакцией
+    
+    Returns:
+        dict: {"order_id", "items", "total_amount"} или None, если корзина пуста
+    
+    Raises:
+        InsufficientStockError: Если какого-либо товара не хватает (заказ не создается)
+    """
+    with session_scope() as session:
+        # Корзина читается в той же транзакции, в которой заказ создается и корзина очищается
+        items = load_checkout_items(session, user_id)
+        if not items:
+            return None
+        order = place_order(session, user_id, items, shipping_address)
+        order_id = order.id
+        total_amount = order.total_amount
+    
+    invalidate_stock()
+    
+    return {
+        "order_id": order_id,
+        "items": [{
+            'name': item["name"],
+            'quantity': item["quantity"],
+            'price': item["price"],
+            'total': item["price"] * item["quantity"]
+        } for item in items],
+        "total_amount": total_amount
+    }
+
+def create_paid_order(user_id, order_items, total_amount, payment_id, shipping_address, invoice_payload=None):
+    """
+    Списывает остатки, создает оплаченный заказ и очищает корзину пользователя одной транзакцией.
+    Резерв счета ищется по invoice_payload, а в заказе сохраняется ID платежа Telegram (payment_id)
+    
+    Returns:
+        int: ID созданного заказа
+    
+    Raises:
+        InsufficientStockError: Если какого-либо товара не хватает (заказ не создается)
+    """
+    with session_scope() as session:
+        order = place_order(session, user_id, order_items, shipping_address,
+                            payment_id=payment_id, invoice_payload=invoice_payload, status="new")
+        # Сумма берется из фактического платежа
+        order.total_amount = total_amount
+        order_id = order.id
+    
+    invalidate_stock()
+    return order_id
@@ -0,0 +1,148 @@
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from config import PRODUCT_SEARCH_MAX_RESULTS
+from utils.catalog_cache import catalog_key, get_cached, cache_result
+from utils.logger import setup_logger
+from .database import get_database_session, Product
+from .product_service import stock_expression, _storefront_product
+from .user_search_service import build_match_query
+
+logger = setup_logger('services.product_search')
+
+# Полнотекстовый индекс FTS5 по названию, описанию и категории товара.
+# prefix='2 3' строит отдельные индексы коротких префиксов: поиск по мере набора
+# ("ко" -> "кофе") не перебирает весь словарь
+PRODUCT_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, category,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description, category ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+        INSERT INTO products_fts(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END
+    """,
+]
+
+def create_product_search_index(connection):
+    """
+    Создает индекс products_fts с триггерами и заполняет его, если он только что создан
+
+    Returns:
+        bool: True, если индекс был создан
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type='table' AND name='products_fts'")
+    ).fetchone()
+    for statement in PRODUCT_SEARCH_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        connection.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+    return not exists
+
+def normalize_search_query(search_query):
+    """Ключ кэша: регистр и лишние пробелы на результат не влияют"""
+    return " ".join(search_query.lower().split())
+
+def _ranked_product_ids(session, match, limit):
+    # bm25: название весит больше категории, категория - больше описания
+    rows = session.execute(
+        text(
+            "SELECT products_fts.rowid FROM products_fts "
+            "JOIN products ON products.id = products_fts.rowid "
+            "WHERE products_fts MATCH :match AND products.active = 1 "
+            "ORDER BY bm25(products_fts, 10.0, 1.0, 5.0) LIMIT :limit"
+        ),
+        {"match": match, "limit": limit}
+    ).fetchall()
+    return [row[0] for row in rows]
+
+def _like_product_ids(session, search_query, limit):
+    """Поиск без FTS5 (индекс еще не создан): подстрока в названии"""
+    rows = session.query(Product.id).filter(
+        Product.active == True,
+        Product.name.ilike(f"%{search_query}%")
+    ).order_by(Product.name, Product.id).limit(limit).all()
+    return [row[0] for row in rows]
+
+def search_product_ids(search_query, limit=PRODUCT_SEARCH_MAX_RESULTS):
+    """
+    ID активных товаров по запросу в порядке релевантности. Каждое слово ищется
+    как префикс, слова объединяются через AND.
+
+    Результат хранится в кэше каталога (LRU с TTL) под версией каталога:
+    изменение товаров сбрасывает его, а изменение остатков - нет, поэтому
+    повторные и постраничные запросы не обращаются к индексу
+
+    Returns:
+        list: ID товаров, не больше limit
+    """
+    normalized = normalize_search_query(search_query)
+    match = build_match_query(normalized)
+    if not match:
+        return []
+
+    cache_key = catalog_key("search", normalized, limit, with_stock=False)
+    cached = get_cached(cache_key)
+    if cached is not None:
+        return list(cached)
+
+    session = get_database_session()
+    try:
+        try:
+            ids = _ranked_product_ids(session, match, limit)
+        except OperationalError as e:
+            logger.warning(f"FTS product search unavailable, falling back to LIKE: {e}")
+            session.rollback()
+            ids = _like_product_ids(session, normalized, limit)
+        cache_result(cache_key, tuple(ids), with_stock=False)
+        return ids
+    finally:
+        session.close()
+
+def get_storefront_products(product_ids):
+    """
+    Товары витрины с остатками одним запросом, в порядке product_ids.
+    Остатки не кэшируются вместе с результатами поиска и всегда актуальны
+    """
+    if not product_ids:
+        return []
+    session = get_database_session()
+    try:
+        rows = session.query(Product, stock_expression()).filter(
+            Product.id.in_(product_ids),
+            Product.active == True
+        ).all()
+        products = {product.id: _storefront_product(product, stock) for product, stock in rows}
+        return [products[product_id] for product_id in product_ids if product_id in products]
+    finally:
+        session.close()
+
+def search_products(search_query, limit=8, offset=0):
+    """
+    Страница результатов поиска товаров
+
+    Returns:
+        tuple: (товары страницы, общее число найденных, но не больше PRODUCT_SEARCH_MAX_RESULTS)
+    """
+    ids = search_product_ids(search_query)
+    return get_storefront_products(ids[offset:offset + limit]), len(ids)
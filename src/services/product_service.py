@@ -1,7 +1,8 @@
-from sqlalchemy import desc
+from sqlalchemy import desc, func, select, text, tuple_
 
 from utils import logger
-from .database import get_database_session, Product, ProductInventory
+from utils.catalog_cache import catalog_key, get_cached, cache_result, invalidate_catalog, invalidate_stock
+from .database import get_database_session, session_scope, Product, ProductInventory
 import uuid
 import traceback
 
@@ -13,8 +14,18 @@ PRODUCT_PRICES = {
     "4": 28,  # Цена Продукта 4 - 28 звезд
 }
 
-# Начальное количество товаров (по умолчанию)
-DEFAULT_STOCK = 10
+def available_stock_column():
+    """Свободный остаток строки инвентаря: на складе минус резервы неоплаченных счетов"""
+    return ProductInventory.stock - func.coalesce(ProductInventory.reserved, 0)
+
+def stock_expression():
+    """
+    Свободный остаток товара (stock - reserved) как коррелированный подзапрос по индексу product_inventory.product_id.
+    Считается только для строк, попавших в выборку; дубли в инвентаре не размножают товары
+    """
+    return select(func.coalesce(func.max(available_stock_column()), 0)).where(
+        ProductInventory.product_id == Product.id
+    ).correlate(Product).scalar_subquery()
 
 def get_product_price(product_id):
     """Получение цены продукта по его ID в звездах"""
@@ -30,29 +41,52 @@ def get_product_name(product_id):
         return product.get('name', f"Товар #{product_id}")
     return f"Товар #{product_id}"
 
+def get_stock_levels(product_ids):
+    """
+    Свободные остатки нескольких товаров одним запросом, только чтение.
+    Товар без строки инвентаря считается отсутствующим на складе (0)
+
+    Args:
+        product_ids: ID товаров (int или str)
+
+    Returns:
+        dict: {product_id (int): доступное количество}
+    """
+    product_ids = {int(product_id) for product_id in product_ids}
+    if not product_ids:
+        return {}
+    
+    with session_scope() as session:
+        rows = session.query(
+            ProductInventory.product_id, func.max(available_stock_column())
+        ).filter(
+            ProductInventory.product_id.in_(product_ids)
+        ).group_by(ProductInventory.product_id).all()
+    
+    levels = dict.fromkeys(product_ids, 0)
+    levels.update({product_id: stock or 0 for product_id, stock in rows})
+    return levels
+
 def get_product_stock(product_id):
-    """Получение доступного количества товара на складе"""
-    try:
-        with get_database_session() as session:
-            # Проверяем наличие товара в таблице инвентаря
-            inventory = session.query(ProductInventory).filter(
-                ProductInventory.product_id == str(product_id)
-            ).first()
-            
-            if inventory:
-                return inventory.stock
-            else:
-                # Если товара нет в инвентаре, добавляем его с начальным количеством
-                new_inventory = ProductInventory(
-                    product_id=str(product_id),
-                    stock=DEFAULT_STOCK
-                )
-                session.add(new_inventory)
-                session.commit()
-                return DEFAULT_STOCK
-    except Exception as e:
-        # В случае ошибки, возвращаем значение по умолчанию
-        return DEFAULT_STOCK
+    """Доступное количество товара на складе (только чтение)"""
+    return get_stock_levels([product_id])[int(product_id)]
+
+def find_unavailable_items(items):
+    """
+    Позиции, которых на складе меньше, чем запрошено; остатки читаются одним запросом
+
+    Args:
+        items: Список {"product_id", "quantity", ...}
+
+    Returns:
+        list: Пары (позиция, доступное количество)
+    """
+    levels = get_stock_levels(item["product_id"] for item in items)
+    return [
+        (item, levels[int(item["product_id"])])
+        for item in items
+        if levels[int(item["product_id"])] < item["quantity"]
+    ]
 
 def update_product_stock(product_id, quantity_change):
     """
@@ -63,41 +97,28 @@ def update_product_stock(product_id, quantity_change):
         quantity_change: Изменение количества (положительное для увеличения, отрицательное для уменьшения)
     
     Returns:
-        bool: True в случае успеха, False в случае ошибки
+        bool: True в случае успеха, False если у товара нет строки инвентаря или произошла ошибка
     """
     session = None
     try:
-        # Преобразуем product_id в int, если он строка
-        if isinstance(product_id, str) and product_id.isdigit():
-            product_id = int(product_id)
-            
         session = get_database_session()
         
-        # Проверяем, существует ли запись в инвентаре
+        # Строка инвентаря создается вместе с товаром, здесь остаток только изменяется
         result = session.execute(
-            "SELECT COUNT(*) FROM product_inventory WHERE product_id = :product_id",
-            {"product_id": product_id}
-        ).scalar()
-        
-        if result == 0:
-            # Если записи нет, создаем новую с указанным количеством
-            # Если изменение отрицательное, устанавливаем значение 0 или соответствующее положительное
-            initial_stock = max(0, quantity_change)
-            session.execute(
-                "INSERT INTO product_inventory (product_id, stock, reserved) VALUES (:product_id, :stock, 0)",
-                {"product_id": product_id, "stock": initial_stock}
-            )
-        else:
-            # Если запись есть, изменяем количество инкрементально
-            session.execute(
-                "UPDATE product_inventory SET stock = stock + :quantity_change WHERE product_id = :product_id",
-                {"product_id": product_id, "quantity_change": quantity_change}
-            )
+            text("UPDATE product_inventory SET stock = stock + :quantity_change WHERE product_id = :product_id"),
+            {"product_id": int(product_id), "quantity_change": quantity_change}
+        )
+        if result.rowcount == 0:
+            print(f"Inventory row not found for product {product_id}")
+            session.rollback()
+            return False
         
         session.commit()
+        invalidate_stock()
         return True
     except Exception as e:
-        print(f"Error updating product stock: {e}", exc_info=True)
+        print(f"Error updating product stock: {e}")
+        traceback.print_exc()
         if session:
             session.rollback()
         return False
@@ -105,9 +126,9 @@ def update_product_stock(product_id, quantity_change):
         if session:
             session.close()
 
-def create_product(name, description, price, image_url=None, category=None):
+def create_product(name, description, price, image_url=None, category=None, stock=0):
     """
-    Создает новый товар
+    Создает новый товар вместе со строкой инвентаря
     
     Args:
         name (str): Название товара
@@ -115,6 +136,7 @@ def create_product(name, description, price, image_url=None, category=None):
         price (float): Цена товара
         image_url (str, optional): URL изображения товара
         category (str, optional): Категория товара
+        stock (int): Начальное количество на складе
     
     Returns:
         int: ID созданного товара или None в случае ошибки
@@ -131,12 +153,15 @@ def create_product(name, description, price, image_url=None, category=None):
             image_url=image_url,
             category=category
         )
+        # Строка инвентаря создается только здесь, в одной транзакции с товаром
+        product.inventory = ProductInventory(stock=max(0, stock), reserved=0)
         
         session.add(product)
         session.commit()
         
         product_id = product.id
         session.close()
+        invalidate_catalog()
         
         return product_id
     except Exception as e:
@@ -162,8 +187,8 @@ def get_all_products(include_inactive=False, category=None):
     try:
         session = get_database_session()
         
-        # Строим запрос
-        query = session.query(Product)
+        # Строим запрос: товары вместе с остатками за один запрос
+        query = session.query(Product, stock_expression())
         
         # Применяем фильтры
         if not include_inactive:
@@ -181,15 +206,7 @@ def get_all_products(include_inactive=False, category=None):
         # Формируем результат
         result = []
         
-        for product in products:
-            # Получаем инвентарь с использованием raw SQL для защиты от ошибок схемы
-            stock_result = session.execute(
-                "SELECT stock FROM product_inventory WHERE product_id = :product_id",
-                {"product_id": product.id}
-            ).fetchone()
-            
-            stock = stock_result[0] if stock_result else 0
-            
+        for product, product_stock in products:
             # Добавляем товар в результат
             result.append({
                 "id": product.id,
@@ -198,7 +215,7 @@ def get_all_products(include_inactive=False, category=None):
                 "price": product.price,
                 "image_url": product.image_url,
                 "category": product.category,
-                "stock": stock,
+                "stock": product_stock or 0,
                 "created_at": product.created_at,
                 "updated_at": product.updated_at
             })
@@ -228,24 +245,27 @@ def get_product_by_id(product_id):
         if isinstance(product_id, str) and product_id.isdigit():
             product_id = int(product_id)
         
+        # Карточка товара содержит остаток, поэтому зависит от версии остатков
+        cache_key = catalog_key("product", product_id)
+        cached = get_cached(cache_key)
+        if cached is not None:
+            return dict(cached)
+        
         session = get_database_session()
         
-        # Получаем товар
-        product = session.query(Product).filter(
+        # Получаем товар вместе с остатком
+        row = session.query(Product, available_stock_column()).outerjoin(
+            ProductInventory, ProductInventory.product_id == Product.id
+        ).filter(
             Product.id == product_id,
             Product.active == True
         ).first()
         
-        if not product:
+        if not row:
             return None
         
-        # Получаем инвентарь с использованием raw SQL для защиты от ошибок схемы
-        stock_result = session.execute(
-            "SELECT stock FROM product_inventory WHERE product_id = :product_id",
-            {"product_id": product_id}
-        ).fetchone()
-        
-        stock = stock_result[0] if stock_result else 0
+        product, stock = row
+        stock = stock or 0
         
         # Формируем результат
         result = {
@@ -261,7 +281,8 @@ def get_product_by_id(product_id):
             "updated_at": product.updated_at
         }
         
-        return result
+        cache_result(cache_key, result)
+        return dict(result)
     except Exception as e:
         print(f"Error getting product: {e}")
         import traceback
@@ -299,6 +320,7 @@ def update_product(product_id, **kwargs):
         
         session.commit()
         session.close()
+        invalidate_catalog()
         
         return True
     except Exception as e:
@@ -333,6 +355,7 @@ def delete_product(product_id):
         
         session.commit()
         session.close()
+        invalidate_catalog()
         
         return True
     except Exception as e:
@@ -356,6 +379,7 @@ def hard_delete_product(product_id):
             if product:
                 session.delete(product)
                 session.commit()
+                invalidate_catalog()
                 return True
             return False
     except Exception as e:
@@ -366,13 +390,21 @@ def get_active_products(category=None, limit=None, offset=None):
     """
     Получает список активных товаров для пользователей
     """
+    cache_key = catalog_key("active", category, limit, offset)
+    cached = get_cached(cache_key)
+    if cached is not None:
+        return [dict(product) for product in cached]
+    
     session = None
     try:
         session = get_database_session()
         
-        # Строим запрос только для активных товаров
-        query = session.query(Product).filter(
-            Product.active == True
+        # Строим запрос только для активных товаров в наличии вместе с остатками.
+        # Фильтр по остатку в SQL, чтобы LIMIT/OFFSET не возвращали неполные страницы
+        stock = stock_expression()
+        query = session.query(Product, stock).filter(
+            Product.active == True,
+            stock > 0
         )
         
         # Применяем фильтр категории, если указан
@@ -393,28 +425,11 @@ def get_active_products(category=None, limit=None, offset=None):
         # Формируем результат
         result = []
         
-        for product in products:
-            # Получаем инвентарь с использованием raw SQL
-            stock_result = session.execute(
-                "SELECT stock FROM product_inventory WHERE product_id = :product_id",
-                {"product_id": product.id}
-            ).fetchone()
-            
-            stock = stock_result[0] if stock_result else 0
-            
-            # ИСПРАВЛЕНО: Добавляем товар только если он в наличии (stock > 0)
-            if stock > 0:
-                result.append({
-                    "id": product.id,
-                    "name": product.name,
-                    "description": product.description,
-                    "price": product.price,
-                    "image_url": product.image_url,
-                    "category": product.category,
-                    "stock": stock
-                })
+        for product, product_stock in products:
+            result.append(_storefront_product(product, product_stock))
         
-        return result
+        cache_result(cache_key, result)
+        return [dict(product) for product in result]
     except Exception as e:
         print(f"Error getting active products: {e}")
         import traceback
@@ -424,6 +439,83 @@ def get_active_products(category=None, limit=None, offset=None):
         if session:
             session.close()
 
+def _storefront_product(product, stock):
+    """Товар в виде словаря для витрины"""
+    return {
+        "id": product.id,
+        "name": product.name,
+        "description": product.description,
+        "price": product.price,
+        "image_url": product.image_url,
+        "category": product.category,
+        "stock": stock
+    }
+
+def get_active_products_page(category=None, limit=8, after_id=None, before_id=None):
+    """
+    Страница витрины с keyset-пагинацией по (name, id)
+    
+    Args:
+        category (str, optional): Фильтр по категории
+        limit (int): Размер страницы
+        after_id (int, optional): ID последнего товара предыдущей страницы (листаем вперед)
+        before_id (int, optional): ID первого товара следующей страницы (листаем назад)
+    
+    Returns:
+        tuple: (список товаров, есть ли еще товары в направлении листания)
+    """
+    cache_key = catalog_key("page", category, limit, after_id, before_id)
+    cached = get_cached(cache_key)
+    if cached is not None:
+        products, has_more = cached
+        return [dict(product) for product in products], has_more
+    
+    session = None
+    try:
+        session = get_database_session()
+        
+        stock = stock_expression()
+        query = session.query(Product, stock).filter(
+            Product.active == True,
+            stock > 0
+        )
+        
+        if category and category != "all":
+            query = query.filter(Product.category == category)
+        
+        cursor_id = before_id if before_id is not None else after_id
+        if cursor_id is not None:
+            # Имя курсора берем подзапросом, чтобы в callback_data хватало одного ID.
+            # Сравнение кортежей позволяет SQLite начать обход индекса сразу с курсора
+            cursor_name = select(Product.name).where(Product.id == cursor_id).scalar_subquery()
+            key = tuple_(Product.name, Product.id)
+            cursor_key = tuple_(cursor_name, cursor_id)
+            query = query.filter(key < cursor_key if before_id is not None else key > cursor_key)
+        
+        if before_id is not None:
+            query = query.order_by(Product.name.desc(), Product.id.desc())
+        else:
+            query = query.order_by(Product.name, Product.id)
+        
+        # Лишняя строка показывает, есть ли следующая страница, без отдельного запроса
+        rows = query.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        if before_id is not None:
+            rows.reverse()
+        
+        products = [_storefront_product(product, product_stock) for product, product_stock in rows]
+        cache_result(cache_key, (products, has_more))
+        return [dict(product) for product in products], has_more
+    except Exception as e:
+        print(f"Error getting products page: {e}")
+        traceback.print_exc()
+        return [], False
+    finally:
+        if session:
+            session.close()
+
 def get_product_categories():
     """
     Получает список всех уникальных категорий продуктов
@@ -431,6 +523,12 @@ def get_product_categories():
     Returns:
         list: Список категорий
     """
+    # Категории не зависят от остатков и живут дольше
+    cache_key = catalog_key("categories", with_stock=False)
+    cached = get_cached(cache_key)
+    if cached is not None:
+        return list(cached)
+    
     session = None
     try:
         session = get_database_session()
@@ -442,7 +540,9 @@ def get_product_categories():
         ).distinct().all()
         
         # Преобразуем результат в список строк
-        return [cat[0] for cat in categories if cat[0]]
+        result = [cat[0] for cat in categories if cat[0]]
+        cache_result(cache_key, result, with_stock=False)
+        return list(result)
     except Exception as e:
         print(f"Error getting product categories: {e}")
         return []
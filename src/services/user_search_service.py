@@ -0,0 +1,147 @@
+import re
+from sqlalchemy import func, or_, text
+from sqlalchemy.exc import OperationalError
+from .database import session_scope, IS_SQLITE, User
+from utils.logger import setup_logger
+
+logger = setup_logger('services.user_search')
+
+# Полнотекстовый индекс FTS5 по username и full_name. External content: текст хранится
+# только в users, индекс обновляют триггеры, поэтому он актуален при любом способе записи
+USER_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+        username, full_name,
+        content='users', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts(rowid, username, full_name) VALUES (new.id, new.username, new.full_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, username, full_name)
+        VALUES ('delete', old.id, old.username, old.full_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE OF username, full_name ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, username, full_name)
+        VALUES ('delete', old.id, old.username, old.full_name);
+        INSERT INTO users_fts(rowid, username, full_name) VALUES (new.id, new.username, new.full_name);
+    END
+    """,
+]
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# bm25 считается для каждого совпадения, поэтому слишком общие запросы (тысячи совпадений)
+# не ранжируем, а отдаем по порядку ID - это сохраняет время ответа в миллисекундах
+SEARCH_RANK_LIMIT = 5000
+
+def create_user_search_index(connection):
+    """
+    Создает индекс users_fts с триггерами и заполняет его, если он только что создан
+
+    Returns:
+        bool: True, если индекс был создан
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type='table' AND name='users_fts'")
+    ).fetchone()
+    for statement in USER_SEARCH_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        connection.execute(text("INSERT INTO users_fts(users_fts) VALUES ('rebuild')"))
+    return not exists
+
+def build_match_query(search_query):
+    """
+    Запрос MATCH из пользовательского ввода: каждое слово - префиксный поиск,
+    слова объединяются через AND. Спецсимволы FTS5 не передаются
+    """
+    tokens = _TOKEN_RE.findall(search_query)
+    return " ".join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+
+def _search_fts(session, search_query, limit, offset, exclude_id=None):
+    match = build_match_query(search_query)
+    if not match:
+        return [], 0
+
+    # exclude_id - пользователь, уже показанный первым как совпадение по ID
+    exclude = "AND rowid != :exclude_id " if exclude_id is not None else ""
+    total = session.execute(
+        text("SELECT count(*) FROM users_fts WHERE users_fts MATCH :match " + exclude),
+        {"match": match, "exclude_id": exclude_id}
+    ).scalar()
+    # bm25: совпадение в username весит больше, чем в full_name
+    order_by = "ORDER BY bm25(users_fts, 2.0, 1.0) " if total <= SEARCH_RANK_LIMIT else ""
+    rows = session.execute(
+        text(
+            "SELECT rowid FROM users_fts WHERE users_fts MATCH :match "
+            + exclude + order_by + "LIMIT :limit OFFSET :offset"
+        ),
+        {"match": match, "exclude_id": exclude_id, "limit": limit, "offset": offset}
+    ).fetchall()
+    ids = [row[0] for row in rows]
+    users = {user.id: user for user in session.query(User).filter(User.id.in_(ids)).all()} if ids else {}
+    return [users[user_id] for user_id in ids if user_id in users], total
+
+def _search_like(session, search_query, limit, offset, exclude_id=None):
+    """Прежний поиск сканированием таблицы - для баз без FTS5"""
+    query = session.query(User).filter(or_(
+        func.lower(User.username) == func.lower(search_query),
+        func.lower(User.full_name).like(f"%{search_query.lower()}%")
+    ))
+    if exclude_id is not None:
+        query = query.filter(User.id != exclude_id)
+    return query.order_by(User.id).offset(offset).limit(limit).all(), query.count()
+
+def search_users(search_query, limit=10, offset=0):
+    """
+    Ищет пользователей по username, имени или ID
+
+    Args:
+        search_query: Строка поиска; числа дополнительно ищутся как ID
+        limit: Размер страницы
+        offset: Смещение страницы (страницы ранжированного поиска небольшие)
+
+    Returns:
+        tuple: (пользователи в порядке релевантности, общее число найденных)
+    """
+    search_query = search_query.strip()
+    with session_scope() as session:
+        exact = None
+        if search_query.isdigit():
+            exact = session.query(User).filter(User.id == int(search_query)).first()
+
+        # Совпадение по ID занимает первую строку первой страницы и исключается из поиска,
+        # поэтому остальные результаты сдвигаются на одну позицию
+        exclude_id = exact.id if exact is not None else None
+        search_limit, search_offset = limit, offset
+        if exact is not None:
+            if offset == 0:
+                search_limit = limit - 1
+            else:
+                search_offset = offset - 1
+
+        users, total = [], 0
+        if IS_SQLITE:
+            try:
+                users, total = _search_fts(session, search_query, search_limit, search_offset, exclude_id)
+            except OperationalError as e:
+                logger.warning(f"FTS user search unavailable, falling back to LIKE: {e}")
+                session.rollback()
+                users, total = _search_like(session, search_query, search_limit, search_offset, exclude_id)
+        else:
+            users, total = _search_like(session, search_query, search_limit, search_offset, exclude_id)
+
+        if exact is not None:
+            if offset == 0:
+                users = [exact] + users
+            total += 1
+
+        return users, total
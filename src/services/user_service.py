@@ -1,3 +1,4 @@
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm import Session
 from .database import User, Referral, get_database_session
 from datetime import datetime
@@ -56,6 +57,44 @@ class UserService:
     def close_session(self):
         self.session.close()
 
+    def get_name_initials(self) -> list:
+        """Первые буквы имен и число пользователей на каждую: GROUP BY по индексу name_initial"""
+        return self.session.query(User.name_initial, func.count(User.id)).filter(
+            User.name_initial.isnot(None)
+        ).group_by(User.name_initial).order_by(User.name_initial).all()
+
+    def count_users_by_initial(self, letter: str) -> int:
+        return self.session.query(func.count(User.id)).filter(User.name_initial == letter).scalar()
+
+    def get_users_by_initial(self, letter: str, limit: int = 7, after_id: int = None, before_id: int = None):
+        """
+        Страница пользователей на букву по (full_name, id) - keyset вместо OFFSET
+
+        Args:
+            letter: Первая буква имени
+            limit: Размер страницы
+            after_id: ID последнего пользователя предыдущей страницы (листаем вперед)
+            before_id: ID первого пользователя следующей страницы (листаем назад)
+
+        Returns:
+            tuple: (список User, есть ли еще страницы в направлении листания)
+        """
+        query = self.session.query(User).filter(User.name_initial == letter)
+        cursor_id = after_id if after_id is not None else before_id
+        if cursor_id is not None:
+            cursor_name = self.session.query(User.full_name).filter(User.id == cursor_id).scalar_subquery()
+            position = tuple_(User.full_name, User.id)
+            cursor = tuple_(cursor_name, cursor_id)
+            query = query.filter(position < cursor if before_id is not None else position > cursor)
+
+        if before_id is not None:
+            users = query.order_by(User.full_name.desc(), User.id.desc()).limit(limit + 1).all()
+            has_more = len(users) > limit
+            return list(reversed(users[:limit])), has_more
+
+        users = query.order_by(User.full_name, User.id).limit(limit + 1).all()
+        return users[:limit], len(users) > limit
+
     def create_referral(self, user_id: int, referred_by: int = None) -> Referral:
         """Create a referral record"""
         # Check if referral already exists
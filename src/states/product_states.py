@@ -0,0 +1,5 @@
+from aiogram.dispatcher.filters.state import State, StatesGroup
+
+# Состояния покупателя в магазине
+class ShopStates(StatesGroup):
+    waiting_for_search_query = State()
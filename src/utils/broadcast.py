@@ -0,0 +1,223 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from aiogram.utils.exceptions import (
+    RetryAfter,
+    BotBlocked,
+    BotKicked,
+    ChatNotFound,
+    UserDeactivated,
+    NetworkError,
+    TelegramAPIError
+)
+from config import (
+    BROADCAST_RATE,
+    BROADCAST_PER_CHAT_INTERVAL,
+    BROADCAST_WORKERS,
+    BROADCAST_CHUNK_SIZE,
+    BROADCAST_MAX_RETRIES
+)
+from services.database import run_db
+from services.broadcast_service import get_recipient_chunk
+from utils.cache import TTLCache
+from utils.logger import setup_logger
+
+logger = setup_logger('utils.broadcast')
+
+# Ошибки, после которых писать пользователю бессмысленно
+UNREACHABLE_ERRORS = (BotBlocked, BotKicked, ChatNotFound, UserDeactivated)
+
+class TokenBucket:
+    """
+    Асинхронный token bucket: не больше rate отправок в секунду с запасом capacity.
+    По умолчанию запас 1 - без всплеска в начале рассылки, который Telegram считает флудом.
+    pause() останавливает выдачу токенов всем ожидающим (для RetryAfter)
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds):
+        """Запрещает отправку на seconds секунд"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    async def acquire(self):
+        """Ждет свободный токен; ожидающие обслуживаются по очереди"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    self._updated = time.monotonic()
+                    continue
+
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class PerChatLimiter:
+    """Минимальный интервал между сообщениями в один чат"""
+
+    def __init__(self, interval, maxsize=100000):
+        self.interval = interval
+        self._last_sent = TTLCache(maxsize=maxsize, default_ttl=max(interval, 1))
+
+    async def wait(self, chat_id):
+        last_sent = self._last_sent.get(chat_id)
+        if last_sent is not None:
+            delay = last_sent + self.interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        self._last_sent.set(chat_id, time.monotonic())
+
+@dataclass
+class BroadcastStats:
+    """Счетчики рассылки"""
+    total: int = 0
+    sent: int = 0
+    failed: int = 0
+    unreachable: int = 0
+    retries: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float = None
+
+    @property
+    def processed(self):
+        return self.sent + self.failed
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def rate(self):
+        """Отправлено сообщений в секунду"""
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+async def iter_recipients(chunk_size=BROADCAST_CHUNK_SIZE):
+    """Получатели рассылки порциями из БД, без загрузки всех пользователей в память"""
+    after_id = None
+    while True:
+        chunk = await run_db(get_recipient_chunk, after_id, chunk_size)
+        if not chunk:
+            return
+        for user_id in chunk:
+            yield user_id
+        after_id = chunk[-1]
+
+class Broadcaster:
+    """
+    Рассылка с несколькими воркерами под общим token bucket.
+    send_func(chat_id) - корутина, отправляющая одно сообщение
+    """
+
+    def __init__(self, rate=BROADCAST_RATE, workers=BROADCAST_WORKERS,
+                 per_chat_interval=BROADCAST_PER_CHAT_INTERVAL, max_retries=BROADCAST_MAX_RETRIES):
+        self.bucket = TokenBucket(rate)
+        self.per_chat = PerChatLimiter(per_chat_interval)
+        self.workers = workers
+        self.max_retries = max_retries
+        self.stats = BroadcastStats()
+
+    async def _deliver(self, chat_id, send_func):
+        """
+        Отправляет одно сообщение с учетом лимитов и повторов. Возвращает исход: "sent", "failed" или "unreachable"
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.per_chat.wait(chat_id)
+            await self.bucket.acquire()
+            try:
+                await send_func(chat_id)
+                self.stats.sent += 1
+                return "sent"
+            except RetryAfter as e:
+                # Флуд-лимит общий для бота - останавливаем всех воркеров
+                logger.warning(f"Broadcast flood limit: retry after {e.timeout}s (chat {chat_id})")
+                self.stats.retries += 1
+                self.bucket.pause(e.timeout)
+            except UNREACHABLE_ERRORS:
+                self.stats.failed += 1
+                self.stats.unreachable += 1
+                return "unreachable"
+            except (NetworkError, asyncio.TimeoutError) as e:
+                logger.warning(f"Broadcast network error for chat {chat_id}: {e}")
+                self.stats.retries += 1
+                await asyncio.sleep(2 ** attempt)
+            except TelegramAPIError as e:
+                logger.warning(f"Broadcast failed for chat {chat_id}: {e}")
+                self.stats.failed += 1
+                return "failed"
+
+        self.stats.failed += 1
+        return "failed"
+
+    async def run(self, recipients, send_func, on_progress=None, progress_interval=2.0, on_result=None):
+        """
+        Рассылает сообщение всем получателям из асинхронного итератора recipients
+
+        Args:
+            recipients: Асинхронный итератор ID чатов
+            send_func: Корутина send_func(chat_id)
+            on_progress: Необязательная корутина on_progress(stats), вызывается раз в progress_interval
+            progress_interval: Интервал вызова on_progress в секундах
+            on_result: Необязательная функция on_result(chat_id, outcome) после каждой доставки
+
+        Returns:
+            BroadcastStats: Итоговые счетчики
+        """
+        self.stats = BroadcastStats()
+        queue = asyncio.Queue(maxsize=self.workers * 2)
+
+        async def produce():
+            try:
+                async for chat_id in recipients:
+                    self.stats.total += 1
+                    await queue.put(chat_id)
+            finally:
+                for _ in range(self.workers):
+                    await queue.put(None)
+
+        async def work():
+            while True:
+                chat_id = await queue.get()
+                if chat_id is None:
+                    return
+                outcome = await self._deliver(chat_id, send_func)
+                if on_result:
+                    on_result(chat_id, outcome)
+
+        async def report():
+            while True:
+                await asyncio.sleep(progress_interval)
+                try:
+                    await on_progress(self.stats)
+                except Exception as e:
+                    logger.warning(f"Broadcast progress callback failed: {e}")
+
+        producer = asyncio.ensure_future(produce())
+        reporter = asyncio.ensure_future(report()) if on_progress else None
+        try:
+            await asyncio.gather(*(work() for _ in range(self.workers)))
+            await producer
+        finally:
+            producer.cancel()
+            if reporter:
+                reporter.cancel()
+            self.stats.finished_at = time.monotonic()
+
+        logger.info(
+            f"Broadcast finished: sent={self.stats.sent} failed={self.stats.failed} "
+            f"unreachable={self.stats.unreachable} retries={self.stats.retries} "
+            f"elapsed={self.stats.elapsed:.1f}s rate={self.stats.rate:.1f} msg/s"
+        )
+        return self.stats
@@ -0,0 +1,262 @@
+import asyncio
+from collections import deque
+from aiogram import types
+from config import BROADCAST_CHUNK_SIZE
+from services.database import run_db
+from services.broadcast_service import (
+    JOB_RUNNING,
+    JOB_PAUSED,
+    JOB_CANCELLED,
+    JOB_COMPLETED,
+    get_recipient_chunk,
+    describe_segment,
+    get_broadcast_job,
+    get_broadcast_jobs,
+    set_broadcast_job_status,
+    save_broadcast_progress
+)
+from utils.broadcast import Broadcaster
+from utils.progress import ProgressReporter
+from utils.logger import setup_logger
+
+logger = setup_logger('utils.broadcast_jobs')
+
+# Запущенные задания: job_id -> BroadcastJobRunner
+_runners = {}
+
+# Типы InputMedia для элементов альбома
+_INPUT_MEDIA = {
+    "photo": types.InputMediaPhoto,
+    "video": types.InputMediaVideo,
+    "document": types.InputMediaDocument,
+    "audio": types.InputMediaAudio,
+}
+
+def media_group_item(message: types.Message):
+    """Элемент альбома по file_id из сообщения; None для неподдерживаемого типа"""
+    if message.photo:
+        file_id, media_type = message.photo[-1].file_id, "photo"
+    elif message.video:
+        file_id, media_type = message.video.file_id, "video"
+    elif message.document:
+        file_id, media_type = message.document.file_id, "document"
+    elif message.audio:
+        file_id, media_type = message.audio.file_id, "audio"
+    else:
+        return None
+    return {"type": media_type, "media": file_id, "caption": message.caption}
+
+def build_media_group(media):
+    """Список InputMedia для send_media_group; собирается один раз на запуск задания"""
+    return [
+        _INPUT_MEDIA[item["type"]](media=item["media"], caption=item.get("caption"))
+        for item in media
+    ]
+
+def job_keyboard(job_id, status):
+    """Кнопки управления заданием в зависимости от его статуса"""
+    keyboard = types.InlineKeyboardMarkup()
+    if status == JOB_RUNNING:
+        keyboard.add(
+            types.InlineKeyboardButton("⏸ Пауза", callback_data=f"bcjob_pause_{job_id}"),
+            types.InlineKeyboardButton("✖️ Отменить", callback_data=f"bcjob_cancel_{job_id}")
+        )
+    elif status == JOB_PAUSED:
+        keyboard.add(
+            types.InlineKeyboardButton("▶️ Продолжить", callback_data=f"bcjob_resume_{job_id}"),
+            types.InlineKeyboardButton("✖️ Отменить", callback_data=f"bcjob_cancel_{job_id}")
+        )
+    keyboard.add(types.InlineKeyboardButton("◀️ Назад", callback_data="admin_back"))
+    return keyboard
+
+def format_job_status(job, reporter=None):
+    """Текст состояния задания рассылки; с reporter добавляются скорость и оставшееся время"""
+    titles = {
+        JOB_RUNNING: "⏳ Рассылка идет",
+        JOB_PAUSED: "⏸ Рассылка приостановлена",
+        JOB_CANCELLED: "✖️ Рассылка отменена",
+        JOB_COMPLETED: "✅ Рассылка завершена",
+    }
+    processed = job["sent"] + job["failed"]
+    progress = min(100, int(processed / job["total"] * 100)) if job["total"] else 100
+    text = (
+        f"{titles.get(job['status'], job['status'])} (#{job['id']})\n"
+        f"Аудитория: {describe_segment(job['segment'])}\n"
+        f"Обработано: {processed} из {job['total']} ({progress}%)\n"
+        f"✅ Отправлено: {job['sent']}\n"
+        f"❌ Не удалось: {job['failed']} (недоступны: {job['unreachable']})"
+    )
+    if reporter is not None and job["status"] == JOB_RUNNING:
+        text += f"\n{reporter.stats_line(processed)}"
+    return text
+
+class BroadcastJobRunner:
+    """
+    Выполняет задание рассылки через Broadcaster с сохранением прогресса.
+    Результаты доставки копятся в памяти и пишутся в БД одной вставкой раз в интервал
+    прогресса вместе с курсором - наибольшим ID, до которого все получатели обработаны
+    """
+
+    def __init__(self, bot, job):
+        self.bot = bot
+        self.job = job
+        self.stop_status = None  # JOB_PAUSED или JOB_CANCELLED, если остановку запросил администратор
+        self._pending = []  # Результаты доставки, еще не записанные в БД
+        self._issued = deque()  # ID, выданные воркерам, по возрастанию
+        self._in_flight = set()  # ID, по которым еще нет результата
+        self._cursor = job["cursor"]
+        self._flush_lock = asyncio.Lock()
+        self._reporter = None
+        self.task = None
+
+    def request_stop(self, status):
+        """Останавливает выдачу новых получателей; текущие отправки завершаются"""
+        self.stop_status = status
+
+    async def _recipients(self):
+        after_id = self.job["cursor"]
+        while self.stop_status is None:
+            chunk = await run_db(
+                get_recipient_chunk, after_id, BROADCAST_CHUNK_SIZE, self.job["id"],
+                segment=self.job["segment"]
+            )
+            if not chunk:
+                return
+            for user_id in chunk:
+                if self.stop_status is not None:
+                    return
+                self._issued.append(user_id)
+                self._in_flight.add(user_id)
+                yield user_id
+            after_id = chunk[-1]
+
+    def _on_result(self, chat_id, outcome):
+        self._in_flight.discard(chat_id)
+        self._pending.append((chat_id, outcome))
+
+    def _advance_cursor(self):
+        """Сдвигает курсор по непрерывному префиксу обработанных ID"""
+        while self._issued and self._issued[0] not in self._in_flight:
+            self._cursor = self._issued.popleft()
+        return self._cursor
+
+    async def _send(self, chat_id):
+        # Медиа не загружается заново: копия исходного сообщения или альбом по file_id
+        if self.job["media"]:
+            await self.bot.send_media_group(chat_id=chat_id, media=self._media_group)
+        elif self.job["source_message_id"]:
+            await self.bot.copy_message(
+                chat_id=chat_id,
+                from_chat_id=self.job["source_chat_id"],
+                message_id=self.job["source_message_id"]
+            )
+        else:
+            await self.bot.send_message(chat_id=chat_id, text=self.job["text"])
+
+    async def flush(self):
+        """Записывает накопленные результаты и курсор, обновляет сообщение с прогрессом"""
+        async with self._flush_lock:
+            deliveries, self._pending = self._pending, []
+            cursor = self._advance_cursor()
+            try:
+                await run_db(save_broadcast_progress, self.job["id"], deliveries, cursor)
+            except Exception:
+                # Не теряем результаты - попробуем записать при следующем сбросе
+                self._pending = deliveries + self._pending
+                raise
+            self.job = await run_db(get_broadcast_job, self.job["id"])
+        await self._show_status()
+
+    async def _show_status(self, force=False):
+        """Обновляет сообщение с прогрессом не чаще PROGRESS_UPDATE_INTERVAL"""
+        if not self.job["status_chat_id"]:
+            return
+        reporter = self._reporter
+        if reporter is None:
+            return
+
+        # Сообщение могли перевыбрать через список рассылок
+        reporter.edit = lambda text, **kwargs: self.bot.edit_message_text(
+            text,
+            chat_id=self.job["status_chat_id"],
+            message_id=self.job["status_message_id"],
+            **kwargs
+        )
+        await reporter.update(
+            self.job["sent"] + self.job["failed"],
+            text=format_job_status(self.job, reporter),
+            force=force,
+            reply_markup=job_keyboard(self.job["id"], self.job["status"])
+        )
+
+    async def run(self, previous=None):
+        job_id = self.job["id"]
+        if previous is not None:
+            # Предыдущий запуск еще дописывает результаты - ждем, чтобы не отправить повторно
+            await asyncio.gather(previous.task, return_exceptions=True)
+        self.job = await run_db(get_broadcast_job, job_id)
+        if self.job is None or self.job["status"] != JOB_RUNNING:
+            return
+        self._cursor = self.job["cursor"]
+        self._media_group = build_media_group(self.job["media"]) if self.job["media"] else None
+        self._reporter = ProgressReporter(self.job["total"], initial=self.job["sent"] + self.job["failed"])
+
+        logger.info(f"Broadcast job {job_id} started from cursor {self.job['cursor']}")
+        try:
+            await Broadcaster().run(
+                self._recipients(),
+                self._send,
+                on_progress=lambda stats: self.flush(),
+                on_result=self._on_result
+            )
+        finally:
+            await self.flush()
+
+        status = self.stop_status or JOB_COMPLETED
+        # Статус паузы/отмены уже записан обработчиком кнопки
+        if status == JOB_COMPLETED:
+            await run_db(set_broadcast_job_status, job_id, JOB_COMPLETED, (JOB_RUNNING,))
+        self.job = await run_db(get_broadcast_job, job_id)
+        await self._show_status(force=True)
+        logger.info(f"Broadcast job {job_id} stopped with status {self.job['status']}")
+
+def start_broadcast_job(bot, job):
+    """Запускает задание в фоне, если оно еще не выполняется"""
+    previous = _runners.get(job["id"])
+    if previous is not None and previous.stop_status is None:
+        return previous
+
+    runner = BroadcastJobRunner(bot, job)
+    _runners[job["id"]] = runner
+
+    async def run():
+        try:
+            await runner.run(previous)
+        except Exception as e:
+            logger.error(f"Broadcast job {job['id']} failed: {e}", exc_info=True)
+        finally:
+            if _runners.get(job["id"]) is runner:
+                del _runners[job["id"]]
+
+    runner.task = asyncio.get_event_loop().create_task(run())
+    return runner
+
+def stop_broadcast_job(job_id, status):
+    """Просит запущенное задание остановиться (пауза или отмена)"""
+    runner = _runners.get(job_id)
+    if runner is not None:
+        runner.request_stop(status)
+
+async def resume_broadcast_jobs(bot):
+    """Продолжает задания, прерванные перезапуском бота (вызывается из on_startup)"""
+    for job in await run_db(get_broadcast_jobs, JOB_RUNNING, None):
+        logger.info(f"Resuming broadcast job {job['id']} after restart")
+        start_broadcast_job(bot, job)
+
+async def shutdown_broadcast_jobs():
+    """Сохраняет прогресс запущенных заданий при остановке бота; статус running сохраняется"""
+    for runner in list(_runners.values()):
+        try:
+            await runner.flush()
+        except Exception as e:
+            logger.error(f"Error saving broadcast job {runner.job['id']} progress: {e}")
@@ -0,0 +1,44 @@
+import threading
+from config import CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL, CATALOG_STOCK_TTL
+from utils.cache import TTLCache
+
+# Ключи вида (вид записи, версия каталога, версия остатков, *параметры)
+catalog_cache = TTLCache(maxsize=CATALOG_CACHE_SIZE, default_ttl=CATALOG_CACHE_TTL)
+
+# Версии меняются при записи: "catalog" - товары, "stock" - остатки.
+# Читатель берет версию до запроса в БД, поэтому результат, прочитанный
+# до записи, сохраняется под старой версией и больше никогда не отдается
+_versions = {"catalog": 0, "stock": 0}
+_versions_lock = threading.Lock()
+
+def catalog_key(kind, *params, with_stock=True):
+    """Ключ записи для текущих версий; with_stock=False - запись не зависит от остатков"""
+    with _versions_lock:
+        stock_version = _versions["stock"] if with_stock else None
+        return (kind, _versions["catalog"], stock_version) + params
+
+def get_cached(key):
+    """Значение из кэша каталога или None"""
+    return catalog_cache.get(key)
+
+def cache_result(key, value, with_stock=True):
+    """Сохраняет результат; записи с остатками живут CATALOG_STOCK_TTL"""
+    catalog_cache.set(key, value, ttl=CATALOG_STOCK_TTL if with_stock else CATALOG_CACHE_TTL)
+
+def invalidate_catalog():
+    """Сбрасывает весь кэш каталога (создание, изменение, удаление товара)"""
+    with _versions_lock:
+        _versions["catalog"] += 1
+    catalog_cache.clear()
+
+def invalidate_stock():
+    """Сбрасывает записи, зависящие от остатков (списки, страницы, карточки товаров)"""
+    with _versions_lock:
+        _versions["stock"] += 1
+    catalog_cache.delete_where(lambda key: key[2] is not None)
+
+def get_catalog_cache_stats():
+    """Счетчики и приблизительный объем памяти кэша каталога"""
+    stats = catalog_cache.stats()
+    stats["memory_bytes"] = catalog_cache.memory_usage()
+    return stats
@@ -1,6 +1,7 @@
 from aiogram import types
 import random
 import string
+from datetime import datetime
 
 def generate_referral_link(user_id: int) -> str:
     unique_code = ''.join(random.choices(string.ascii_letters + string.digits, k=6))
@@ -10,4 +11,27 @@ def is_user_registered(user_id: int, registered_users: list) -> bool:
     return user_id in registered_users
 
 def format_user_data(user_data: dict) -> str:
-    return f"User ID: {user_data['id']}\nUsername: {user_data['username']}\nFull Name: {user_data['full_name']}"
\ No newline at end of file
+    return f"User ID: {user_data['id']}\nUsername: {user_data['username']}\nFull Name: {user_data['full_name']}"
+
+class ReversedDateRangeError(ValueError):
+    """Начальная дата периода позже конечной"""
+
+def parse_date_range(text: str):
+    """
+    Разбирает период "ДД.ММ.ГГГГ-ДД.ММ.ГГГГ"; одну из границ можно опустить ("01.01.2025-")
+
+    Returns:
+        tuple: (date_from, date_to) - объекты date или None
+
+    Raises:
+        ValueError: Неверный формат или обе границы пустые
+        ReversedDateRangeError: Начальная дата позже конечной
+    """
+    date_from, date_to = [part.strip() for part in (text or "").split("-", 1)]
+    if not date_from and not date_to:
+        raise ValueError("empty period")
+    date_from = datetime.strptime(date_from, "%d.%m.%Y").date() if date_from else None
+    date_to = datetime.strptime(date_to, "%d.%m.%Y").date() if date_to else None
+    if date_from and date_to and date_from > date_to:
+        raise ReversedDateRangeError(f"{date_from} is after {date_to}")
+    return date_from, date_to
@@ -0,0 +1,101 @@
+import time
+from aiogram.utils.exceptions import MessageNotModified, RetryAfter
+from config import PROGRESS_UPDATE_INTERVAL
+from utils.logger import setup_logger
+
+logger = setup_logger('utils.progress')
+
+def format_duration(seconds):
+    """Короткая запись длительности: 45 с, 3 мин 20 с, 1 ч 05 мин"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds} с"
+    if seconds < 3600:
+        return f"{seconds // 60} мин {seconds % 60:02d} с"
+    return f"{seconds // 3600} ч {seconds % 3600 // 60:02d} мин"
+
+class ProgressReporter:
+    """
+    Прогресс долгой операции с прореживанием обновлений по времени:
+    не чаще одного раза в interval секунд и без повторной отправки того же текста.
+
+    edit - корутина edit(text, **kwargs), обычно message.edit_text.
+    Для консольных скриптов edit не нужен: poll() возвращает текст, когда его пора показать
+    """
+
+    def __init__(self, total, edit=None, title="", interval=PROGRESS_UPDATE_INTERVAL, initial=0):
+        self.total = total
+        self.edit = edit
+        self.title = title
+        self.interval = interval
+        self.initial = initial  # Уже обработано до начала замера (например, при продолжении)
+        self.started_at = time.monotonic()
+        # Первое обновление - не раньше чем через interval: короткие операции не редактируют сообщение вовсе
+        self._next_update = self.started_at + interval
+        self._last_text = None
+
+    def rate(self, done):
+        """Обработано единиц в секунду с момента создания"""
+        elapsed = time.monotonic() - self.started_at
+        return (done - self.initial) / elapsed if elapsed > 0 else 0.0
+
+    def eta(self, done):
+        """Оставшееся время в секундах или None, если скорость еще неизвестна"""
+        rate = self.rate(done)
+        if not self.total or rate <= 0:
+            return None
+        return max(0, self.total - done) / rate
+
+    def stats_line(self, done):
+        """Скорость и оставшееся время: ⚡ 24.1/с · осталось ≈ 3 мин 20 с"""
+        line = f"⚡ {self.rate(done):.1f}/с"
+        eta = self.eta(done)
+        if eta is not None and done < self.total:
+            line += f" · осталось ≈ {format_duration(eta)}"
+        return line
+
+    def render(self, done, details=None):
+        """Стандартный текст: заголовок, процент, скорость, ETA и дополнительные строки"""
+        progress = min(100, int(done / self.total * 100)) if self.total else 100
+        lines = [self.title] if self.title else []
+        lines.append(f"Обработано: {done} из {self.total} ({progress}%)")
+        lines.append(self.stats_line(done))
+        if details:
+            lines.extend(details)
+        return "\n".join(lines)
+
+    def poll(self, done, details=None, text=None, force=False):
+        """
+        Возвращает текст, если его пора показать, иначе None
+
+        Args:
+            done: Сколько обработано
+            details: Дополнительные строки для стандартного текста
+            text: Готовый текст вместо стандартного
+            force: Показать независимо от интервала (например, итог)
+        """
+        now = time.monotonic()
+        if not force and now < self._next_update:
+            return None
+        text = text if text is not None else self.render(done, details)
+        if text == self._last_text:
+            return None
+        self._last_text = text
+        self._next_update = now + self.interval
+        return text
+
+    async def update(self, done, details=None, text=None, force=False, **edit_kwargs):
+        """Обновляет сообщение через edit, если пришло время и текст изменился"""
+        text = self.poll(done, details, text, force)
+        if text is None or self.edit is None:
+            return
+        try:
+            await self.edit(text, **edit_kwargs)
+        except MessageNotModified:
+            pass
+        except RetryAfter as e:
+            # Флуд-лимит на редактирование - откладываем следующее обновление
+            self._next_update = time.monotonic() + e.timeout
+            self._last_text = None
+        except Exception as e:
+            logger.debug(f"Progress message not updated: {e}")
@@ -0,0 +1,31 @@
+import asyncio
+from config import RESERVATION_SWEEP_INTERVAL
+from services.database import run_db
+from services.inventory_service import release_expired_reservations
+from utils.logger import setup_logger
+
+logger = setup_logger('utils.reservation_sweeper')
+
+_sweeper_task = None
+
+async def _sweep_forever():
+    """Периодически снимает просроченные резервы товаров"""
+    while True:
+        try:
+            await run_db(release_expired_reservations)
+        except Exception as e:
+            logger.error(f"Error releasing expired reservations: {e}", exc_info=True)
+        await asyncio.sleep(RESERVATION_SWEEP_INTERVAL)
+
+def start_reservation_sweeper():
+    """Запускает фоновую очистку резервов (вызывается из on_startup)"""
+    global _sweeper_task
+    if _sweeper_task is None or _sweeper_task.done():
+        _sweeper_task = asyncio.get_event_loop().create_task(_sweep_forever())
+
+def stop_reservation_sweeper():
+    """Останавливает фоновую очистку резервов (вызывается из on_shutdown)"""
+    global _sweeper_task
+    if _sweeper_task is not None:
+        _sweeper_task.cancel()
+        _sweeper_task = None
@@ -0,0 +1,36 @@
+from config import (
+    SUBSCRIPTION_CACHE_SIZE,
+    SUBSCRIPTION_CACHE_POSITIVE_TTL,
+    SUBSCRIPTION_CACHE_NEGATIVE_TTL,
+    CHANNEL_INFO_CACHE_TTL
+)
+from utils.cache import TTLCache
+
+# (user_id, channel_id) -> True, если пользователь подписан на канал
+membership_cache = TTLCache(maxsize=SUBSCRIPTION_CACHE_SIZE)
+
+# channel_id -> {"title": ..., "invite_link": ..., "username": ...}
+channel_info_cache = TTLCache(maxsize=1000, default_ttl=CHANNEL_INFO_CACHE_TTL)
+
+# Списки каналов из БД: "enabled" - включенные, "all" - ID всех каналов для chat_member
+enabled_channels_cache = TTLCache(maxsize=2, default_ttl=CHANNEL_INFO_CACHE_TTL)
+
+def get_cached_membership(user_id, channel_id):
+    """Возвращает True/False из кэша или None, если результата нет"""
+    return membership_cache.get((user_id, str(channel_id)))
+
+def cache_membership(user_id, channel_id, is_member):
+    """Сохраняет результат проверки: положительный живет дольше отрицательного"""
+    ttl = SUBSCRIPTION_CACHE_POSITIVE_TTL if is_member else SUBSCRIPTION_CACHE_NEGATIVE_TTL
+    membership_cache.set((user_id, str(channel_id)), is_member, ttl=ttl)
+
+def invalidate_channel(channel_id):
+    """Сбрасывает все результаты для канала (при включении, отключении или удалении)"""
+    channel_id = str(channel_id)
+    membership_cache.delete_where(lambda key: key[1] == channel_id)
+    channel_info_cache.delete(channel_id)
+    enabled_channels_cache.clear()
+
+def get_subscription_cache_stats():
+    """Счетчики кэша проверок подписки"""
+    return membership_cache.stats()
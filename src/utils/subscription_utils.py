@@ -1,37 +1,170 @@
+import asyncio
+import time
+from config import SUBSCRIPTION_CHECK_CONCURRENCY, SUBSCRIPTION_CHECK_TIMEOUT, CHANNEL_MEMBERSHIP_MAX_AGE
 from services.channel_service import ChannelService
+from services.channel_member_service import get_member_statuses, save_member_status, is_member_status
+from services.database import run_db
+from utils.logger import setup_logger
+from utils.subscription_cache import (
+    get_cached_membership,
+    cache_membership,
+    channel_info_cache,
+    enabled_channels_cache
+)
 
-async def check_user_subscriptions(bot, user_id):
-    """Check if user is subscribed to all required channels"""
+logger = setup_logger('utils.subscription')
+
+# Ограничивает общее число одновременных запросов к Bot API на проверку подписки
+_check_semaphore = asyncio.Semaphore(SUBSCRIPTION_CHECK_CONCURRENCY)
+
+def _load_enabled_channels():
+    """Загружает включенные каналы (выполняется в пуле потоков БД)"""
+    channel_service = ChannelService()
+    try:
+        return [
+            {"channel_id": channel.channel_id, "channel_name": channel.channel_name}
+            for channel in channel_service.get_enabled_channels()
+        ]
+    finally:
+        channel_service.close_session()
+
+async def get_enabled_channels_cached():
+    """Список включенных каналов; сбрасывается при изменениях через ChannelService"""
+    channels = enabled_channels_cache.get("enabled")
+    if channels is None:
+        channels = await run_db(_load_enabled_channels)
+        enabled_channels_cache.set("enabled", channels)
+    return channels
+
+def _load_all_channel_ids():
+    """Загружает ID всех каналов (выполняется в пуле потоков БД)"""
+    channel_service = ChannelService()
+    try:
+        return set(channel_service.get_all_channel_ids())
+    finally:
+        channel_service.close_session()
+
+async def get_tracked_channel_ids_cached():
+    """ID каналов, для которых сохраняются события chat_member"""
+    channel_ids = enabled_channels_cache.get("all")
+    if channel_ids is None:
+        channel_ids = await run_db(_load_all_channel_ids)
+        enabled_channels_cache.set("all", channel_ids)
+    return channel_ids
+
+async def _get_channel_info(bot, channel_id):
+    """Название и ссылка канала из кэша или через get_chat"""
+    info = channel_info_cache.get(str(channel_id))
+    if info is None:
+        chat = await bot.get_chat(channel_id)
+        info = {
+            "title": chat.title,
+            "invite_link": chat.invite_link or (f"https://t.me/{chat.username}" if chat.username else None)
+        }
+        channel_info_cache.set(str(channel_id), info)
+    return info
+
+async def _check_channel(bot, user_id, channel, is_member=None):
+    """
+    Проверяет подписку на один канал с таймаутом.
+    is_member - уже известный статус (кэш или channel_members); если None, спрашиваем Bot API.
+    Возвращает описание канала, если пользователь не подписан, иначе None.
+    Ошибки и таймауты не блокируют пользователя
+    """
+    channel_id = channel["channel_id"]
+    
+    if is_member is not None:
+        logger.debug(f"Subscription check: user={user_id} channel={channel_id} outcome=local member={is_member}")
+    else:
+        started = time.monotonic()
+        try:
+            async with _check_semaphore:
+                member = await asyncio.wait_for(
+                    bot.get_chat_member(channel_id, user_id),
+                    timeout=SUBSCRIPTION_CHECK_TIMEOUT
+                )
+            is_member = is_member_status(member.status)
+            cache_membership(user_id, channel_id, is_member)
+            outcome = "member" if is_member else "not_member"
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Subscription check timed out: user={user_id} channel={channel_id} "
+                f"after {time.monotonic() - started:.3f}s"
+            )
+            return None
+        except Exception as e:
+            logger.error(
+                f"Error checking subscription: user={user_id} channel={channel_id} "
+                f"after {time.monotonic() - started:.3f}s: {e}"
+            )
+            return None
+        
+        logger.info(
+            f"Subscription check: user={user_id} channel={channel_id} "
+            f"outcome={outcome} latency={time.monotonic() - started:.3f}s"
+        )
+        
+        try:
+            await run_db(save_member_status, user_id, channel_id, member.status)
+        except Exception as e:
+            logger.error(f"Error saving membership: user={user_id} channel={channel_id}: {e}")
+    
+    if is_member:
+        return None
+    
+    try:
+        channel_info = await asyncio.wait_for(
+            _get_channel_info(bot, channel_id),
+            timeout=SUBSCRIPTION_CHECK_TIMEOUT
+        )
+    except Exception as e:
+        logger.error(f"Error loading channel info for {channel_id}: {e}")
+        channel_info = {"title": None, "invite_link": None}
+    
+    return {
+        'id': channel_id,
+        'name': channel["channel_name"] or channel_info["title"],
+        'link': channel_info["invite_link"]
+    }
+
+async def check_user_subscriptions(bot, user_id, force_refresh=False):
+    """
+    Check if user is subscribed to all required channels
+    
+    force_refresh - не доверять кэшу и channel_members, а спросить Bot API по каждому каналу
+    (кнопка "Проверить": событие chat_member о подписке могло не дойти до бота)
+    """
     
     # Get all enabled channels
-    channel_service = ChannelService()
-    enabled_channels = channel_service.get_enabled_channels()
+    enabled_channels = await get_enabled_channels_cached()
     
     # If there are no enabled channels, user is considered subscribed
     if not enabled_channels:
-        channel_service.close_session()
         return True, []
     
-    # Check subscription for each channel
-    not_subscribed = []
+    # Сначала локальное состояние: кэш в памяти, затем одним запросом channel_members,
+    # которую обновляют события chat_member. Bot API - только для неизвестных пар
+    known = {}
+    for channel in ([] if force_refresh else enabled_channels):
+        cached = get_cached_membership(user_id, channel["channel_id"])
+        if cached is not None:
+            known[channel["channel_id"]] = cached
     
-    for channel in enabled_channels:
+    missing = [channel["channel_id"] for channel in enabled_channels if channel["channel_id"] not in known]
+    if missing and not force_refresh:
         try:
-            member = await bot.get_chat_member(channel.channel_id, user_id)
-            is_member = member.status in ['member', 'administrator', 'creator']
-            
-            if not is_member:
-                channel_info = await bot.get_chat(channel.channel_id)
-                channel_name = channel.channel_name or channel_info.title
-                invite_link = channel_info.invite_link or f"https://t.me/{channel_info.username}" if channel_info.username else None
-                
-                not_subscribed.append({
-                    'id': channel.channel_id,
-                    'name': channel_name,
-                    'link': invite_link
-                })
+            statuses = await run_db(get_member_statuses, user_id, missing, CHANNEL_MEMBERSHIP_MAX_AGE)
         except Exception as e:
-            print(f"Error checking subscription for channel {channel.channel_id}: {e}")
+            logger.error(f"Error loading stored memberships for user {user_id}: {e}")
+            statuses = {}
+        for channel_id, status in statuses.items():
+            known[channel_id] = is_member_status(status)
+            cache_membership(user_id, channel_id, known[channel_id])
+    
+    # Check remaining channels concurrently; each check has its own timeout
+    results = await asyncio.gather(
+        *(_check_channel(bot, user_id, channel, known.get(channel["channel_id"])) for channel in enabled_channels)
+    )
+    not_subscribed = [result for result in results if result]
     
-    channel_service.close_session()
-    return len(not_subscribed) == 0, not_subscribed
\ No newline at end of file
+    return len(not_subscribed) == 0, not_subscribed